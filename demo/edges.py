@@ -6,8 +6,9 @@ pip install fastapi
 
 from fastapi import APIRouter
 from pydantic import BaseModel
-from wayfarer import routing, loader, io
+from wayfarer import routing, loader, io, overlay
 import logging
+from functools import lru_cache
 from . import utils
 
 
@@ -21,22 +22,27 @@ class ShortestPath(BaseModel):
     edits: str | None
 
 
-def get_network(fn):
+@lru_cache(maxsize=None)
+def load_network(fn):
     """
-    Can't cache this as any splits etc. modify the underlying dictionary
+    The loaded network is cached and shared between requests, so must not be modified
     """
     log.debug(f"Loading network from {fn}")
     return loader.load_network_from_file(fn)
 
 
+def get_network(fn):
+    """
+    Return an overlay of the cached network, so any splits etc. are
+    only applied for the current request
+    """
+    return overlay.create_overlay(load_network(fn))
+
+
 @router.post("/solve_shortest_path_from_edges")
 async def solve_shortest_path_from_edges(
     shortest_path: ShortestPath, network_filename="../data/dublin.pickle"
 ):
-    # net.copy() returns a shallow copy of the network, so attribute dicts are shared
-    # need to use deepcopy here or the network is modified each time
-    # net = deepcopy(get_network(network_filename))
-
     log.info("Starting solve")
     net = get_network(network_filename)
     # add in the network modifications
@@ -6,13 +6,12 @@ upstream and downstream paths on a river network
 from fastapi import APIRouter
 import logging
 import osmnx as ox
-import networkx as nx
-from shapely.geometry import LineString, Point, Polygon
-from wayfarer import loader
+from shapely.geometry import LineString, Polygon
+from shapely.ops import unary_union
+from wayfarer import loader, compiled, isochrones as wayfarer_isochrones
 from pydantic import BaseModel
 from functools import lru_cache
 import geojson
-import geopandas as gpd
 
 
 router = APIRouter()
@@ -27,45 +26,52 @@ class Coordinate(BaseModel):
 @lru_cache
 def get_readonly_network(fn):
     """
-    Can't cache this as any splits etc. modify the underlying dictionary
+    The network is cached and shared between requests, so must not be modified
     """
     log.debug(f"Loading network from {fn}")
     return loader.load_network_from_file(fn)
 
 
-def make_iso_polys(
-    G, center_node, trip_times, edge_buff=25, node_buff=50, infill=False
-):
-    isochrone_polys = []
-    for trip_time in sorted(trip_times, reverse=True):
-        subgraph = nx.ego_graph(G, center_node, radius=trip_time, distance="time")
+@lru_cache
+def get_compiled_network(fn):
+    return compiled.compile_network(get_readonly_network(fn), weight="length")
 
-        node_points = [
-            Point((data["x"], data["y"])) for node, data in subgraph.nodes(data=True)
-        ]
-        nodes_gdf = gpd.GeoDataFrame({"id": list(subgraph.nodes)}, geometry=node_points)
-        nodes_gdf = nodes_gdf.set_index("id")
 
-        edge_lines = []
+def get_edge_geometry(G, edge):
+    geom = edge.attributes.get("geometry")
+    if geom is None:
+        start = G.nodes[edge.start_node]
+        end = G.nodes[edge.end_node]
+        geom = LineString([(start["x"], start["y"]), (end["x"], end["y"])])
+    return geom
 
-        for n_fr, n_to in subgraph.edges():
-            f = nodes_gdf.loc[n_fr].geometry
-            t = nodes_gdf.loc[n_to].geometry
 
-            # so get the first key for the edges between the nodes
-            edges = G.get_edge_data(n_fr, n_to)
-            edge_lookup = edges[next(iter(edges))].get("geometry", LineString([f, t]))
+def make_iso_polys(
+    G, compiled_network, center_node, trip_distances, edge_buff=25, infill=False
+):
+    """
+    Create isochrone polygons from a single search of the network, with
+    any partly reached edges clipped to the distance that can be travelled
+    """
+    isochrone_polys = []
+    results = wayfarer_isochrones.solve_isochrones(
+        G, center_node, trip_distances, weight="length", compiled=compiled_network
+    )
 
-            edge_lines.append(edge_lookup)
+    for iso in results:
+        edge_lines = [get_edge_geometry(G, e) for e in iso.edges]
+        # partial edges only have a clipped geometry if the edge has a geometry
+        edge_lines += [
+            e.attributes["geometry"]
+            for e in iso.partial_edges
+            if "geometry" in e.attributes
+        ]
 
-        n = nodes_gdf.buffer(node_buff).geometry
-        e = gpd.GeoSeries(edge_lines).buffer(edge_buff).geometry
-        all_gs = list(n) + list(e)
-        new_iso = gpd.GeoSeries(all_gs).unary_union
+        new_iso = unary_union([line.buffer(edge_buff) for line in edge_lines])
 
         # try to fill in surrounded areas so shapes will appear solid and
         # blocks without white space inside them
-        if infill:
+        if infill and isinstance(new_iso, Polygon):
             new_iso = Polygon(new_iso.exterior)
         isochrone_polys.append(new_iso)
 
@@ -89,10 +95,9 @@ async def isochrones(
     trip_times = [5, 10, 15, 20, 25, 30, 60]  # in minutes
     travel_speed = 4.5  # walking speed in km/hour
 
-    # add an edge attribute for time in minutes required to traverse each edge
+    # convert the trip times to distances rather than adding a time to every edge
     meters_per_minute = travel_speed * 1000 / 60  # km per hour to m per minute
-    for _, _, _, data in net.edges(data=True, keys=True):
-        data["time"] = data["length"] / meters_per_minute
+    trip_distances = [t * meters_per_minute for t in trip_times]
 
     # get one color for each isochrone
     iso_colors = ox.plot.get_colors(
@@ -101,7 +106,12 @@ async def isochrones(
 
     # make the isochrone polygons
     isochrone_polys = make_iso_polys(
-        net, center_node, trip_times, edge_buff=25, node_buff=0, infill=True
+        net,
+        get_compiled_network(network_filename),
+        center_node,
+        trip_distances,
+        edge_buff=25,
+        infill=True,
     )
 
     feats = []
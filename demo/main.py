@@ -4,7 +4,10 @@ pip install fastapi
 
 
 C:\VirtualEnvs\wayfarer\Scripts\activate.ps1
-cd D:\GitHub\wayfarer\demo
+cd D:\GitHub\wayfarer
+# publish the shared networks once, before starting the workers (see demo/publish.py)
+python -m demo.publish data/stbrice.pickle
+cd demo
 uvicorn main:app --reload --port 8020  --log-level 'debug'
 
 http://127.0.0.1:8020/docs
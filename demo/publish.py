@@ -0,0 +1,34 @@
+r"""
+Publish the demo networks to shared memory, so they can be attached to by
+all the uvicorn worker processes. Run this once before starting uvicorn, and again
+to replace a network while the workers are running
+
+cd D:\GitHub\wayfarer
+python -m demo.publish data/stbrice.pickle
+uvicorn demo.main:app --workers 4 --port 8020
+
+"""
+
+import sys
+import logging
+from wayfarer import loader, shared
+from demo import utils
+
+log = logging.getLogger("web")
+
+
+def publish_network(fn):
+    """
+    Load a network from a file in the current process, and publish it
+    so workers only ever attach to it
+    """
+    name = utils.get_network_name(fn)
+    log.info(f"Publishing network from {fn} as {name}")
+    return shared.publish_network(loader.load_network_from_file(fn), name)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    for fn in sys.argv[1:] or ["data/stbrice.pickle"]:
+        print(publish_network(fn))
+    print("Done!")
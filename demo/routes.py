@@ -6,7 +6,7 @@ pip install fastapi
 
 from fastapi import APIRouter
 from pydantic import BaseModel
-from wayfarer import routing, loader, io, functions, splitter
+from wayfarer import routing, io, functions, splitter, overlay, spatial
 from wayfarer.splitter import SPLIT_KEY_SEPARATOR
 import logging
 import json
@@ -19,12 +19,12 @@ log = logging.getLogger("web")
 router = APIRouter()
 
 
-def get_network(fn):
+def get_network(fn, spatial_index=False):
     """
-    Can't cache this as any splits etc. modify the underlying dictionary
+    Return an overlay of the shared network, so any splits etc. are
+    only applied for the current request
     """
-    log.debug(f"Loading network from {fn}")
-    return loader.load_network_from_file(fn)
+    return overlay.create_overlay(utils.get_shared_network(fn, spatial_index))
 
 
 class ShortestPathPoints(BaseModel):
@@ -36,8 +36,12 @@ class ShortestPathPoints(BaseModel):
 async def solve_shortest_path_from_points(
     shortest_path_points: ShortestPathPoints, network_filename="../data/stbrice.pickle"
 ):
-    net = get_network(network_filename)
     points_geojson = json.loads(shortest_path_points.points)
+    # the spatial index is only needed to snap points without an edge
+    snap_points = any(
+        f["properties"].get("edgeId") is None for f in points_geojson["features"]
+    )
+    net = get_network(network_filename, spatial_index=snap_points)
 
     if shortest_path_points.edits:
         split_edge_keys = utils.add_edits_to_network(net, shortest_path_points.edits)
@@ -47,9 +51,13 @@ async def solve_shortest_path_from_points(
     nodes = []
 
     for feature in points_geojson["features"]:
-        edge_id = feature["properties"]["edgeId"]
         index = feature["properties"]["index"]
         point = shape(feature["geometry"])
+        edge_id = feature["properties"].get("edgeId")
+
+        if edge_id is None:
+            # snap the point to the closest edge
+            edge_id = spatial.get_spatial_index(net).get_nearest_edges(point)[0].key
 
         network_edge = functions.get_edge_by_key(net, edge_id)
         line = utils.get_geometry_for_edge(net, network_edge)
@@ -1,4 +1,6 @@
 import json
+import os
+import logging
 from shapely.geometry import shape, Point
 from collections import defaultdict
 from wayfarer import (
@@ -8,10 +10,47 @@ from wayfarer import (
     NODEID_TO_FIELD,
     GEOMETRY_FIELD,
 )
-from wayfarer import functions, splitter
+from wayfarer import functions, splitter, shared, spatial
 from wayfarer.splitter import SPLIT_KEY_SEPARATOR
 
 
+log = logging.getLogger("web")
+
+
+def get_network_name(fn):
+    """
+    Return the name a network file is published under
+    """
+    return os.path.splitext(os.path.basename(fn))[0]
+
+
+def get_shared_network(fn, spatial_index=False):
+    """
+    Return the network attached from shared memory, so it is shared between all
+    uvicorn worker processes. The network must be published once before the workers
+    are started, using demo/publish.py, so no worker loads the full network.
+    The network is read-only so use an overlay for any splits etc.
+
+    A spatial index is only created when requested. The index is not shared - each worker
+    decodes the geometry of every edge to build its own index, so the memory used grows
+    with the size of the network in every worker that snaps points to the network
+    """
+    name = get_network_name(fn)
+    try:
+        net = shared.attach_network(name)
+    except FileNotFoundError as ex:
+        raise RuntimeError(
+            f"The network {name} has not been published. Run python -m demo.publish {fn} "
+            "before starting the workers"
+        ) from ex
+
+    # each process creates its own spatial index, which is copied to any overlays
+    if spatial_index and spatial.get_spatial_index(net) is None:
+        spatial.create_spatial_index(net)
+
+    return net
+
+
 def get_geometry_for_edge(net, network_edge):
     return shape(
         network_edge.attributes[GEOMETRY_FIELD]
@@ -22,16 +61,32 @@ def add_edits_to_network(net, jsn: str):
     split_edge_keys = defaultdict(list)
 
     geojson_obj = json.loads(jsn)
-    for idx, feature in enumerate(geojson_obj["features"]):
+    features = geojson_obj["features"]
+
+    # get all the network edges that the edits connect to in one call
+    edge_ids = [
+        f["properties"][field]
+        for f in features
+        for field in ("startFeatureId", "endFeatureId")
+    ]
+    network_edges, _ = functions.get_edges_by_keys(net, edge_ids)
+    network_edges_by_key = {e.key: e for e in network_edges}
+
+    def get_network_edge(edge_id):
+        # edits can also connect to edits added earlier in the loop
+        edge = network_edges_by_key.get(edge_id)
+        return edge if edge is not None else functions.get_edge_by_key(net, edge_id)
+
+    for idx, feature in enumerate(features):
         feat_id = feature["id"]
         shapely_feature = shape(feature["geometry"])
 
         start_edge_id = feature["properties"]["startFeatureId"]
-        start_network_edge = functions.get_edge_by_key(net, start_edge_id)
+        start_network_edge = get_network_edge(start_edge_id)
         start_line = get_geometry_for_edge(net, start_network_edge)
 
         end_edge_id = feature["properties"]["endFeatureId"]
-        end_network_edge = functions.get_edge_by_key(net, end_edge_id)
+        end_network_edge = get_network_edge(end_edge_id)
         end_line = get_geometry_for_edge(net, end_network_edge)
 
         sp = Point(shapely_feature.coords[0])
@@ -14,8 +14,10 @@ pytest -v scripts/benchmarking.py
 import pytest
 import copy
 import marshal
+import random
 import networkx
-from wayfarer import loader, functions
+from shapely.geometry import LineString
+from wayfarer import loader, functions, routing, linearref, Edge
 
 
 @pytest.fixture
@@ -97,6 +99,9 @@ def test_get_edges_from_nodes_all_lengths(benchmark):
     marshal: 588 seconds
     copy.deepcopy: 660 seconds
 
+    With copy_on_write=True attributes are returned as an AttributeProxy, so are only
+    copied when modified - around 20% faster even for these small attribute dicts
+
     See discussions at https://stackoverflow.com/a/55157627/179520
     """
     net = networkx.MultiGraph()
@@ -106,3 +111,58 @@ def test_get_edges_from_nodes_all_lengths(benchmark):
 
     node_list = [1, 2]
     benchmark(functions.get_edges_from_nodes, net, node_list, shortest_path_only=False)
+
+
+@pytest.mark.parametrize("use_subgraph", [False, True])
+@pytest.mark.parametrize("edge_count", [1000, 10000, 50000])
+def test_find_ordered_path(benchmark, edge_count, use_subgraph):
+    """
+    pytest -v scripts/benchmarking.py -k "test_find_ordered_path"
+
+    Ordering the shuffled edges of a long path, such as a river trace. Before the edges
+    were found using a dictionary indexed by key each lookup checked the full list of edges:
+    10,000 edges - 1.3 seconds
+    50,000 edges - 33 seconds
+    """
+
+    edges = [
+        Edge(i, i + 1, i, {"EDGE_ID": i, "NODEID_FROM": i, "NODEID_TO": i + 1})
+        for i in range(edge_count)
+    ]
+    random.Random(0).shuffle(edges)
+
+    ordered_edges = benchmark(
+        routing.find_ordered_path,
+        edges,
+        start_node=edge_count,
+        use_subgraph=use_subgraph,
+    )
+    assert len(ordered_edges) == edge_count
+
+
+@pytest.mark.parametrize("single_pass", [True, False])
+def test_split_line(benchmark, single_pass):
+    """
+    pytest -v scripts/benchmarking.py -k "test_split_line"
+
+    Splitting a line of 1,000 vertices at 100 measures. When create_line projected every
+    vertex onto the line, creating each part with create_line took 3 seconds. It now takes
+    16 ms, and split_line 2 ms
+    """
+
+    line = LineString([(i, i % 2) for i in range(1000)])
+    measures = [i * 9.5 for i in range(1, 101)]
+
+    def create_lines():
+        bounds = [0.0] + measures + [line.length]
+        return [
+            linearref.create_line(line, bounds[i], bounds[i + 1])
+            for i in range(len(bounds) - 1)
+        ]
+
+    if single_pass:
+        lines = benchmark(linearref.split_line, line, measures)
+    else:
+        lines = benchmark(create_lines)
+
+    assert len(lines) == len(measures) + 1
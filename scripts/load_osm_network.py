@@ -16,7 +16,10 @@ def main(shp):
     164 MB with lookup
     """
     recs = fiona.open(shp, "r")
-    net = loader.load_network_from_geometries(recs, key_field="osm_id")
+    # create the edge tables using a process for each CPU
+    net = loader.load_network_from_geometries_in_chunks(
+        recs, key_field="osm_id", processes=None
+    )
 
     print(net.name)
     print(net.graph["keys"][618090637])
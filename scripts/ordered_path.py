@@ -7,13 +7,12 @@ from wayfarer import loader, routing, functions
 fn = r"./data/tipperary.txt"
 net = loader.load_network_from_file(fn)
 
-edges = []
 # get edge_ids per ProjectId per Group (see SQL above)
 edge_ids = [1393622, 1414298, 1425617, 1457705, 1464289, 1548367, 1573235]
 
-for edge_id in edge_ids:
-    edge = functions.get_edge_by_key(net, edge_id, with_data=True)
-    edges.append(edge)
+edges, missing = functions.get_edges_by_keys(net, edge_ids, with_data=True)
+if missing:
+    print("Missing edges:", missing)
 
 ordered_edges = routing.find_ordered_path(edges)
 
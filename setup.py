@@ -28,6 +28,6 @@ setup(
     license="MIT",
     package_data={"wayfarer": ["py.typed"]},
     packages=["wayfarer"],
-    install_requires=["networkx>=3.0", "geojson"],
+    install_requires=["networkx>=3.0", "geojson", "numpy", "shapely>=2"],
     zip_safe=False,
 )
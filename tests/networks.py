@@ -188,6 +188,36 @@ def bottle_network():
     return tuples_to_net(data)
 
 
+def create_geometry_grid(size=20, detour=1.0, intern_nodes=False, keep_geometry=False):
+    """
+    Create a grid of geometries, with node ids in the x|y form.
+    The ``detour`` factor multiplies the lengths of the edges, and with ``keep_geometry``
+    the geometries are stored on the edges as __geo_interface__ dicts
+    """
+    feats = []
+    edge_id = 0
+    for x in range(size):
+        for y in range(size):
+            for x2, y2 in ((x + 1, y), (x, y + 1)):
+                if x2 < size and y2 < size:
+                    feats.append(
+                        {
+                            "properties": {"EDGE_ID": edge_id, "LEN_": 100 * detour},
+                            "geometry": {
+                                "type": "LineString",
+                                "coordinates": [
+                                    (x * 100, y * 100),
+                                    (x2 * 100, y2 * 100),
+                                ],
+                            },
+                        }
+                    )
+                    edge_id += 1
+    return loader.load_network_from_geometries(
+        feats, keep_geometry=keep_geometry, intern_nodes=intern_nodes
+    )
+
+
 if __name__ == "__main__":
     simple_network()
     print("Done!")
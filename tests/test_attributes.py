@@ -0,0 +1,309 @@
+"""
+pytest -v tests/test_attributes.py
+"""
+
+import copy
+import pickle
+import tracemalloc
+import pytest
+import networkx
+from wayfarer import (
+    attributes,
+    functions,
+    routing,
+    splitter,
+    overlay,
+    columnar,
+    loader,
+)
+from tests import networks
+from tests.networks import create_geometry_grid
+
+
+def test_add():
+    store = attributes.AttributeStore()
+    atts = {"EDGE_ID": 1, "LEN_": 10, "NODEID_FROM": 1, "NODEID_TO": 2, "NAME": "A"}
+    view = store.add(atts)
+
+    assert view == atts
+    assert list(view) == list(atts)
+    assert len(view) == 5
+    assert "NAME" in view and "TYPE" not in view
+    assert view.get("TYPE") is None
+    assert type(view["LEN_"]) is float
+    assert len(store) == 1
+
+    with pytest.raises(KeyError):
+        view["TYPE"]
+
+
+def test_shared_schemas():
+    store = attributes.AttributeStore()
+    view1 = store.add({"EDGE_ID": 1, "TYPE": "road", "ONEWAY": True})
+    view2 = store.add({"EDGE_ID": 2, "TYPE": "path", "ONEWAY": 1})
+    view3 = store.add({"EDGE_ID": 3, "ONEWAY": 1, "TYPE": "road"})
+
+    assert view1._schema is view2._schema
+    assert view1._schema is not view3._schema
+    assert view1["ONEWAY"] is True
+    assert view2["ONEWAY"] is not True
+
+    # changing the attribute names uses the shared schemas
+    view3["EXTRA"] = 1
+    view1["EXTRA"] = 1
+    assert view1._schema is store.get_schema(("EDGE_ID", "TYPE", "ONEWAY", "EXTRA"))
+
+
+def test_unhashable_values():
+    store = attributes.AttributeStore()
+    geometry = {"type": "LineString", "coordinates": [(0, 0), (0, 1)]}
+    view = store.add({"EDGE_ID": 1, "geometry": geometry})
+    assert view["geometry"] is geometry
+
+
+def test_modify():
+    store = attributes.AttributeStore()
+    view = store.add({"EDGE_ID": 1, "LEN_": 10, "NAME": "A"})
+    other = store.add({"EDGE_ID": 2, "LEN_": 10, "NAME": "A"})
+
+    view["NAME"] = "B"
+    view["LEN_"] = 5
+    view["WITH_DIRECTION"] = False
+    view["NODEID_FROM"] = "0|0"
+
+    assert view == {
+        "EDGE_ID": 1,
+        "LEN_": 5,
+        "NAME": "B",
+        "WITH_DIRECTION": False,
+        "NODEID_FROM": "0|0",
+    }
+    # other edges are not affected
+    assert other == {"EDGE_ID": 2, "LEN_": 10, "NAME": "A"}
+
+    del view["NAME"]
+    del view["NODEID_FROM"]
+    assert view == {"EDGE_ID": 1, "LEN_": 5, "WITH_DIRECTION": False}
+
+    view.update({"NAME": "C"})
+    assert view.pop("NAME") == "C"
+
+
+def test_columns():
+    store = attributes.AttributeStore()
+    store.add({"EDGE_ID": 1, "NODEID_FROM": 1, "NODEID_TO": 2})
+    assert store.columns["EDGE_ID"].values.typecode == "q"
+
+    view = store.add({"EDGE_ID": "A", "NODEID_FROM": 2**70, "NODEID_TO": True})
+    assert view == {"EDGE_ID": "A", "NODEID_FROM": 2**70, "NODEID_TO": True}
+    assert view["NODEID_TO"] is True
+    assert isinstance(store.columns["EDGE_ID"].values, list)
+
+
+def test_compact_network():
+    net = create_geometry_grid(size=5)
+    expected = list(net.edges(keys=True, data=True))
+
+    store = attributes.compact_network(net)
+    assert len(store) == len(expected)
+    assert list(net.edges(keys=True, data=True)) == expected
+
+    for u, v, key, atts in net.edges(keys=True, data=True):
+        assert isinstance(atts, attributes.EdgeAttributes)
+        # both directions of an undirected edge use the same view
+        assert net[v][u][key] is atts
+
+    # compacting again does not add the edges to the store
+    attributes.compact_network(net, store)
+    assert len(store) == len(expected)
+
+
+def test_compact_directed_network():
+    net = networkx.MultiDiGraph()
+    net.add_edge(1, 2, key="A", LEN_=10)
+    net.add_edge(2, 1, key="B", LEN_=20)
+    attributes.compact_network(net)
+
+    assert isinstance(net.pred[2][1]["A"], attributes.EdgeAttributes)
+    assert net.pred[2][1]["A"] is net.succ[1][2]["A"]
+
+
+def test_functions():
+    net = networks.simple_network()
+    original = networks.simple_network()
+    attributes.compact_network(net)
+
+    edge = functions.get_edge_by_key(net, 3)
+    assert edge == functions.get_edge_by_key(original, 3)
+
+    edges = routing.solve_shortest_path(net, 1, 5)
+    assert edges == routing.solve_shortest_path(original, 1, 5)
+    # the attributes are copied to dictionaries
+    assert all(type(e.attributes) is dict for e in edges)
+
+    edges = functions.get_edges_from_nodes(net, [1, 2, 3], with_direction_flag=True)
+    assert edges[0].attributes["WITH_DIRECTION"] is True
+    # the network is not modified
+    assert "WITH_DIRECTION" not in net[1][2][1]
+
+
+def test_attribute_proxy():
+    atts = {"EDGE_ID": 1, "LEN_": 10, "NAME": "A"}
+    proxy = attributes.AttributeProxy(atts)
+
+    assert proxy == atts and atts == proxy
+    assert proxy == attributes.AttributeProxy(dict(atts))
+    assert list(proxy) == list(atts) and len(proxy) == 3
+    assert "NAME" in proxy and proxy.get("TYPE") is None
+    assert repr(proxy) == repr(atts)
+    assert type(proxy.copy()) is dict
+
+    # changes to the network are visible until the proxy is modified
+    atts["NAME"] = "B"
+    assert proxy["NAME"] == "B"
+    assert not proxy.is_copy
+
+    del proxy["NAME"]
+    proxy["LEN_"] = 5
+    assert proxy.is_copy
+    assert proxy == {"EDGE_ID": 1, "LEN_": 5}
+    assert atts == {"EDGE_ID": 1, "LEN_": 10, "NAME": "B"}
+
+
+def test_attribute_proxy_pickle():
+    proxy = attributes.AttributeProxy({"EDGE_ID": 1, "LIST": [1, 2]})
+    assert pickle.loads(pickle.dumps(proxy)) == proxy
+
+    new_proxy = copy.deepcopy(proxy)
+    assert type(new_proxy) is dict
+    assert new_proxy["LIST"] is not proxy["LIST"]
+
+
+def test_get_edges_from_nodes_without_copies():
+    net = networks.simple_network()
+    edges = functions.get_edges_from_nodes(net, [1, 2, 3], copy_on_write=True)
+
+    for edge in edges:
+        assert isinstance(edge.attributes, attributes.AttributeProxy)
+        assert (
+            edge.attributes._attributes is net[edge.start_node][edge.end_node][edge.key]
+        )
+
+    edges[0].attributes["EDGE_ID"] = "new"
+    assert net[1][2][1]["EDGE_ID"] == 1
+
+
+def test_split_edges():
+    net = create_geometry_grid(size=3)
+    attributes.compact_network(net)
+
+    splitter.split_network_edge(net, 1, [50])
+    edges = routing.solve_shortest_path(net, "100|100", "1::50")
+    assert sum(e.attributes["LEN_"] for e in edges) == 150
+
+
+def test_overlay():
+    net = create_geometry_grid(size=3)
+    attributes.compact_network(net)
+    ov = overlay.create_overlay(net)
+
+    splitter.split_network_edge(ov, 1, [50])
+    assert "1::50" in ov
+    assert "1::50" not in net
+    assert isinstance(net["0|0"]["0|100"][1], attributes.EdgeAttributes)
+
+
+def test_columnar(tmp_path):
+    filename = str(tmp_path / "network.wyf")
+    net = create_geometry_grid(size=3)
+    expected = list(net.edges(keys=True, data=True))
+    attributes.compact_network(net)
+
+    columnar.save_network(net, filename)
+    loaded = columnar.load_network(filename)
+    assert list(loaded.edges(keys=True, data=True)) == expected
+
+
+def test_pickle():
+    net = create_geometry_grid(size=3)
+    store = attributes.compact_network(net)
+
+    new_net = pickle.loads(pickle.dumps(net))
+    views = [d for _, _, d in new_net.edges(data=True)]
+    assert views == [d for _, _, d in net.edges(data=True)]
+    assert all(v._store is views[0]._store for v in views)
+    assert len(views[0]._store) == len(store)
+
+
+def test_deepcopy():
+    store = attributes.AttributeStore()
+    view = store.add({"EDGE_ID": 1, "LIST": [1, 2]})
+    new_view = copy.deepcopy(view)
+    assert new_view == view
+    assert new_view["LIST"] is not view["LIST"]
+
+
+def test_memory():
+
+    # edges with properties similar to those of OpenStreetMap roads
+    recs = [
+        {
+            "EDGE_ID": i,
+            "LEN_": i * 1.5,
+            "NODEID_FROM": i,
+            "NODEID_TO": i + 1,
+            "osm_id": str(1000000 + i),
+            "code": 5122,
+            "fclass": "residential",
+            "name": None,
+            "ref": None,
+            "oneway": "B",
+            "maxspeed": 0,
+            "layer": 0,
+            "bridge": "F",
+            "tunnel": "F",
+        }
+        for i in range(10000)
+    ]
+
+    tracemalloc.start()
+    try:
+        dicts = [dict(r) for r in recs]
+        dict_size = tracemalloc.get_traced_memory()[0]
+        del dicts
+
+        start = tracemalloc.get_traced_memory()[0]
+        store = attributes.AttributeStore()
+        views = [store.add(r) for r in recs]
+        view_size = tracemalloc.get_traced_memory()[0] - start
+    finally:
+        tracemalloc.stop()
+
+    assert len(views) == len(recs)
+    assert view_size < dict_size * 0.6
+
+
+def test_load_network_compact_attributes():
+    recs = [
+        {
+            "geometry": {"type": "LineString", "coordinates": [(0, i), (0, i + 1)]},
+            "properties": {"EDGE_ID": i, "NAME": "A"},
+        }
+        for i in range(10)
+    ]
+    net = loader.load_network_from_geometries_in_chunks(recs, chunk_size=3)
+    compact_net = loader.load_network_from_geometries_in_chunks(
+        recs, chunk_size=3, compact_attributes=True
+    )
+
+    assert list(compact_net.edges(keys=True, data=True)) == list(
+        net.edges(keys=True, data=True)
+    )
+    stores = {d._store for _, _, d in compact_net.edges(data=True)}
+    assert len(stores) == 1
+
+
+def test_doctest():
+    import doctest
+
+    print(doctest.testmod(attributes))
@@ -0,0 +1,216 @@
+"""
+pytest -v tests/test_columnar.py
+"""
+
+import pytest
+import networkx
+from shapely.geometry import LineString
+from wayfarer import columnar, functions, routing, splitter, overlay, compiled
+from tests import networks
+from tests.networks import create_geometry_grid
+
+
+@pytest.fixture
+def filename(tmp_path):
+    return str(tmp_path / "network.wyf")
+
+
+def test_save_and_load(filename):
+    net = networks.simple_network()
+    columnar.save_network(net, filename)
+    loaded = columnar.load_network(filename)
+
+    assert isinstance(loaded, networkx.MultiGraph)
+    assert list(loaded.nodes()) == list(net.nodes())
+    assert list(loaded.edges(keys=True, data=True)) == list(
+        net.edges(keys=True, data=True)
+    )
+    assert dict(loaded.graph["keys"]) == dict(net.graph["keys"])
+
+
+def test_round_trip(filename):
+    net = create_geometry_grid(size=5)
+    columnar.save_network(net, filename)
+    new_net = columnar.to_network(columnar.load_network(filename))
+
+    assert type(new_net) is networkx.MultiGraph
+    assert list(new_net.nodes()) == list(net.nodes())
+    assert networkx.utils.edges_equal(
+        new_net.edges(keys=True, data=True), net.edges(keys=True, data=True)
+    )
+    assert new_net.graph["keys"] == net.graph["keys"]
+
+    # the new network can be modified
+    functions.add_edge(new_net, "0|0", "400|400", "new", {"LEN_": 1})
+
+
+def test_round_trip_directed(filename):
+    net = networkx.MultiDiGraph(name="directed")
+    net.add_edge(1, 2, key="A", LEN_=10)
+    net.add_edge(2, 1, key="B", LEN_=20)
+    net.add_edge(2, 3, key="C", LEN_=10)
+    columnar.save_network(net, filename)
+
+    loaded = columnar.load_network(filename)
+    assert isinstance(loaded, networkx.MultiDiGraph)
+    assert list(loaded.in_edges(1, keys=True)) == [(2, 1, "B")]
+    assert networkx.shortest_path(loaded, 1, 3) == [1, 2, 3]
+    assert loaded.graph["name"] == "directed"
+    assert "keys" not in loaded.graph
+
+    new_net = columnar.to_network(loaded)
+    assert type(new_net) is networkx.MultiDiGraph
+    assert list(new_net.edges(keys=True, data=True)) == list(
+        net.edges(keys=True, data=True)
+    )
+
+
+def test_attribute_types(filename):
+    net = networkx.MultiGraph()
+    attributes = [
+        {"int": 1, "float": 1.5, "str": "a", "bool": True, "list": [1, 2]},
+        {"int": 2, "float": 2.5, "mixed": 1, "tuple": (1, 2)},
+        {"str": "ü", "mixed": "b", "geometry": LineString([(0, 0), (1, 1)])},
+    ]
+    for i, atts in enumerate(attributes):
+        net.add_edge(i, i + 1, key=i, **atts)
+
+    columnar.save_network(net, filename)
+    loaded = columnar.load_network(filename)
+
+    for i, atts in enumerate(attributes):
+        assert dict(loaded[i][i + 1][i]) == atts
+        for name, value in atts.items():
+            assert type(loaded[i][i + 1][i][name]) is type(value)
+
+
+def test_mixed_keys(filename):
+    net = networkx.MultiGraph()
+    net.add_edge("a", 1, key=1, LEN_=1)
+    net.add_edge(1, 2, key="B", LEN_=1)
+    net.graph["keys"] = {1: ("a", 1), "B": (1, 2)}
+    columnar.save_network(net, filename)
+
+    loaded = columnar.load_network(filename)
+    assert functions.get_edge_by_key(loaded, "B").end_node == 2
+    assert functions.get_edge_by_key(loaded, 1).start_node == "a"
+    assert list(networkx.shortest_path(loaded, "a", 2)) == ["a", 1, 2]
+
+
+def test_get_edge_by_key(filename):
+    net = create_geometry_grid(size=5)
+    columnar.save_network(net, filename)
+    loaded = columnar.load_network(filename)
+
+    for key in net.graph["keys"]:
+        assert functions.get_edge_by_key(loaded, key) == functions.get_edge_by_key(
+            net, key
+        )
+
+    with pytest.raises(KeyError):
+        functions.get_edge_by_key(loaded, 999)
+
+    with pytest.raises(KeyError):
+        functions.get_edge_by_key(loaded, "1")
+
+
+def test_solve_shortest_path(filename):
+    net = create_geometry_grid(size=5)
+    columnar.save_network(net, filename)
+    loaded = columnar.load_network(filename)
+
+    # the stored compiled network is used
+    assert columnar.get_compiled_network(loaded) is loaded.compiled
+    edges = routing.solve_shortest_path(loaded, "0|0", "400|400")
+    assert sum(e.attributes["LEN_"] for e in edges) == 800
+
+    # unless a different weight is used
+    assert columnar.get_compiled_network(loaded, weight=None) is None
+    edges = routing.solve_shortest_path(loaded, "0|0", "400|400", weight=None)
+    assert len(edges) == 8
+
+
+def test_routing_without_compiled_network(filename):
+    net = create_geometry_grid(size=6)
+    columnar.save_network(net, filename)
+    loaded = columnar.load_network(filename)
+
+    # routes solved with networkx use the adjacency of the loaded network. Nodes
+    # can be visited in a different order, so routes with the same cost are compared
+    for end_node in ["500|0", "300|400", "500|500"]:
+        expected = routing.solve_shortest_path(net, "0|0", end_node, weight=None)
+        edges = routing.solve_shortest_path(loaded, "0|0", end_node, weight=None)
+        assert len(edges) == len(expected)
+        assert routing.get_path_ends(edges) == ("0|0", end_node)
+
+    expected = routing.solve_matching_path(net, "0|0", "300|300", 900, cutoff=8)
+    edges = routing.solve_matching_path(loaded, "0|0", "300|300", 900, cutoff=8)
+    assert sum(e.attributes["LEN_"] for e in edges) == 800
+    assert [e.key for e in edges] == [e.key for e in expected]
+
+
+def test_adjacency_cache(filename, monkeypatch):
+    net = create_geometry_grid(size=4)
+    columnar.save_network(net, filename)
+    loaded = columnar.load_network(filename)
+
+    # the neighbours of each node are only created once
+    assert loaded._adj["0|0"] is loaded._adj["0|0"]
+    with pytest.raises(TypeError):
+        loaded["0|0"]["100|0"]["new"] = {}  # type: ignore[index]
+
+    monkeypatch.setattr(columnar, "ADJACENCY_CACHE_SIZE", 2)
+    for node in net.nodes:
+        assert dict(loaded._adj[node]) == dict(net._adj[node])
+    assert len(loaded._adj._cache) == 2
+
+
+def test_compiled(filename):
+    net = networks.circle_network()
+    columnar.save_network(net, filename, weight=None)
+    cn = columnar.load_network(filename).compiled
+
+    assert cn.weight is None
+    assert list(cn.weights) == list(compiled.compile_network(net, weight=None).weights)
+    assert compiled.shortest_path(cn, 1, 3) == [1, 2, 3]
+
+
+def test_loaded_network_is_readonly(filename):
+    net = networks.simple_network()
+    columnar.save_network(net, filename)
+    loaded = columnar.load_network(filename)
+
+    with pytest.raises(networkx.NetworkXError):
+        functions.add_edge(loaded, 1, 5, "new", {})
+
+    with pytest.raises(TypeError):
+        loaded[1][2][1]["LEN_"] = 0
+
+
+def test_overlay(filename):
+    net = create_geometry_grid(size=5)
+    columnar.save_network(net, filename)
+    loaded = columnar.load_network(filename)
+
+    ov = overlay.create_overlay(loaded)
+    splitter.split_network_edge(ov, 1, [50])
+    edges = routing.solve_shortest_path(ov, "100|0", "1::50")
+    assert [e.key for e in edges] == [0, "1::50"]
+    assert "1::50" not in loaded
+
+    with pytest.raises(KeyError):
+        functions.add_edge(ov, 0, 1, 0, {})
+
+
+def test_invalid_file(filename):
+    with open(filename, "wb") as f:
+        f.write(b"0" * 64)
+
+    with pytest.raises(ValueError):
+        columnar.load_network(filename)
+
+
+def test_doctest():
+    import doctest
+
+    print(doctest.testmod(columnar))
@@ -0,0 +1,239 @@
+"""
+pytest -v tests/test_compiled.py
+"""
+
+import pickle
+import pytest
+import networkx
+from networkx import NetworkXNoPath, NodeNotFound
+from wayfarer import compiled, routing, loader
+from tests import networks
+from tests.networks import create_geometry_grid
+
+
+def test_compile_network():
+    net = networks.simple_network()
+    cn = compiled.compile_network(net)
+
+    assert len(cn) == 5
+    # each undirected edge is stored in both directions
+    assert len(cn.targets) == 8
+    assert sorted(cn.keys) == [1, 2, 3, 4]
+    assert cn.directed is False
+
+
+def test_compile_network_is_readonly():
+    net = networks.simple_network()
+    cn = compiled.compile_network(net)
+
+    with pytest.raises(TypeError):
+        cn.weights[0] = 0
+
+
+def test_compile_directed_network():
+    net = networkx.MultiDiGraph()
+    net.add_edge(1, 2, key="A", LEN_=10)
+    net.add_edge(2, 3, key="B", LEN_=10)
+    cn = compiled.compile_network(net)
+
+    assert len(cn.targets) == 2
+    assert compiled.shortest_path(cn, 1, 3) == [1, 2, 3]
+
+    with pytest.raises(NetworkXNoPath):
+        compiled.shortest_path(cn, 3, 1)
+
+    with pytest.raises(NetworkXNoPath):
+        compiled.dijkstra(cn, 3, 1)
+
+
+@pytest.mark.parametrize("bidirectional", [(True), (False)])
+def test_shortest_path(bidirectional):
+    net = networks.circle_network()
+    cn = compiled.compile_network(net)
+
+    for start_node in net.nodes():
+        for end_node in net.nodes():
+            nodes = compiled.shortest_path(cn, start_node, end_node, bidirectional)
+            expected = networkx.shortest_path_length(
+                net, start_node, end_node, weight="LEN_"
+            )
+            length = networkx.path_weight(networkx.Graph(net), nodes, "LEN_")
+            assert length == expected
+
+
+def test_shortest_path_parallel_edges():
+    net = networkx.MultiGraph()
+    net.add_edge(0, 1, key="A", LEN_=100)
+    net.add_edge(0, 1, key="B", LEN_=10)
+    net.add_edge(1, 2, key="C", LEN_=10)
+    net.add_edge(0, 2, key="D", LEN_=50)
+
+    cn = compiled.compile_network(net)
+    assert compiled.shortest_path(cn, 0, 2) == [0, 1, 2]
+
+
+def test_shortest_path_missing_node():
+    net = networks.simple_network()
+    cn = compiled.compile_network(net)
+
+    with pytest.raises(NodeNotFound):
+        compiled.shortest_path(cn, 1, 99)
+
+
+def test_shortest_path_no_weight():
+    net = networkx.MultiGraph()
+    net.add_edge(0, 1, key="A", LEN_=1)
+    net.add_edge(1, 2, key="B", LEN_=1)
+    net.add_edge(0, 2, key="C", LEN_=50)
+
+    cn = compiled.compile_network(net, weight=None)
+    assert compiled.shortest_path(cn, 0, 2) == [0, 2]
+
+
+def test_pickle_compiled_network():
+    net = networks.simple_network()
+    cn = compiled.compile_network(net)
+    cn2 = pickle.loads(pickle.dumps(cn))
+
+    assert list(cn2.targets) == list(cn.targets)
+    assert compiled.shortest_path(cn2, 1, 5) == [1, 2, 3, 4, 5]
+
+
+def test_solve_shortest_path_compiled():
+    feats = [
+        {
+            "properties": {"EDGE_ID": i},
+            "geometry": {
+                "type": "LineString",
+                "coordinates": [(i * 100, 0), ((i + 1) * 100, 0)],
+            },
+        }
+        for i in range(5)
+    ]
+    net = loader.load_network_from_geometries(feats)
+    cn = compiled.compile_network(net)
+
+    edges = routing.solve_shortest_path(net, "0|0", "500|0", compiled=cn)
+    expected = routing.solve_shortest_path(net, "0|0", "500|0")
+    assert edges == expected
+    assert [e.key for e in edges] == [0, 1, 2, 3, 4]
+
+
+def test_solve_shortest_path_compiled_weight_mismatch():
+    net = networks.simple_network()
+    cn = compiled.compile_network(net, weight=None)
+
+    with pytest.raises(ValueError):
+        routing.solve_shortest_path(net, 1, 5, compiled=cn)
+
+
+def test_get_node_coordinates():
+    net = create_geometry_grid(size=2)
+    cn = compiled.compile_network(net)
+    coords = compiled.get_node_coordinates(cn)
+    idx = cn.get_node_index("100|0")
+    assert coords[idx * 2] == 100 and coords[idx * 2 + 1] == 0
+
+
+def test_get_node_coordinates_interned():
+    net = create_geometry_grid(size=2, intern_nodes=True)
+    interner = net.graph["node_interner"]
+    cn = compiled.compile_network(net)
+    coords = compiled.get_node_coordinates(cn, interner)
+    idx = cn.get_node_index(interner.get_node((100, 0)))
+    assert coords[idx * 2] == 100 and coords[idx * 2 + 1] == 0
+
+    heuristic = compiled.euclidean_heuristic(cn, coords)
+    start, end = interner.get_node((0, 0)), interner.get_node((100, 100))
+    assert compiled.astar(cn, start, end, heuristic) == compiled.shortest_path(
+        cn, start, end
+    )
+
+
+def test_get_node_coordinates_invalid():
+    net = networks.simple_network()
+    cn = compiled.compile_network(net)
+    with pytest.raises(ValueError):
+        compiled.get_node_coordinates(cn)
+
+
+def test_astar_euclidean():
+    net = create_geometry_grid()
+    cn = compiled.compile_network(net)
+    heuristic = compiled.euclidean_heuristic(cn)
+
+    source = cn.get_node_index("0|0")
+    target = cn.get_node_index("1900|0")
+
+    path, astar_settled = compiled._astar(cn, source, target, heuristic)
+    _, dijkstra_settled = compiled._astar(cn, source, target)
+
+    assert len(path) == 20
+    # A* should only need to search along the direct path
+    assert astar_settled < dijkstra_settled / 4
+
+
+def test_astar_landmarks():
+    # lengths are not planar distances so the euclidean heuristic is not
+    # admissible, but landmarks can still be used
+    net = create_geometry_grid(detour=0.1)
+    cn = compiled.compile_network(net)
+    landmarks = compiled.create_landmarks(cn, count=4)
+    heuristic = compiled.landmark_heuristic(landmarks)
+
+    assert len(landmarks.nodes) == 4
+
+    source = cn.get_node_index("0|0")
+    target = cn.get_node_index("1900|0")
+
+    path, astar_settled = compiled._astar(cn, source, target, heuristic)
+    _, dijkstra_settled = compiled._astar(cn, source, target)
+    assert astar_settled < dijkstra_settled
+
+    expected = networkx.shortest_path_length(net, "0|0", "1900|0", weight="LEN_")
+    assert len(path) - 1 == round(expected / 10)
+
+
+def test_astar_landmarks_directed():
+    net = networkx.MultiDiGraph()
+    net.add_edge(0, 1, key="A", LEN_=10)
+    net.add_edge(1, 2, key="B", LEN_=10)
+    net.add_edge(2, 0, key="C", LEN_=5)
+    net.add_edge(3, 2, key="D", LEN_=5)  # unreachable from other nodes
+    cn = compiled.compile_network(net)
+    heuristic = compiled.landmark_heuristic(compiled.create_landmarks(cn, count=4))
+
+    assert compiled.astar(cn, 0, 2, heuristic) == [0, 1, 2]
+    assert compiled.astar(cn, 2, 1, heuristic) == [2, 0, 1]
+    with pytest.raises(NetworkXNoPath):
+        compiled.astar(cn, 0, 3, heuristic)
+
+
+def test_solve_shortest_path_heuristic():
+    net = create_geometry_grid(size=5)
+    cn = compiled.compile_network(net)
+    heuristic = compiled.euclidean_heuristic(cn)
+
+    edges = routing.solve_shortest_path(
+        net, "0|0", "400|400", compiled=cn, heuristic=heuristic
+    )
+    assert sum(e.attributes["LEN_"] for e in edges) == 800
+
+
+def test_solve_shortest_path_heuristic_not_compiled():
+    net = create_geometry_grid(size=2)
+    with pytest.raises(ValueError):
+        routing.solve_shortest_path(net, "0|0", "100|100", heuristic=lambda u, v: 0)
+
+
+def test_single_source_dijkstra():
+    net = networks.simple_network()
+    cn = compiled.compile_network(net)
+    costs = compiled.single_source_dijkstra(cn, cn.get_node_index(1), cutoff=20)
+    assert sorted(costs.values()) == [0, 10, 20]
+
+
+def test_doctest():
+    import doctest
+
+    print(doctest.testmod(compiled))
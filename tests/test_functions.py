@@ -2,10 +2,13 @@
 pytest -v tests/test_functions.py
 """
 
+import json
 import logging
+import math
 import pytest
 import wayfarer
 from wayfarer import loader, functions, Edge, WITH_DIRECTION_FIELD
+from wayfarer.attributes import AttributeProxy
 import networkx
 
 
@@ -40,6 +43,61 @@ def test_get_edge_by_key_missing():
         functions.get_edge_by_key(net, -1)
 
 
+@pytest.mark.parametrize("use_reverse_lookup", [(True), (False)])
+def test_get_edges_by_keys(use_reverse_lookup):
+    recs = [
+        {"EDGE_ID": 1, "LEN_": 100, "NODEID_FROM": 0, "NODEID_TO": 100},
+        {"EDGE_ID": 2, "LEN_": 50, "NODEID_FROM": 100, "NODEID_TO": 200},
+        {"EDGE_ID": 3, "LEN_": 10, "NODEID_FROM": 200, "NODEID_TO": 300},
+    ]
+    net = loader.load_network_from_records(recs, use_reverse_lookup=use_reverse_lookup)
+    del net[200][300][3]["LEN_"]
+
+    edges, missing = functions.get_edges_by_keys(net, [3, -1, 1, -2])
+    assert edges == [functions.get_edge_by_key(net, k) for k in (3, 1)]
+    assert missing == [-1, -2]
+
+    edges, missing = functions.get_edges_by_keys(net, [2], with_data=False)
+    assert edges == [(100, 200, 2, {})]
+
+    columns, missing = functions.get_edges_by_keys(net, [1, 2, 3, 4], as_columns=True)
+    assert columns.keys == [1, 2, 3]
+    assert columns.start_nodes == [0, 100, 200]
+    assert columns.end_nodes == [100, 200, 300]
+    assert columns.lengths[:2].tolist() == [100, 50]
+    assert math.isnan(columns.lengths[2])
+    assert missing == [4]
+
+
+def test_get_edges_by_keys_copy_on_write():
+    recs = [{"EDGE_ID": 1, "LEN_": 100, "NODEID_FROM": 0, "NODEID_TO": 100}]
+    net = loader.load_network_from_records(recs)
+
+    edges, _ = functions.get_edges_by_keys(net, [1])
+    edge = edges[0]
+    assert isinstance(edge.attributes, AttributeProxy)
+
+    edge.attributes["LEN_"] = 50
+    edge.attributes["NAME"] = "A"
+    del edge.attributes["NODEID_TO"]
+    assert net[0][100][1] == {
+        "EDGE_ID": 1,
+        "LEN_": 100,
+        "NODEID_FROM": 0,
+        "NODEID_TO": 100,
+    }
+    assert edge.attributes == {"EDGE_ID": 1, "LEN_": 50, "NODEID_FROM": 0, "NAME": "A"}
+
+
+def test_get_edges_by_keys_out_of_date():
+    recs = [{"EDGE_ID": 1, "LEN_": 100, "NODEID_FROM": 0, "NODEID_TO": 100}]
+    net = loader.load_network_from_records(recs)
+    net.remove_edge(0, 100, 1)
+
+    edges, missing = functions.get_edges_by_keys(net, [1])
+    assert edges == [] and missing == [1]
+
+
 def test_to_edge():
     edge = wayfarer.to_edge((0, 1, 1, {"LEN_": 10}))
     assert edge == Edge(start_node=0, end_node=1, key=1, attributes={"LEN_": 10})
@@ -581,6 +639,54 @@ def test_copy_attributes_class():
     assert atts["geom"].x == 1
 
 
+def get_list_network():
+    net = networkx.MultiGraph()
+    net.add_edge(1, 2, key="A", EDGE_ID="A", LEN_=10, NAMES=["A"])
+    net.add_edge(2, 3, key="B", EDGE_ID="B", LEN_=10, NAMES=["B"])
+    return net
+
+
+def get_path_results(net, copy_on_write=False):
+    return [
+        functions.get_edges_from_nodes(
+            net, [1, 2, 3], with_direction_flag=True, copy_on_write=copy_on_write
+        ),
+        list(
+            functions.get_all_paths_from_nodes(
+                net, [1, 2, 3], with_direction_flag=True, copy_on_write=copy_on_write
+            )
+        )[0],
+        functions.get_path_edges(
+            net, [(1, 2, "A"), (2, 3, "B")], copy_on_write=copy_on_write
+        ),
+    ]
+
+
+def test_get_edges_json():
+    net = get_list_network()
+    for edges in get_path_results(net):
+        atts = [edge.attributes for edge in edges]
+        assert all(type(a) is dict for a in atts)
+        assert json.loads(json.dumps(atts)) == atts
+
+
+def test_get_edges_nested_values():
+    net = get_list_network()
+    for edges in get_path_results(net):
+        edges[0].attributes["NAMES"].append("C")
+    # nested values are copied, so the network is unchanged
+    assert net[1][2]["A"]["NAMES"] == ["A"]
+
+
+def test_get_edges_copy_on_write():
+    net = get_list_network()
+    for edges in get_path_results(net, copy_on_write=True):
+        assert all(isinstance(e.attributes, AttributeProxy) for e in edges)
+        assert edges[0].attributes["NAMES"] is net[1][2]["A"]["NAMES"]
+        edges[0].attributes["LEN_"] = 5
+        assert net[1][2]["A"]["LEN_"] == 10
+
+
 def test_doctest():
     import doctest
 
@@ -0,0 +1,141 @@
+"""
+pytest -v tests/test_hierarchy.py
+"""
+
+import random
+import pytest
+import networkx
+from networkx import NetworkXNoPath
+from wayfarer import hierarchy, compiled, routing, functions, loader
+from wayfarer import WITH_DIRECTION_FIELD
+from tests import networks
+
+
+def create_grid_network(size=8, graph_type=networkx.MultiGraph, seed=1):
+    """
+    Create a grid network with random edge lengths, and some
+    parallel edges
+    """
+    rng = random.Random(seed)
+    recs = []
+    edge_id = 0
+
+    for x in range(size):
+        for y in range(size):
+            node = x * size + y
+            neighbours = []
+            if x + 1 < size:
+                neighbours.append((x + 1) * size + y)
+            if y + 1 < size:
+                neighbours.append(x * size + y + 1)
+            for n in neighbours:
+                recs.append(
+                    {
+                        "EDGE_ID": edge_id,
+                        "NODEID_FROM": node,
+                        "NODEID_TO": n,
+                        "LEN_": rng.randint(1, 20),
+                    }
+                )
+                edge_id += 1
+                if rng.random() < 0.1:
+                    # add a parallel edge
+                    recs.append(
+                        {
+                            "EDGE_ID": edge_id,
+                            "NODEID_FROM": n,
+                            "NODEID_TO": node,
+                            "LEN_": rng.randint(1, 20),
+                        }
+                    )
+                    edge_id += 1
+
+    return loader.load_network_from_records(recs, graph_type=graph_type)
+
+
+def get_path_length(net, path):
+    return sum(net[u][v][k]["LEN_"] for u, v, k in path)
+
+
+@pytest.mark.parametrize("graph_type", [(networkx.MultiGraph), (networkx.MultiDiGraph)])
+def test_shortest_path_edges(graph_type):
+    net = create_grid_network(graph_type=graph_type)
+    ch = hierarchy.build_contraction_hierarchy(net)
+
+    nodes = list(net.nodes())
+    rng = random.Random(2)
+
+    for _ in range(50):
+        start_node, end_node = rng.sample(nodes, 2)
+        try:
+            expected = networkx.shortest_path_length(
+                net, start_node, end_node, weight="LEN_"
+            )
+        except NetworkXNoPath:
+            with pytest.raises(NetworkXNoPath):
+                hierarchy.shortest_path_edges(ch, start_node, end_node)
+            continue
+
+        path = hierarchy.shortest_path_edges(ch, start_node, end_node)
+        assert get_path_length(net, path) == expected
+
+        # check the edges are connected in the order of travel
+        assert path[0][0] == start_node
+        assert path[-1][1] == end_node
+        for (_, v, _), (u, _, _) in zip(path, path[1:]):
+            assert v == u
+
+
+def test_shortest_path():
+    net = networks.simple_network()
+    ch = hierarchy.build_contraction_hierarchy(net)
+    assert hierarchy.shortest_path(ch, 1, 5) == [1, 2, 3, 4, 5]
+    assert hierarchy.shortest_path(ch, 5, 1) == [5, 4, 3, 2, 1]
+    assert hierarchy.shortest_path(ch, 3, 3) == [3]
+
+
+def test_shortcuts_are_unpacked():
+    net = create_grid_network()
+    ch = hierarchy.build_contraction_hierarchy(net)
+    assert ch.shortcut_count > 0
+
+    path = hierarchy.shortest_path_edges(ch, 0, len(net.nodes()) - 1)
+    # all keys should be original keys in the network
+    for u, v, key in path:
+        assert key in net[u][v]
+
+
+def test_compiled_weight_mismatch():
+    net = networks.simple_network()
+    cn = compiled.compile_network(net, weight=None)
+    with pytest.raises(ValueError):
+        hierarchy.build_contraction_hierarchy(net, compiled=cn)
+
+
+def test_solve_shortest_path_from_hierarchy():
+    net = networks.simple_network()
+    ch = hierarchy.build_contraction_hierarchy(net)
+
+    edges = routing.solve_shortest_path_from_hierarchy(net, ch, 5, 1)
+    assert edges == routing.solve_shortest_path(net, 5, 1)
+    assert [e.attributes[WITH_DIRECTION_FIELD] for e in edges] == [False] * 4
+
+    # results can be passed to other functions expecting lists of edges
+    ordered_edges = routing.find_ordered_path(edges, start_node=1)
+    assert [e.key for e in ordered_edges] == [1, 2, 3, 4]
+
+    # the network attributes are not modified
+    edge = functions.get_edge_by_key(net, 1)
+    assert WITH_DIRECTION_FIELD not in edge.attributes
+
+
+def test_solve_shortest_path_from_hierarchy_same_node():
+    net = networks.simple_network()
+    ch = hierarchy.build_contraction_hierarchy(net)
+    assert routing.solve_shortest_path_from_hierarchy(net, ch, 1, 1) == []
+
+
+def test_doctest():
+    import doctest
+
+    print(doctest.testmod(hierarchy))
@@ -0,0 +1,283 @@
+"""
+pytest -v tests/test_indexes.py
+"""
+
+import pickle
+import pytest
+import networkx
+from wayfarer import indexes, functions, splitter, overlay, columnar, loader
+from tests import networks
+
+ROAD_TYPES = ["motorway", "primary", "residential", "path"]
+
+
+def create_network(size=50):
+    """
+    Create a path network with a variety of attribute values
+    """
+    net = loader.create_graph()
+    for i in range(size):
+        atts = {
+            "EDGE_ID": i,
+            "LEN_": 10,
+            "NODEID_FROM": i,
+            "NODEID_TO": i + 1,
+            "TYPE": ROAD_TYPES[i % len(ROAD_TYPES)],
+            "SPEED": (i * 7) % 100,
+        }
+        if i % 10 == 0:
+            del atts["SPEED"]
+        elif i % 10 == 1:
+            atts["SPEED"] = None
+        loader.add_edge(net, atts)
+    return net
+
+
+def get_keys(edges):
+    return sorted((e.key for e in edges), key=str)
+
+
+def scan_attribute(net, field, value):
+    return get_keys(
+        functions.Edge(u, v, k, d)
+        for u, v, k, d in net.edges(keys=True, data=True)
+        if field in d and d[field] == value
+    )
+
+
+def scan_range(net, field, min_value, max_value):
+    return get_keys(
+        functions.Edge(u, v, k, d)
+        for u, v, k, d in net.edges(keys=True, data=True)
+        if d.get(field) is not None and min_value <= d[field] <= max_value
+    )
+
+
+def test_hash_index():
+    net = create_network()
+    index = indexes.create_attribute_index(net, "TYPE")
+    assert len(index) == 50
+
+    for road_type in ROAD_TYPES + ["unknown"]:
+        edges = list(functions.get_edges_by_attribute(net, "TYPE", road_type))
+        assert get_keys(edges) == scan_attribute(net, "TYPE", road_type)
+        for edge in edges:
+            assert edge.attributes is net[edge.start_node][edge.end_node][edge.key]
+
+
+def test_hash_index_none_values():
+    net = create_network()
+    indexes.create_attribute_index(net, "SPEED")
+
+    edges = functions.get_edges_by_attribute(net, "SPEED", None)
+    assert get_keys(edges) == scan_attribute(net, "SPEED", None)
+
+
+def test_hash_index_unhashable_values():
+    net = networkx.MultiGraph()
+    net.add_edge(0, 1, key="A", CODES=[1, 2])
+    net.add_edge(1, 2, key="B", CODES=3)
+    index = indexes.create_attribute_index(net, "CODES")
+    assert len(index) == 1
+
+    edges = functions.get_edges_by_attribute(net, "CODES", [1, 2])
+    assert get_keys(edges) == ["A"]
+
+
+def test_sorted_index():
+    net = create_network()
+    index = indexes.create_attribute_index(net, "SPEED", ordered=True)
+    # edges without a speed, or a speed of None, are not indexed
+    assert len(index) == 40
+
+    for min_value, max_value in [(0, 100), (20, 40), (49, 49), (50, 10)]:
+        edges = list(
+            functions.get_edges_by_attribute_range(net, "SPEED", min_value, max_value)
+        )
+        assert get_keys(edges) == scan_range(net, "SPEED", min_value, max_value)
+        speeds = [e.attributes["SPEED"] for e in edges]
+        assert speeds == sorted(speeds)
+
+    # an open range
+    edges = functions.get_edges_by_attribute_range(net, "SPEED", min_value=90)
+    assert get_keys(edges) == scan_range(net, "SPEED", 90, 100)
+
+    # the sorted index is also used for equality
+    edges = functions.get_edges_by_attribute(net, "SPEED", 42)
+    assert get_keys(edges) == scan_attribute(net, "SPEED", 42)
+    edges = functions.get_edges_by_attribute(net, "SPEED", None)
+    assert get_keys(edges) == scan_attribute(net, "SPEED", None)
+
+
+def test_range_without_index():
+    net = create_network()
+    edges = functions.get_edges_by_attribute_range(net, "SPEED", 20, 40)
+    assert get_keys(edges) == scan_range(net, "SPEED", 20, 40)
+
+
+def test_sorted_index_incomparable_values():
+    net = networkx.MultiGraph()
+    net.add_edge(0, 1, key="A", SPEED=10)
+    net.add_edge(1, 2, key="B", SPEED="fast")
+
+    with pytest.raises(TypeError):
+        indexes.create_attribute_index(net, "SPEED", ordered=True)
+
+
+def test_sorted_index_add_incomparable_values():
+    net = create_network()
+    index = indexes.create_attribute_index(net, "SPEED", ordered=True)
+    functions.add_edge(net, 100, 101, "new", {"SPEED": 10})
+    edge_count = len(net.edges)
+    index_count = len(index)
+
+    # errors are raised before the network or indexes are modified
+    with pytest.raises(TypeError):
+        functions.add_edge(net, 101, 102, "X", {"SPEED": "fast"})
+    with pytest.raises(TypeError):
+        loader.add_edges(
+            net, [(101, 102, "Y", {"SPEED": 20}), (102, 103, "Z", {"SPEED": "fast"})]
+        )
+
+    assert len(net.edges) == edge_count
+    assert not any(key in net.graph["keys"] for key in ["X", "Y", "Z"])
+    assert len(index) == index_count
+    edges = functions.get_edges_by_attribute_range(net, "SPEED", 0, 100)
+    assert get_keys(edges) == scan_range(net, "SPEED", 0, 100)
+
+    # new edges are also checked against each other
+    net = loader.create_graph()
+    indexes.create_attribute_index(net, "SPEED", ordered=True)
+    with pytest.raises(TypeError):
+        loader.add_edges(
+            net, [(0, 1, "A", {"SPEED": 20}), (1, 2, "B", {"SPEED": "fast"})]
+        )
+    assert len(net.edges) == 0
+
+
+def test_attribute_index_abstract():
+    with pytest.raises(TypeError):
+        indexes.AttributeIndex("SPEED")  # type: ignore[abstract]
+
+
+def test_add_remove_edges():
+    net = create_network()
+    hash_index = indexes.create_attribute_index(net, "TYPE")
+    sorted_index = indexes.create_attribute_index(net, "SPEED", ordered=True)
+
+    functions.remove_edge_by_key(net, 2)
+    functions.add_edge(net, 100, 101, "new", {"TYPE": "primary", "SPEED": 30})
+    functions.add_edge(net, 101, 102, "other", {"NAME": "A"})
+    functions.remove_edge_by_key(net, "new")
+    functions.add_edge(net, 100, 101, "new", {"TYPE": "path", "SPEED": 35})
+
+    assert len(hash_index) == 50
+    assert len(sorted_index) == 40
+
+    for road_type in ROAD_TYPES:
+        edges = functions.get_edges_by_attribute(net, "TYPE", road_type)
+        assert get_keys(edges) == scan_attribute(net, "TYPE", road_type)
+
+    edges = functions.get_edges_by_attribute_range(net, "SPEED", 0, 100)
+    assert get_keys(edges) == scan_range(net, "SPEED", 0, 100)
+
+
+def test_split_edges():
+    net = networks.simple_network()
+    for u, v, atts in net.edges(data=True):
+        atts["TYPE"] = "road"
+    indexes.create_attribute_index(net, "TYPE")
+    indexes.create_attribute_index(net, "LEN_", ordered=True)
+
+    splitter.split_network_edge(net, 1, [2, 5])
+    keys = get_keys(functions.get_edges_by_attribute(net, "TYPE", "road"))
+    assert keys == scan_attribute(net, "TYPE", "road")
+    assert "1::2" in keys and 1 not in keys
+
+    edges = functions.get_edges_by_attribute_range(net, "LEN_", 0, 5)
+    assert get_keys(edges) == ["1::10", "1::2", "1::5"]
+
+
+def test_rebuild(monkeypatch):
+    monkeypatch.setattr(indexes, "MIN_REBUILD_CHANGES", 1)
+    net = create_network(size=10)
+    index = indexes.create_attribute_index(net, "TYPE")
+
+    for key in range(5):
+        functions.remove_edge_by_key(net, key)
+    functions.add_edge(net, 100, 101, "new", {"TYPE": "primary"})
+
+    assert index._added == {} and index._removed == set()
+    assert len(index) == 6
+    edges = functions.get_edges_by_attribute(net, "TYPE", "primary")
+    assert get_keys(edges) == scan_attribute(net, "TYPE", "primary")
+
+
+def test_overlay():
+    net = create_network()
+    index = indexes.create_attribute_index(net, "TYPE")
+    expected = scan_attribute(net, "TYPE", "primary")
+
+    ov = overlay.create_overlay(net)
+    functions.remove_edge_by_key(ov, 1)
+    functions.add_edge(ov, 100, 101, "new", {"TYPE": "primary"})
+
+    ov_index = indexes.get_attribute_index(ov, "TYPE")
+    assert ov_index is not index
+    edges = functions.get_edges_by_attribute(ov, "TYPE", "primary")
+    assert get_keys(edges) == scan_attribute(ov, "TYPE", "primary")
+
+    edges = functions.get_edges_by_attribute(net, "TYPE", "primary")
+    assert get_keys(edges) == expected
+
+
+def test_add_edges():
+    net = loader.create_graph()
+    indexes.create_attribute_index(net, "TYPE")
+    loader.add_edges(
+        net, [(0, 1, "A", {"TYPE": "road"}), (1, 2, "B", {"TYPE": "path"})]
+    )
+
+    edges = functions.get_edges_by_attribute(net, "TYPE", "road")
+    assert get_keys(edges) == ["A"]
+
+
+def test_get_attribute_index():
+    net = create_network()
+    sorted_index = indexes.create_attribute_index(net, "SPEED", ordered=True)
+    assert indexes.get_attribute_index(net, "SPEED") is sorted_index
+    assert indexes.get_attribute_index(net, "SPEED", indexes.HashIndex) is None
+
+    hash_index = indexes.create_attribute_index(net, "SPEED")
+    assert indexes.get_attribute_index(net, "SPEED") is hash_index
+    assert indexes.create_attribute_index(net, "SPEED", ordered=True) is sorted_index
+    assert len(net.graph["indexes"]) == 2
+
+
+def test_pickle():
+    net = create_network()
+    indexes.create_attribute_index(net, "TYPE")
+
+    new_net = pickle.loads(pickle.dumps(net))
+    edges = functions.get_edges_by_attribute(new_net, "TYPE", "path")
+    assert get_keys(edges) == scan_attribute(net, "TYPE", "path")
+
+
+def test_columnar(tmp_path):
+    filename = str(tmp_path / "network.wyf")
+    net = create_network()
+    indexes.create_attribute_index(net, "TYPE")
+    columnar.save_network(net, filename)
+
+    loaded = columnar.load_network(filename)
+    assert indexes.get_attribute_index(loaded, "TYPE") is None
+
+    indexes.create_attribute_index(loaded, "TYPE")
+    edges = functions.get_edges_by_attribute(loaded, "TYPE", "path")
+    assert get_keys(edges) == scan_attribute(net, "TYPE", "path")
+
+
+def test_doctest():
+    import doctest
+
+    print(doctest.testmod(indexes))
@@ -0,0 +1,117 @@
+"""
+pytest -v tests/test_isochrones.py
+"""
+
+import pytest
+import networkx
+from shapely.geometry import LineString
+from wayfarer import isochrones, compiled, loader, LENGTH_FIELD, OFFSET_FIELD
+from tests import networks
+
+
+def create_line_network(graph_type=networkx.MultiGraph):
+    """
+    Three 100m edges in a straight line, with the middle edge digitised in reverse
+    """
+    feats = []
+    for i, coords in enumerate(
+        [[(0, 0), (100, 0)], [(200, 0), (100, 0)], [(200, 0), (300, 0)]]
+    ):
+        feats.append(
+            {
+                "properties": {"EDGE_ID": i},
+                "geometry": {"type": "LineString", "coordinates": coords},
+            }
+        )
+    return loader.load_network_from_geometries(
+        feats, keep_geometry=True, graph_type=graph_type
+    )
+
+
+def test_solve_isochrones():
+    net = networks.simple_network()
+    results = isochrones.solve_isochrones(net, 1, [10, 25, 100])
+
+    assert [iso.cutoff for iso in results] == [10, 25, 100]
+    assert results[0].nodes == {1: 0, 2: 10}
+    assert [e.key for e in results[1].edges] == [1, 2]
+    assert [e.key for e in results[2].edges] == [1, 2, 3, 4]
+    assert results[2].partial_edges == []
+
+
+def test_solve_isochrones_matches_ego_graph():
+    net = networks.circle_network()
+    cutoffs = [5, 12, 30]
+    results = isochrones.solve_isochrones(net, 1, cutoffs)
+
+    for iso in results:
+        expected = networkx.ego_graph(net, 1, radius=iso.cutoff, distance="LEN_")
+        assert set(iso.nodes) == set(expected.nodes())
+
+
+def test_partial_edges():
+    net = create_line_network()
+    results = isochrones.solve_isochrones(net, "0|0", [150, 250])
+
+    iso = results[0]
+    assert [e.key for e in iso.edges] == [0]
+    assert len(iso.partial_edges) == 1
+
+    # the middle edge is digitised in reverse, so the reachable part is at its end
+    partial = iso.partial_edges[0]
+    assert partial.key == 1
+    assert partial.attributes[LENGTH_FIELD] == 50
+    assert partial.attributes[OFFSET_FIELD] == 50
+    assert partial.attributes["geometry"].equals(LineString([(150, 0), (100, 0)]))
+
+    iso = results[1]
+    assert [e.key for e in iso.edges] == [0, 1]
+    assert (
+        iso.partial_edges[0]
+        .attributes["geometry"]
+        .equals(LineString([(200, 0), (250, 0)]))
+    )
+
+    # the network is unchanged
+    assert net["100|0"]["200|0"][1][LENGTH_FIELD] == 100
+
+
+def test_partial_edges_from_both_ends():
+    net = networkx.MultiGraph()
+    net.add_edge(0, 1, key="A", LEN_=10)
+    net.add_edge(0, 2, key="B", LEN_=10)
+    net.add_edge(1, 2, key="C", LEN_=10)
+
+    iso = isochrones.solve_isochrones(net, 0, [14])[0]
+    assert [e.key for e in iso.edges] == ["A", "B"]
+    partial = [(e.key, e.attributes[OFFSET_FIELD]) for e in iso.partial_edges]
+    assert partial == [("C", 0), ("C", 6)]
+
+    # both ends meet so the edge is fully reached
+    iso = isochrones.solve_isochrones(net, 0, [15])[0]
+    assert [e.key for e in iso.edges] == ["A", "B", "C"]
+
+
+def test_solve_isochrones_directed():
+    net = create_line_network(graph_type=networkx.MultiDiGraph)
+
+    # the middle edge cannot be traversed from the start
+    iso = isochrones.solve_isochrones(net, "0|0", [1000])[0]
+    assert list(iso.nodes) == ["0|0", "100|0"]
+    assert iso.partial_edges == []
+
+
+def test_solve_isochrones_compiled():
+    net = networks.simple_network()
+    cn = compiled.compile_network(net, weight=None)
+    iso = isochrones.solve_isochrones(net, 1, [2], weight=None, compiled=cn)[0]
+    assert iso.nodes == {1: 0, 2: 1, 3: 2}
+
+    with pytest.raises(ValueError):
+        isochrones.solve_isochrones(net, 1, [2], compiled=cn)
+
+
+def test_doctest():
+    import doctest
+
+    print(doctest.testmod(isochrones))
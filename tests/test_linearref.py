@@ -454,6 +454,155 @@ def test_get_nearest_vertex():
     assert distance == 2.0
 
 
+def test_get_nearest_vertices():
+
+    line = LineString([(0, 0), (0, 50), (0, 50), (30, 80), (100, 80)])
+    points = [(2, 21), (-5, -5), (20, 60), (50, 90), (120, 70), (0, 50)]
+    coords, distances = linearref.get_nearest_vertices(points, line)
+
+    for (x, y), snapped, dist in zip(points, coords, distances):
+        pt, expected_distance = linearref.get_nearest_vertex(Point(x, y), line)
+        assert tuple(snapped) == pytest.approx((pt.x, pt.y))
+        assert dist == pytest.approx(expected_distance)
+
+
+def test_get_nearest_vertices_chunked(monkeypatch):
+
+    monkeypatch.setattr(linearref, "MAX_PROJECTIONS", 3)
+    line = LineString([(0, 0), (0, 50), (0, 100)])
+    points = [Point(1, y) for y in range(0, 100, 10)]
+    coords, distances = linearref.get_nearest_vertices(points, line)
+
+    assert coords.tolist() == [[0, y] for y in range(0, 100, 10)]
+    assert distances.tolist() == [1.0] * 10
+
+
+def test_get_nearest_vertices_empty():
+
+    line = LineString([(0, 0), (0, 100)])
+    coords, distances = linearref.get_nearest_vertices([], line)
+    assert coords.shape == (0, 2)
+    assert distances.shape == (0,)
+
+
+def test_get_measures_on_line():
+
+    line = LineString([(0, 0), (0, 50), (50, 50)])
+    points = [(0, 10), (10, 50), (60, 60)]
+    measures = linearref.get_measures_on_line(line, points)
+    expected = [linearref.get_measure_on_line(line, Point(p)) for p in points]
+    assert measures.tolist() == expected
+
+
+def test_get_closest_lines():
+
+    lines = [
+        (2, LineString([(10, 0), (10, 100)])),
+        (1, LineString([(0, 0), (0, 100)])),
+        (3, LineString([(0, 0), (20, 0), (20, 20), (1, 1)])),
+    ]
+    points = [(5, 50), (9, 50), (15, 5), (19, 19)]
+    codes, coords, distances = linearref.get_closest_lines(lines, points)
+
+    for (x, y), code, snapped in zip(points, codes, coords):
+        expected_code, pt = linearref.get_closest_line(lines, Point(x, y))
+        assert code == expected_code
+        assert tuple(snapped) == pytest.approx((pt.x, pt.y))
+
+    # equal distances use the lowest code
+    assert codes[0] == 1
+    assert distances.tolist()[:2] == [5.0, 1.0]
+
+
+def test_get_closest_lines_multilinestring():
+
+    lines = [(1, MultiLineString([[(0, 0), (0, 100)]]))]
+    with pytest.raises(ValueError):
+        linearref.get_closest_lines(lines, [(0, 0)])
+
+
+def test_split_line():
+    ls = LineString([(0, 0), (0, 50), (0, 100), (100, 100)])
+    measures = [25, 50, 150]
+    lines = linearref.split_line(ls, measures)
+
+    assert len(lines) == 4
+    assert [line.length for line in lines] == [25, 25, 100, 50]
+    assert list(lines[1].coords) == [(0.0, 25.0), (0.0, 50.0)]
+    assert list(lines[2].coords) == [(0.0, 50.0), (0.0, 100.0), (50.0, 100.0)]
+
+    bounds = [0] + measures + [ls.length]
+    for i, line in enumerate(lines):
+        expected = linearref.create_line(ls, bounds[i], bounds[i + 1])
+        assert line.equals_exact(expected, 1e-9)
+
+
+def test_split_line_ring():
+    ls = LineString([(0, 0), (0, 100), (100, 100), (100, 0), (0, 0)])
+    lines = linearref.split_line(ls, [50, 350])
+    assert [line.length for line in lines] == [50, 300, 50]
+    assert list(lines[2].coords) == [(50.0, 0.0), (0.0, 0.0)]
+
+
+def test_split_line_duplicate_coords():
+    ls = LineString([(0, 0), (0, 50), (0, 50), (0, 100)])
+    lines = linearref.split_line(ls, [50, 75])
+    assert [list(line.coords) for line in lines] == [
+        [(0.0, 0.0), (0.0, 50.0)],
+        [(0.0, 50.0), (0.0, 75.0)],
+        [(0.0, 75.0), (0.0, 100.0)],
+    ]
+
+
+def test_split_line_z():
+    ls = LineString([(0, 0, 0), (0, 100, 10)])
+    lines = linearref.split_line(ls, [50])
+    assert list(lines[0].coords) == [(0.0, 0.0, 0.0), (0.0, 50.0, 5.0)]
+
+
+def test_split_line_invalid():
+    ls = LineString([(0, 0), (0, 100)])
+    with pytest.raises(ValueError):
+        linearref.split_line(ls, [60, 40])
+    with pytest.raises(ValueError):
+        linearref.split_line(ls, [120])
+    with pytest.raises(linearref.IdenticalMeasuresError):
+        linearref.split_line(ls, [40, 40])
+
+
+def test_create_line_self_crossing():
+    # the vertex at (50, 0) also lies on the first segment of the line
+    ls = LineString([(0, 0), (100, 0), (100, 10), (50, 10), (50, 0), (50, -10)])
+    new_line = linearref.create_line(ls, 150, 175)
+    assert list(new_line.coords) == [
+        (60.0, 10.0),
+        (50.0, 10.0),
+        (50.0, 0.0),
+        (50.0, -5.0),
+    ]
+
+
+def test_create_line_ring_parts():
+    ls = LineString([(0, 0), (0, 100), (100, 100), (100, 0), (0, 0)])
+    new_line = linearref.create_line(ls, 350, 400)
+    assert list(new_line.coords) == [(50.0, 0.0), (0.0, 0.0)]
+
+    new_line = linearref.create_line(ls, 0, 150)
+    assert list(new_line.coords) == [(0.0, 0.0), (0.0, 100.0), (50.0, 100.0)]
+
+
+def test_create_line_measures_past_end():
+    ls = LineString([(0, 0), (0, 100)])
+    # measures within the tolerance past the end are at the end of the line
+    with pytest.raises(linearref.IdenticalMeasuresError):
+        linearref.create_line(ls, 100.000001, 100.000002)
+    with pytest.raises(linearref.IdenticalMeasuresError):
+        linearref.create_line(ls, 100, 100.000001)
+
+    new_line = linearref.create_line(ls, 50, 100.000001)
+    assert list(new_line.coords) == [(0.0, 50.0), (0.0, 100.0)]
+
+
 def run_tests():
     pytest.main(["tests/test_linearref.py"])
 
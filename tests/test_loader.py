@@ -4,6 +4,7 @@ import networkx
 import pytest
 import logging
 import tempfile
+import pickle
 
 
 def test_add_edge():
@@ -199,6 +200,42 @@ def test_uniquedict_error():
         ud[1] = "bar"
 
 
+def test_key_index():
+    keys = loader.KeyIndex({1: (0, 1)})
+    assert keys.changes is None
+
+    keys.checkpoint()
+    keys[2] = (1, 2)
+    keys.update({3: (2, 3)})
+    assert keys.pop(1) == (0, 1)
+    assert keys.pop(1, None) is None
+    assert keys.changes == {1, 2, 3}
+
+    expected = loader.KeyIndex({2: (2, 1), 3: (3, 2)})
+    assert keys.checksum == expected.checksum
+    assert keys.checksum != loader.KeyIndex({2: (2, 1), 3: (1, 2)}).checksum
+
+    with pytest.raises(KeyError):
+        keys[2] = (1, 2)
+
+    keys.clear()
+    assert keys.checksum == 0 and keys == {}
+
+
+def test_key_index_pickle():
+    keys = loader.KeyIndex({1: (0, 1), 2: (1, 2)})
+    new_keys = pickle.loads(pickle.dumps(keys))
+    assert isinstance(new_keys, loader.KeyIndex)
+    assert new_keys == keys
+    assert new_keys.checksum == keys.checksum
+    assert keys.copy().checksum == keys.checksum
+
+    directed_keys = loader.KeyIndex(keys, directed=True)
+    new_keys = pickle.loads(pickle.dumps(directed_keys))
+    assert new_keys.directed and new_keys.copy().directed
+    assert new_keys.checksum == directed_keys.checksum != keys.checksum
+
+
 def test_pickling():
 
     net = loader.create_graph()
@@ -249,6 +286,216 @@ def test_load_network_with_invalid_ints():
         loader.load_network_from_geometries(recs, use_integer_keys=True)
 
 
+def create_records(count, duplicate=None):
+    for i in range(count):
+        key = duplicate if i == count - 1 and duplicate is not None else i
+        yield {
+            "geometry": {
+                "type": "LineString",
+                "coordinates": [(i * 0.123456789, 0), (i, 1.5), (i + 1, 2, 10)],
+            },
+            "properties": {"EDGE_ID": str(key), "NAME": f"Road {i}"},
+        }
+
+
+def test_load_network_from_geometries_in_chunks():
+
+    net = loader.load_network_from_geometries(list(create_records(25)))
+    chunked_net = loader.load_network_from_geometries_in_chunks(
+        create_records(25), chunk_size=10, keep_geometry=True
+    )
+
+    assert list(chunked_net.nodes()) == list(net.nodes())
+    assert chunked_net.graph["keys"] == net.graph["keys"]
+    assert isinstance(chunked_net.graph["keys"], loader.UniqueDict)
+
+    for u, v, key, atts in net.edges(keys=True, data=True):
+        chunked_atts = dict(chunked_net[u][v][key])
+        geometry = chunked_atts.pop("geometry")
+        assert geometry["type"] == "LineString"
+        assert chunked_atts.pop("LEN_") == pytest.approx(atts.pop("LEN_"))
+        assert chunked_atts == atts
+
+
+def test_load_network_from_geometries_processes():
+
+    net = loader.load_network_from_geometries(list(create_records(25)))
+    parallel_net = loader.load_network_from_geometries(create_records(25), processes=2)
+
+    assert list(parallel_net.nodes()) == list(net.nodes())
+    assert parallel_net.graph["keys"] == net.graph["keys"]
+    for u, v, key, atts in net.edges(keys=True, data=True):
+        parallel_atts = dict(parallel_net[u][v][key])
+        assert parallel_atts.pop("LEN_") == pytest.approx(atts.pop("LEN_"))
+        assert parallel_atts == atts
+
+
+def test_load_network_from_geometries_in_chunks_options():
+
+    recs = list(create_records(5))
+    recs.append({"geometry": {"type": "MultiLineString"}, "properties": {}})
+    recs[0]["properties"]["LEN_"] = 99
+
+    net = loader.load_network_from_geometries_in_chunks(
+        recs,
+        chunk_size=2,
+        skip_errors=True,
+        strip_properties=True,
+        use_reverse_lookup=False,
+        graph_type=networkx.MultiDiGraph,
+    )
+
+    assert isinstance(net, networkx.MultiDiGraph)
+    assert "keys" not in net.graph
+    assert len(net.edges()) == 5
+    edge = functions.get_edge_by_key(net, 0)
+    assert edge.attributes["LEN_"] == 99
+    assert "NAME" not in edge.attributes
+    # the input records are not modified
+    assert "NODEID_FROM" not in recs[0]["properties"]
+
+    with pytest.raises(ValueError):
+        loader.load_network_from_geometries_in_chunks(recs)
+
+
+def test_load_network_from_geometries_in_chunks_duplicate_keys():
+
+    with pytest.raises(KeyError):
+        loader.load_network_from_geometries_in_chunks(
+            create_records(10, duplicate=3), chunk_size=4
+        )
+
+    # duplicates within a single chunk
+    with pytest.raises(KeyError):
+        loader.load_network_from_geometries_in_chunks(
+            create_records(10, duplicate=8), chunk_size=4
+        )
+
+
+def test_load_network_from_geometries_in_parallel():
+
+    net = loader.load_network_from_geometries_in_chunks(create_records(50))
+    parallel_net = loader.load_network_from_geometries_in_chunks(
+        create_records(50), chunk_size=7, processes=2
+    )
+
+    assert list(parallel_net.nodes()) == list(net.nodes())
+    assert parallel_net.graph["keys"] == net.graph["keys"]
+    assert list(parallel_net.edges(keys=True, data=True)) == list(
+        net.edges(keys=True, data=True)
+    )
+
+
+def test_load_network_from_geometries_in_parallel_duplicate_keys():
+
+    with pytest.raises(KeyError, match="The key 3 already exists"):
+        loader.load_network_from_geometries_in_chunks(
+            create_records(50, duplicate=3), chunk_size=7, processes=2
+        )
+
+
+def test_load_network_with_interned_nodes():
+
+    net = loader.load_network_from_geometries(list(create_records(25)))
+    interned_net = loader.load_network_from_geometries(
+        list(create_records(25)), intern_nodes=True
+    )
+
+    interner = interned_net.graph["node_interner"]
+    assert len(interner) == len(net.nodes()) == len(interned_net.nodes())
+    assert list(interned_net.nodes()) == list(range(len(interner)))
+    assert len(interner.coordinates) == 2 * len(interner)
+
+    for (u, v, key), (iu, iv, ikey) in zip(
+        net.edges(keys=True), interned_net.edges(keys=True)
+    ):
+        assert key == ikey
+        assert interner.get_node_from_legacy_id(u) == iu
+        assert interner.get_node_from_legacy_id(v) == iv
+        # the string ids round-trip with those of the legacy loader
+        assert interner.get_legacy_id(iu) == u
+        assert interner.get_legacy_id(iv) == v
+        assert interned_net.graph["keys"][key] == (iu, iv)
+
+    edge = functions.get_edge_by_key(interned_net, 1)
+    assert edge.attributes["NODEID_FROM"] == edge.start_node
+    assert interner.get_coordinates(edge.end_node) == (2, 2)
+    assert interner.get_legacy_id(edge.end_node) == "2|2"
+
+    with pytest.raises(KeyError):
+        interner.get_coordinates(len(interner))
+
+    with pytest.raises(KeyError):
+        interner.get_node_from_legacy_id("-1|-1")
+
+
+def test_load_network_with_interned_nodes_in_chunks():
+
+    net = loader.load_network_from_geometries(
+        list(create_records(25)), intern_nodes=True
+    )
+    chunked_net = loader.load_network_from_geometries_in_chunks(
+        create_records(25), chunk_size=4, intern_nodes=True
+    )
+    parallel_net = loader.load_network_from_geometries_in_chunks(
+        create_records(25), chunk_size=4, intern_nodes=True, processes=2
+    )
+
+    for other_net in (chunked_net, parallel_net):
+        assert list(other_net.nodes()) == list(net.nodes())
+        assert other_net.graph["keys"] == net.graph["keys"]
+        assert list(other_net.graph["node_interner"].coordinates) == list(
+            net.graph["node_interner"].coordinates
+        )
+        assert (
+            other_net.graph["node_interner"].integer_flags
+            == net.graph["node_interner"].integer_flags
+        )
+
+
+def test_node_interner_pickling():
+
+    net = loader.load_network_from_geometries(
+        list(create_records(5)), intern_nodes=True
+    )
+    interner = net.graph["node_interner"]
+
+    fn = tempfile.NamedTemporaryFile(delete=False).name
+    loader.save_network_to_file(net, fn)
+    new_interner = loader.load_network_from_file(fn).graph["node_interner"]
+
+    assert new_interner.coordinates == interner.coordinates
+    assert new_interner.integer_flags == interner.integer_flags
+    assert new_interner.get_legacy_id(0) == "0.0|0"
+    assert new_interner.get_node((4, 2)) == interner.get_node((4, 2))
+    assert new_interner.get_node((99, 99)) == len(interner)
+
+
+def test_get_lengths():
+
+    lines = [[(0, 0), (3, 4)], [(0, 0)], [(1, 1), (1, 1), (1, 2, 5), (2, 2)]]
+    assert loader.get_lengths(lines) == [5.0, 0.0, 2.0]
+    assert loader.get_lengths([]) == []
+
+
+def test_add_edges():
+
+    net = loader.create_graph()
+    loader.add_edges(net, [(1, 2, "A", {}), (2, 3, "B", {})])
+
+    with pytest.raises(KeyError):
+        loader.add_edges(net, [(3, 4, "C", {}), (4, 5, "A", {})])
+
+    # no edges are added if a key is a duplicate
+    assert len(net.edges()) == 2
+    assert list(net.graph["keys"]) == ["A", "B"]
+
+    # duplicate keys are allowed if a plain dictionary is used
+    net = networkx.MultiGraph(keys={})
+    loader.add_edges(net, [(1, 2, "A", {}), (2, 3, "A", {})])
+    assert net.graph["keys"] == {"A": (2, 3)}
+
+
 def test_doctest():
     import doctest
 
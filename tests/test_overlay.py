@@ -0,0 +1,211 @@
+"""
+pytest -v tests/test_overlay.py
+"""
+
+import copy
+import pytest
+import networkx
+from networkx import NetworkXError
+from wayfarer import overlay, functions, routing, splitter, loader
+from tests import networks
+
+
+def get_snapshot(net):
+    return (
+        list(net.nodes()),
+        list(net.edges(keys=True, data=True)),
+        dict(net.graph["keys"]),
+    )
+
+
+def test_create_overlay():
+    net = networks.simple_network()
+    ov = overlay.create_overlay(net)
+
+    assert isinstance(ov, networkx.MultiGraph)
+    assert list(ov.edges(keys=True)) == list(net.edges(keys=True))
+    assert ov[1][2][1] == net[1][2][1]
+    assert ov.added_edges == []
+    assert ov.removed_edges == []
+
+
+def test_create_overlay_directed():
+    net = networkx.MultiDiGraph()
+    net.add_edge(1, 2, key="A", LEN_=1)
+    net.add_edge(2, 3, key="B", LEN_=1)
+
+    ov = overlay.create_overlay(net)
+    assert isinstance(ov, networkx.MultiDiGraph)
+
+    ov.add_edge(1, 3, key="C", LEN_=5)
+    ov.remove_edge(1, 2, key="A")
+
+    assert networkx.shortest_path(ov, 1, 3) == [1, 3]
+    assert list(ov.in_edges(3, keys=True)) == [(2, 3, "B"), (1, 3, "C")]
+    assert list(ov.predecessors(2)) == []
+    assert list(net.edges(keys=True)) == [(1, 2, "A"), (2, 3, "B")]
+
+
+def test_split_network_edge():
+    net = networks.simple_network()
+    snapshot = copy.deepcopy(get_snapshot(net))
+
+    ov = overlay.create_overlay(net)
+    splitter.split_network_edge(ov, 2, [5])
+
+    edges = routing.solve_shortest_path(ov, 1, "2::5")
+    assert [e.key for e in edges] == [1, "2::5"]
+    assert functions.get_edge_by_key(ov, "2::10").end_node == 3
+
+    with pytest.raises(KeyError):
+        functions.get_edge_by_key(ov, 2)
+
+    assert [e.key for e in ov.removed_edges] == [2]
+    assert [e.key for e in ov.added_edges] == ["2::5", "2::10"]
+
+    # the base network is unchanged
+    assert get_snapshot(net) == snapshot
+    assert functions.get_edge_by_key(net, 2).key == 2
+
+
+def test_unsplit_network_edges():
+    net = networks.simple_network()
+    ov = overlay.create_overlay(net)
+
+    split_edges = splitter.split_network_edge(ov, 2, [5])
+    splitter.unsplit_network_edges(ov, split_edges)
+
+    assert "2::5" not in ov.nodes()
+    assert list(ov.edges(keys=True)) == list(net.edges(keys=True))
+    assert len(net.nodes()) == 5
+
+
+def test_overlays_are_independent():
+    net = networks.simple_network()
+    ov1 = overlay.create_overlay(net)
+    ov2 = overlay.create_overlay(net)
+
+    functions.add_edge(ov1, 1, 5, "A", {"LEN_": 1})
+    functions.remove_edge(ov2, functions.get_edge_by_key(ov2, 2))
+
+    assert [e.key for e in routing.solve_shortest_path(ov1, 1, 5)] == ["A"]
+    with pytest.raises(networkx.NetworkXNoPath):
+        routing.solve_shortest_path(ov2, 1, 5)
+    assert len(routing.solve_shortest_path(net, 1, 5)) == 4
+
+
+def test_add_edge_copy_on_write():
+    net = networks.simple_network()
+    ov = overlay.create_overlay(net)
+
+    ov.add_edge(1, 2, key=1, LEN_=99)
+    assert ov[1][2][1]["LEN_"] == 99
+    assert ov[1][2][1]["EDGE_ID"] == 1
+    assert net[1][2][1]["LEN_"] == 10
+
+    ov.remove_edge(1, 2, key=1)
+    assert not ov.has_edge(1, 2)
+    assert net.has_edge(1, 2)
+
+
+def test_duplicate_keys():
+    net = networks.simple_network()
+    ov = overlay.create_overlay(net)
+
+    with pytest.raises(KeyError):
+        functions.add_edge(ov, 1, 5, 1, {"LEN_": 1})
+
+    # a removed key can be reused
+    functions.remove_edge(ov, functions.get_edge_by_key(ov, 1))
+    functions.add_edge(ov, 1, 5, 1, {"LEN_": 1})
+    assert functions.get_edge_by_key(ov, 1).end_node == 5
+    assert len(ov.graph["keys"]) == 4
+
+
+def test_remove_node():
+    net = networks.simple_network()
+    ov = overlay.create_overlay(net)
+    ov.remove_node(3)
+
+    assert 3 not in ov
+    assert list(ov.nodes()) == [1, 2, 4, 5]
+    assert ov.degree(2) == 1
+    assert [e.key for e in ov.removed_edges] == [2, 3]
+    assert 3 in net
+
+    with pytest.raises(NetworkXError):
+        ov.remove_node(3)
+
+
+def test_remove_edge_missing():
+    net = networks.simple_network()
+    ov = overlay.create_overlay(net)
+
+    with pytest.raises(NetworkXError):
+        ov.remove_edge(1, 3)
+
+    with pytest.raises(NetworkXError):
+        ov.remove_edge(1, 2, key="missing")
+
+
+def test_base_adjacency_is_readonly():
+    net = networks.simple_network()
+    ov = overlay.create_overlay(net)
+
+    with pytest.raises(TypeError):
+        ov._adj[1][3] = {}
+
+
+def test_base_attributes_are_readonly():
+    net = networks.simple_network()
+    ov = overlay.create_overlay(net)
+    # touch node 2 so both the unchanged and changed adjacency views are checked
+    functions.add_edge(ov, 2, 6, "new", {"LEN_": 1})
+
+    for u, v in [(1, 2), (2, 3)]:
+        atts = ov[u][v][u]
+        with pytest.raises(TypeError):
+            atts["LEN_"] = -1
+
+    for _, _, atts in ov.edges(data=True):
+        if atts is ov[2][6]["new"]:
+            continue
+        with pytest.raises(TypeError):
+            atts["LEN_"] = -1
+
+    assert get_snapshot(net) == get_snapshot(networks.simple_network())
+    # edges added to the overlay can be modified
+    ov[2][6]["new"]["LEN_"] = 2
+    assert ov[2][6]["new"]["LEN_"] == 2
+
+
+def test_graph_without_keys():
+    net = networkx.MultiGraph()
+    net.add_edge(0, 1, LEN_=1)
+    ov = overlay.create_overlay(net)
+    assert ov.add_edge(0, 1) == 1
+    assert "keys" not in ov.graph
+
+
+def test_overlay_dict():
+    base = loader.UniqueDict({"A": 1, "B": 2})
+    od = overlay.OverlayDict(base, unique=True)
+    od["C"] = 3
+    del od["A"]
+    od["A"] = 4
+
+    assert dict(od) == {"B": 2, "C": 3, "A": 4}
+    assert len(od) == 3
+
+    with pytest.raises(KeyError):
+        od["B"] = 5
+
+    del od["A"]
+    assert "A" not in od
+    assert base == {"A": 1, "B": 2}
+
+
+def test_doctest():
+    import doctest
+
+    print(doctest.testmod(overlay))
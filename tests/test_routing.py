@@ -2,11 +2,16 @@
 pytest -v tests/test_splitting.py
 """
 
+import itertools
 import logging
+import math
+import random
 import pytest
-from wayfarer import routing, splitter, Edge, WITH_DIRECTION_FIELD
+import networkx
+from wayfarer import routing, splitter, compiled, functions, Edge, WITH_DIRECTION_FIELD
 from wayfarer.splitter import SPLIT_KEY_SEPARATOR
 from tests import networks
+from tests.networks import create_geometry_grid
 from networkx import NetworkXNoPath, NodeNotFound
 
 
@@ -110,6 +115,359 @@ def test_solve_shortest_path_split_network():
     ]
 
 
+def get_route_cost(edges):
+    return sum(edge.attributes["LEN_"] for edge in edges)
+
+
+def test_solve_shortest_path_from_waypoints():
+    net = create_geometry_grid(size=6)
+    # give the grid a variety of edge lengths
+    for u, v, key, atts in net.edges(keys=True, data=True):
+        atts["LEN_"] = 100 + (key * 37) % 50
+
+    waypoints = ["0|0", "500|500", "0|500", "200|300", "0|0", "500|0", "500|0", "100|0"]
+    edges = routing.solve_shortest_path_from_waypoints(
+        net, waypoints, return_unique=False
+    )
+
+    # the route is connected from the first to the last waypoint
+    for edge, next_edge in zip(edges, edges[1:]):
+        assert edge.end_node == next_edge.start_node
+    assert edges[0].start_node == "0|0" and edges[-1].end_node == "100|0"
+
+    expected = 0
+    for start_node, end_node in zip(waypoints, waypoints[1:]):
+        expected += get_route_cost(
+            routing.solve_shortest_path(net, start_node, end_node)
+        )
+    assert get_route_cost(edges) == expected
+
+    # edges are flagged with their direction
+    for edge in edges:
+        atts = edge.attributes
+        assert atts[WITH_DIRECTION_FIELD] == (edge.start_node == atts["NODEID_FROM"])
+
+
+def test_solve_shortest_path_from_waypoints_unique():
+    net = networks.simple_network()
+    edges = routing.solve_shortest_path_from_waypoints(net, [1, 5, 3])
+    assert [edge.key for edge in edges] == [1, 2, 3, 4]
+    edges = routing.solve_shortest_path_from_waypoints(
+        net, [1, 5, 3], return_unique=False
+    )
+    assert [edge.key for edge in edges] == [1, 2, 3, 4, 4, 3]
+
+
+def test_solve_shortest_path_from_waypoints_directed():
+    net = networkx.MultiDiGraph()
+    net.add_edge(0, 1, key="A", LEN_=10)
+    net.add_edge(1, 2, key="B", LEN_=10)
+    net.add_edge(2, 0, key="C", LEN_=10)
+    net.add_edge(1, 0, key="D", LEN_=50)
+    net.add_node(3)
+
+    edges = routing.solve_shortest_path_from_waypoints(
+        net, [1, 0, 2], with_direction_flag=False, return_unique=False
+    )
+    assert [edge.key for edge in edges] == ["B", "C", "A", "B"]
+
+    with pytest.raises(NetworkXNoPath):
+        routing.solve_shortest_path_from_waypoints(net, [0, 3])
+
+
+def test_solve_shortest_path_from_waypoints_parallel_edges():
+    net = networks.dual_path_middle_network()
+    edges = routing.solve_shortest_path_from_waypoints(net, [1, 4, 2])
+    assert [edge.key for edge in edges] == [1, 2, 4]
+
+    edges = routing.solve_shortest_path_from_waypoints(net, [1, 4], weight=None)
+    assert len(edges) == 3
+
+
+def test_solve_shortest_path_from_waypoints_errors():
+    net = networks.simple_network()
+    with pytest.raises(NodeNotFound):
+        routing.solve_shortest_path_from_waypoints(net, [1, 99])
+
+    net.add_edge(10, 11, key=10, LEN_=10)
+    with pytest.raises(NetworkXNoPath):
+        routing.solve_shortest_path_from_waypoints(net, [1, 5, 10])
+
+    assert routing.solve_shortest_path_from_waypoints(net, [1, 1]) == []
+
+
+def get_baseline_path(net, start_node, end_node, distance, cutoff=10, include_key=None):
+    """
+    Compare all paths between two nodes, as solve_matching_path did before its
+    search was pruned, returning the difference and (start_node, end_node, key)
+    tuples of the closest path
+    """
+    paths = []
+    node_paths = list(routing.solve_all_simple_paths(net, start_node, end_node, cutoff))
+    if start_node == end_node:
+        node_paths.append([start_node])
+    for node_path in node_paths:
+        for path_edges in functions.get_all_paths_from_nodes(net, node_path):
+            if include_key and include_key not in [e.key for e in path_edges]:
+                continue
+            difference = abs(functions.get_path_length(path_edges) - distance)
+            path = [(e.start_node, e.end_node, e.key) for e in path_edges]
+            paths.append((difference, path))
+    return min(paths, default=None)
+
+
+def get_matching_path(net, start_node, end_node, distance, **kwargs):
+    edges = routing.solve_matching_path(net, start_node, end_node, distance, **kwargs)
+    if edges is None:
+        return None
+    path = [(e.start_node, e.end_node, e.key) for e in edges]
+    return abs(get_route_cost(edges) - distance), path
+
+
+@pytest.mark.parametrize(
+    "network,start_node,end_node",
+    [
+        (networks.circle_network, 1, 3),
+        (networks.circle_network, 1, 1),
+        (networks.dual_path_middle_network, 1, 4),
+        (networks.double_loop_network, 1, 5),
+        (networks.triple_loop_network, 1, 3),
+        (networks.reversed_loop_network, 1, 99),
+        (networks.bottle_network, 1, 3),
+    ],
+)
+def test_solve_matching_path(network, start_node, end_node):
+    net = network()
+    for distance in [0, 10, 25, 40, 55, 100]:
+        expected = get_baseline_path(net, start_node, end_node, distance)
+        assert get_matching_path(net, start_node, end_node, distance) == expected
+
+
+@pytest.mark.parametrize(
+    "network,start_node,end_node",
+    [
+        (networks.circle_network, 1, 3),
+        (networks.double_loop_network, 1, 5),
+        (networks.reversed_loop_network, 1, 99),
+        (networks.bottle_network, 1, 3),
+    ],
+)
+def test_solve_matching_path_directed(network, start_node, end_node):
+    # each undirected edge becomes a pair of directed edges with the same key
+    net = networkx.MultiDiGraph(network())
+    for distance in [0, 10, 25, 40, 55, 100]:
+        expected = get_baseline_path(net, start_node, end_node, distance)
+        assert get_matching_path(net, start_node, end_node, distance) == expected
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_solve_matching_path_random_directed(seed):
+    rng = random.Random(seed)
+    net = networkx.MultiDiGraph()
+    for key in range(20):
+        u, v = rng.randrange(6), rng.randrange(6)
+        net.add_edge(u, v, key=key, LEN_=rng.choice([0.1, 0.2, 0.3, 5, 10, 15]))
+
+    for start_node, end_node in itertools.product(net.nodes, repeat=2):
+        for distance in [0, 0.6, 20, 45]:
+            expected = get_baseline_path(net, start_node, end_node, distance, cutoff=4)
+            path = get_matching_path(net, start_node, end_node, distance, cutoff=4)
+            assert path == expected
+
+
+def test_solve_matching_path_ties():
+    # paths with the same difference are ordered by their edges
+    net = networkx.MultiGraph()
+    net.add_edges_from([(0, 1, "B", {"LEN_": 10}), (0, 1, "A", {"LEN_": 10})])
+    net.add_edges_from([(1, 2, "C", {"LEN_": 5}), (0, 2, "D", {"LEN_": 20})])
+    edges = routing.solve_matching_path(net, 0, 2, distance=15)
+    assert [edge.key for edge in edges] == ["A", "C"]
+    edges = routing.solve_matching_path(net, 0, 2, distance=17.5)
+    assert [edge.key for edge in edges] == ["A", "C"]
+
+
+def test_solve_matching_path_long_chain():
+    # paths longer than the recursion limit are searched with an explicit stack
+    net = networkx.MultiGraph()
+    for i in range(1500):
+        net.add_edge(i, i + 1, key=i, LEN_=1)
+    edges = routing.solve_matching_path(net, 0, 1500, distance=1500, cutoff=2000)
+    assert len(edges) == 1500
+
+
+def test_solve_matching_path_grid():
+    net = create_geometry_grid(size=4)
+    for u, v, key, atts in net.edges(keys=True, data=True):
+        atts["LEN_"] = 100 + (key * 37) % 50
+
+    for distance in [0, 500, 730, 1000]:
+        expected = get_baseline_path(net, "0|0", "300|300", distance, cutoff=8)
+        path = get_matching_path(net, "0|0", "300|300", distance, cutoff=8)
+        assert path == expected
+
+    expected = get_baseline_path(net, "0|0", "300|300", 0, cutoff=8, include_key=3)
+    path = get_matching_path(net, "0|0", "300|300", 0, cutoff=8, include_key=3)
+    assert path == expected
+
+
+def test_solve_matching_path_edges():
+    net = networks.dual_path_middle_network()
+    edges = routing.solve_matching_path(net, 1, 4, distance=60)
+    assert [edge.key for edge in edges] == [1, 3, 4]
+    assert [edge.attributes[WITH_DIRECTION_FIELD] for edge in edges] == [True] * 3
+    # the network is unchanged
+    assert WITH_DIRECTION_FIELD not in net[1][2][1]
+
+
+def test_solve_matching_path_large_cutoff():
+    # a grid has far too many simple paths to compare them all
+    net = create_geometry_grid(size=7)
+    edges = routing.solve_matching_path(net, "0|0", "600|600", 1600, cutoff=40)
+    assert get_route_cost(edges) == 1600
+
+    # paths across the grid have an even number of edges
+    edges = routing.solve_matching_path(net, "0|0", "600|600", 1250, cutoff=40)
+    assert get_route_cost(edges) == 1200
+
+
+def test_solve_matching_path_no_path():
+    net = networks.simple_network()
+    net.add_edge(10, 11, key=10, LEN_=10)
+    assert routing.solve_matching_path(net, 1, 10) is None
+    assert routing.solve_matching_path(net, 1, 5, include_key=10) is None
+    with pytest.raises(NodeNotFound):
+        routing.solve_matching_path(net, 1, 99)
+    with pytest.raises(NodeNotFound):
+        routing.solve_matching_path(net, 99, 1)
+
+
+def test_solve_k_shortest_paths():
+    net = create_geometry_grid(size=5)
+    for u, v, key, atts in net.edges(keys=True, data=True):
+        atts["LEN_"] = 100 + (key * 37) % 50
+
+    paths = list(routing.solve_k_shortest_paths(net, "0|0", "400|300", k=50))
+    assert len(paths) == 50
+
+    # the costs match those of a simple graph solved using networkx
+    graph = networkx.Graph(net)
+    expected = itertools.islice(
+        networkx.shortest_simple_paths(graph, "0|0", "400|300", weight="LEN_"), 50
+    )
+    assert [get_route_cost(edges) for edges in paths] == [
+        networkx.path_weight(graph, nodes, "LEN_") for nodes in expected
+    ]
+
+    for edges in paths:
+        assert edges[0].start_node == "0|0" and edges[-1].end_node == "400|300"
+        nodes = [edges[0].start_node] + [edge.end_node for edge in edges]
+        assert len(nodes) == len(set(nodes))
+        for edge in edges:
+            atts = edge.attributes
+            assert atts[WITH_DIRECTION_FIELD] == (
+                edge.start_node == atts["NODEID_FROM"]
+            )
+
+    assert len({tuple(e.key for e in edges) for edges in paths}) == 50
+
+
+def test_solve_k_shortest_paths_parallel_edges():
+    net = networks.dual_path_middle_network()
+    paths = routing.solve_k_shortest_paths(net, 1, 4)
+    assert [[edge.key for edge in edges] for edges in paths] == [[1, 2, 4], [1, 3, 4]]
+
+
+def test_solve_k_shortest_paths_directed():
+    net = networkx.MultiDiGraph()
+    net.add_edge(0, 1, key="A", LEN_=10)
+    net.add_edge(1, 2, key="B", LEN_=10)
+    net.add_edge(0, 2, key="C", LEN_=30)
+    net.add_edge(2, 0, key="D", LEN_=1)
+
+    paths = routing.solve_k_shortest_paths(net, 0, 2, with_direction_flag=False)
+    assert [[edge.key for edge in edges] for edges in paths] == [["A", "B"], ["C"]]
+    paths = routing.solve_k_shortest_paths(net, 2, 1, with_direction_flag=False)
+    assert [[edge.key for edge in edges] for edges in paths] == [["D", "A"]]
+
+
+def test_solve_k_shortest_paths_lazy():
+    net = create_geometry_grid(size=10)
+    paths = routing.solve_k_shortest_paths(net, "0|0", "900|900")
+    first = [get_route_cost(edges) for edges in itertools.islice(paths, 20)]
+    assert first == [1800] * 20
+
+
+def test_solve_k_shortest_paths_processes():
+    net = create_geometry_grid(size=4)
+    for u, v, key, atts in net.edges(keys=True, data=True):
+        atts["LEN_"] = 100 + (key * 37) % 50
+
+    paths = routing.solve_k_shortest_paths(net, "0|0", "300|300", k=10)
+    expected = [[edge.key for edge in edges] for edges in paths]
+    paths = routing.solve_k_shortest_paths(net, "0|0", "300|300", k=10, processes=2)
+    assert [[edge.key for edge in edges] for edges in paths] == expected
+
+
+def test_solve_k_shortest_paths_errors():
+    net = networks.simple_network()
+    net.add_edge(10, 11, key=10, LEN_=10)
+
+    with pytest.raises(NodeNotFound):
+        next(routing.solve_k_shortest_paths(net, 1, 99))
+    with pytest.raises(NetworkXNoPath):
+        next(routing.solve_k_shortest_paths(net, 1, 10))
+
+    assert list(routing.solve_k_shortest_paths(net, 1, 1)) == [[]]
+    assert list(routing.solve_k_shortest_paths(net, 1, 5, k=0)) == []
+    assert len(list(routing.solve_k_shortest_paths(net, 1, 5, k=5))) == 1
+
+
+def test_distance_matrix():
+    net = networks.circle_network()
+    nodes = list(net.nodes())
+    matrix = routing.distance_matrix(net, nodes, nodes)
+
+    assert matrix.shape == (len(nodes), len(nodes))
+    for i, start_node in enumerate(nodes):
+        for j, end_node in enumerate(nodes):
+            expected = networkx.shortest_path_length(
+                net, start_node, end_node, weight="LEN_"
+            )
+            assert matrix[i, j] == expected
+
+
+def test_distance_matrix_unreachable():
+    net = networkx.MultiDiGraph()
+    net.add_edge(0, 1, key="A", LEN_=10)
+    net.add_edge(1, 2, key="B", LEN_=10)
+
+    matrix = routing.distance_matrix(net, [0, 2], [2, 0])
+    assert matrix.tolist() == [[20, 0], [0, math.inf]]
+
+
+def test_distance_matrix_compiled():
+    net = networks.simple_network()
+    cn = compiled.compile_network(net, weight=None)
+
+    matrix = routing.distance_matrix(net, [1], [5], weight=None, compiled=cn)
+    assert matrix.tolist() == [[4]]
+
+    with pytest.raises(ValueError):
+        routing.distance_matrix(net, [1], [5], compiled=cn)
+
+    with pytest.raises(NodeNotFound):
+        routing.distance_matrix(net, [1], [99])
+
+
+def test_distance_matrix_processes():
+    net = networks.circle_network()
+    nodes = list(net.nodes())
+
+    expected = routing.distance_matrix(net, nodes, nodes, processes=1)
+    matrix = routing.distance_matrix(net, nodes, nodes, processes=2)
+    assert (matrix == expected).all()
+
+
 def test_doctest():
     import doctest
 
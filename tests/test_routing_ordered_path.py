@@ -2,12 +2,15 @@
 pytest -v tests/test_routing_ordered_path.py
 """
 
+import copy
 import logging
+import random
+from concurrent.futures import ThreadPoolExecutor
 import pytest
-from wayfarer import Edge, routing, loops, functions
+from wayfarer import Edge, routing, loops, functions, columnar
 from tests import networks
 import wayfarer
-from networkx.exception import NetworkXError
+from networkx.exception import NetworkXError, NetworkXNoPath
 
 
 def test_get_path_ends():
@@ -99,6 +102,67 @@ def test_simple_network():
     assert [e.key for e in edges] == [4, 3, 2, 1]
 
 
+def test_solve_shortest_path_from_edges_missing():
+
+    net = networks.simple_network()
+
+    with pytest.raises(KeyError, match=r"\[-1, -2\]"):
+        routing.solve_shortest_path_from_edges(net, [1, -1, 4, -2])
+
+
+def get_snapshot(net):
+    return (
+        [(u, v, k, dict(d)) for u, v, k, d in net.edges(keys=True, data=True)],
+        list(net.graph["keys"].items()),
+    )
+
+
+def test_solve_shortest_path_from_edges_unmodified():
+
+    net = networks.dual_path_middle_network()
+    snapshot = get_snapshot(net)
+
+    edges = routing.solve_shortest_path_from_edges(net, [4, 3, 1])
+    assert [e.key for e in edges] == [4, 3, 1]
+    # the real lengths are returned
+    assert [e.attributes["LEN_"] for e in edges] == [20, 20, 10]
+    assert get_snapshot(net) == snapshot
+
+    # the network is unmodified if no path is found
+    net.add_edge(10, 11, key=10, EDGE_ID=10, LEN_=10)
+    net.graph["keys"][10] = (10, 11)
+    snapshot = get_snapshot(net)
+    with pytest.raises(NetworkXNoPath):
+        routing.solve_shortest_path_from_edges(net, [3, 10])
+    assert get_snapshot(net) == snapshot
+
+
+def test_solve_shortest_path_from_edges_threads():
+
+    net = networks.dual_path_middle_network()
+    edge_id_lists = [[4, 2, 1], [1, 2, 4], [4, 3, 1], [1, 3, 4]] * 25
+
+    def solve(edge_id_list):
+        return [
+            e.key for e in routing.solve_shortest_path_from_edges(net, edge_id_list)
+        ]
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(solve, edge_id_lists))
+
+    assert results == edge_id_lists
+
+
+def test_solve_shortest_path_from_edges_columnar(tmp_path):
+
+    filename = str(tmp_path / "network.wyf")
+    columnar.save_network(networks.dual_path_middle_network(), filename)
+    net = columnar.load_network(filename)
+
+    edges = routing.solve_shortest_path_from_edges(net, [1, 3, 4])
+    assert [e.key for e in edges] == [1, 3, 4]
+
+
 def test_single_edge_loop_network():
 
     net = networks.single_edge_loop_network()
@@ -446,6 +510,73 @@ def test_bottle_network():
     assert [e.key for e in edges] == [1, 2, 3]
 
 
+def create_random_edges(rng, edge_count, node_count):
+    """
+    Create the edges of a random walk, including repeated nodes, parallel edges,
+    self-loops, and duplicate edges, in a random order and direction
+    """
+    edges = []
+    node = rng.randrange(node_count)
+    for key in range(edge_count):
+        next_node = rng.randrange(node_count)
+        u, v = (node, next_node) if rng.random() < 0.5 else (next_node, node)
+        edges.append(
+            Edge(u, v, key, {"EDGE_ID": key, "NODEID_FROM": u, "NODEID_TO": v})
+        )
+        node = next_node
+    for edge in rng.sample(edges, edge_count // 5):
+        edges.append(Edge(*edge[:3], dict(edge.attributes)))
+    rng.shuffle(edges)
+    return edges
+
+
+def test_find_ordered_path_duplicate_edges():
+    edges = [Edge(0, 1, "A", {}), Edge(1, 2, "B", {}), Edge(1, 2, "B", {})]
+    for use_subgraph in (False, True):
+        ordered_edges = routing.find_ordered_path(edges, use_subgraph=use_subgraph)
+        assert [edge.key for edge in ordered_edges] == ["A", "B"]
+
+
+def get_ordered_path(edges, **kwargs):
+    ordered_edges = routing.find_ordered_path(copy.deepcopy(edges), **kwargs)
+    return [(e.key, e.attributes["WITH_DIRECTION"]) for e in ordered_edges]
+
+
+@pytest.mark.parametrize("node_count", [3, 8, 50])
+def test_find_ordered_path_subgraph(node_count):
+    rng = random.Random(node_count)
+    for i in range(100):
+        edges = create_random_edges(rng, rng.randint(1, 30), node_count)
+        if i % 10 == 0:
+            # a path that is not connected
+            edges += [Edge("A", "B", "X", {}), Edge("B", "C", "Y", {})]
+            with pytest.raises(NetworkXError):
+                routing.find_ordered_path(edges)
+            with pytest.raises(NetworkXError):
+                routing.find_ordered_path(edges, use_subgraph=True)
+            continue
+
+        start_node = edges[0].start_node
+        assert get_ordered_path(edges) == get_ordered_path(edges, use_subgraph=True)
+        try:
+            expected = get_ordered_path(edges, start_node=start_node, use_subgraph=True)
+        except ValueError:
+            with pytest.raises(ValueError):
+                get_ordered_path(edges, start_node=start_node)
+        else:
+            assert get_ordered_path(edges, start_node=start_node) == expected
+
+
+def test_find_ordered_path_long():
+    edges = [
+        Edge(i + 2, i + 1, i, {"EDGE_ID": i, "NODEID_FROM": i + 2, "NODEID_TO": i + 1})
+        for i in range(20000)
+    ]
+    random.Random(0).shuffle(edges)
+    ordered_edges = routing.find_ordered_path(edges, start_node=1)
+    assert [e.key for e in ordered_edges] == list(range(20000))
+
+
 if __name__ == "__main__":
     logging.basicConfig(level=logging.DEBUG)
     # test_get_path_ends()
@@ -0,0 +1,86 @@
+"""
+pytest -v tests/test_shared.py
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+import pytest
+from wayfarer import shared, routing, functions, columnar
+from tests import networks
+
+
+def solve_in_worker(directory):
+    net = shared.attach_network("simple", directory)
+    edges = routing.solve_shortest_path(net, 1, 5)
+    edge = functions.get_edge_by_key(net, 3)
+    return [e.key for e in edges], edge.start_node, os.getpid()
+
+
+def test_publish_network(tmp_path):
+    net = networks.simple_network()
+    path = shared.publish_network(net, "simple", str(tmp_path))
+
+    assert os.path.exists(path)
+    assert os.listdir(tmp_path) == ["wayfarer-simple.wyf"]
+
+
+def test_attach_network(tmp_path):
+    net = networks.simple_network()
+    shared.publish_network(net, "simple", str(tmp_path))
+
+    attached = shared.attach_network("simple", str(tmp_path))
+    assert shared.attach_network("simple", str(tmp_path)) is attached
+
+    # the stored compiled network is used for routing
+    assert columnar.get_compiled_network(attached) is attached.compiled
+    edges = routing.solve_shortest_path(attached, 1, 5)
+    assert edges == routing.solve_shortest_path(net, 1, 5)
+
+
+def test_attach_network_missing(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        shared.attach_network("missing", str(tmp_path))
+
+
+def test_republish_network(tmp_path):
+    net = networks.simple_network()
+    shared.publish_network(net, "simple", str(tmp_path))
+    attached = shared.attach_network("simple", str(tmp_path))
+
+    functions.add_edge(net, 1, 5, "new", {"LEN_": 1})
+    shared.publish_network(net, "simple", str(tmp_path))
+    reattached = shared.attach_network("simple", str(tmp_path))
+
+    assert reattached is not attached
+    assert [e.key for e in routing.solve_shortest_path(reattached, 1, 5)] == ["new"]
+    # the previous network can still be used
+    assert len(routing.solve_shortest_path(attached, 1, 5)) == 4
+
+
+def test_unpublish_network(tmp_path):
+    net = networks.simple_network()
+    shared.publish_network(net, "simple", str(tmp_path))
+    attached = shared.attach_network("simple", str(tmp_path))
+    shared.unpublish_network("simple", str(tmp_path))
+
+    assert os.listdir(tmp_path) == []
+    assert functions.get_edge_by_key(attached, 1).end_node == 2
+
+
+def test_worker_processes(tmp_path):
+    net = networks.simple_network()
+    shared.publish_network(net, "simple", str(tmp_path))
+
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        results = list(executor.map(solve_in_worker, [str(tmp_path)] * 4))
+
+    for keys, start_node, pid in results:
+        assert keys == [1, 2, 3, 4]
+        assert start_node == 3
+        assert pid != os.getpid()
+
+
+def test_doctest():
+    import doctest
+
+    print(doctest.testmod(shared))
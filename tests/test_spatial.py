@@ -0,0 +1,181 @@
+"""
+pytest -v tests/test_spatial.py
+"""
+
+import pickle
+import networkx
+from shapely.geometry import LineString, Point
+from wayfarer import Edge, spatial, splitter, functions, overlay, columnar
+from tests.networks import create_geometry_grid
+
+
+def get_expected_distances(net, point):
+    """
+    Get the distances to all edges, by checking every edge
+    """
+    distances = sorted(
+        (spatial.get_geometry(d).distance(Point(point)), k)
+        for _, _, k, d in net.edges(keys=True, data=True)
+    )
+    return distances
+
+
+def get_expected_key(net, point):
+    return get_expected_distances(net, point)[0][1]
+
+
+def test_get_nearest_edges():
+    net = create_geometry_grid(size=5, keep_geometry=True)
+    index = spatial.create_spatial_index(net)
+    assert len(index) == 40
+
+    matches = index.get_nearest_edges((130, 95))
+    assert len(matches) == 1
+    key, distance, measure, point = matches[0]
+    assert key == get_expected_key(net, (130, 95))
+    assert distance == 5
+    assert measure == 30
+    assert point == (130, 100)
+
+
+def test_get_nearest_edges_count():
+    net = create_geometry_grid(size=5, keep_geometry=True)
+    index = spatial.create_spatial_index(net)
+
+    matches = index.get_nearest_edges((130, 95), count=4)
+    expected = [d for d, k in get_expected_distances(net, (130, 95))[:4]]
+    assert [m.distance for m in matches] == expected
+
+    # a point on a node
+    matches = index.get_nearest_edges((100, 100), count=4)
+    assert [m.distance for m in matches] == [0, 0, 0, 0]
+
+    assert len(index.get_nearest_edges((0, 0), count=100)) == 40
+
+
+def test_get_nearest_edges_max_distance():
+    net = create_geometry_grid(size=5, keep_geometry=True)
+    index = spatial.create_spatial_index(net)
+
+    matches = index.get_nearest_edges((130, 95), count=4, max_distance=30)
+    assert [m.distance for m in matches] == [5, 30]
+    assert index.get_nearest_edges((-100, -100), max_distance=10) == []
+
+
+def test_get_nearest_edges_for_points():
+    net = create_geometry_grid(size=5, keep_geometry=True)
+    index = spatial.create_spatial_index(net)
+
+    points = [(130, 95), (5, 42), (399, 390), (250, 260), (-50, 210)]
+    matches = index.get_nearest_edges_for_points(points)
+
+    for point, match in zip(points, matches):
+        assert match == index.get_nearest_edges(point)[0]
+        assert match.key == get_expected_key(net, point)
+
+    assert index.get_nearest_edges_for_points(points, max_distance=20)[-1] is None
+    assert index.get_nearest_edges_for_points([]) == []
+
+
+def test_split_edges():
+    net = create_geometry_grid(size=5, keep_geometry=True)
+    index = spatial.create_spatial_index(net)
+    edge = functions.get_edge_by_key(net, 1)
+
+    splitter.split_network_edge(net, edge.key, [25, 75])
+    assert len(index) == 42
+
+    for point in [(5, 10), (5, 50), (5, 90)]:
+        match = index.get_nearest_edges(point)[0]
+        assert match.key == get_expected_key(net, point)
+        assert index.get_nearest_edges_for_points([point])[0] == match
+
+    split_edges = [
+        Edge(*e) for e in net.edges(keys=True, data=True) if str(e[2]).startswith("1::")
+    ]
+    splitter.unsplit_network_edges(net, split_edges)
+    assert index.get_nearest_edges((5, 50))[0].key == 1
+    assert index.get_nearest_edges_for_points([(5, 50)])[0].key == 1
+
+
+def test_rebuild(monkeypatch):
+    monkeypatch.setattr(spatial, "MIN_REBUILD_CHANGES", 1)
+    net = create_geometry_grid(size=5, keep_geometry=True)
+    index = spatial.create_spatial_index(net)
+
+    functions.remove_edge_by_key(net, 0)
+    functions.add_edge(
+        net, "0|0", "new", "new", {"geometry": LineString([(0, 0), (-100, 0)])}
+    )
+    tree = index.tree
+    assert index.tree is tree
+    assert len(tree) == 40
+    assert index.get_nearest_edges((-50, 10))[0].key == "new"
+    assert index.get_nearest_edges((50, -1))[0].key != 0
+
+
+def test_overlay():
+    net = create_geometry_grid(size=5, keep_geometry=True)
+    index = spatial.create_spatial_index(net)
+
+    ov = overlay.create_overlay(net)
+    splitter.split_network_edge(ov, 1, [50])
+
+    ov_index = spatial.get_spatial_index(ov)
+    assert ov_index is not index
+    assert ov_index.get_nearest_edges((5, 10))[0].key == "1::50"
+    assert index.get_nearest_edges((5, 10))[0].key == 1
+    assert len(index) == 40
+
+
+def test_columnar(tmp_path):
+    filename = str(tmp_path / "network.wyf")
+    net = create_geometry_grid(size=5, keep_geometry=True)
+    spatial.create_spatial_index(net)
+    columnar.save_network(net, filename)
+
+    loaded = columnar.load_network(filename)
+    assert spatial.get_spatial_index(loaded) is None
+
+    index = spatial.create_spatial_index(loaded)
+    assert index.get_nearest_edges((130, 95))[0].key == get_expected_key(net, (130, 95))
+
+
+def test_pickle():
+    net = create_geometry_grid(size=5, keep_geometry=True)
+    index = spatial.create_spatial_index(net)
+    index.get_nearest_edges((0, 0))
+
+    new_net = pickle.loads(pickle.dumps(net))
+    new_index = spatial.get_spatial_index(new_net)
+    assert new_index.get_nearest_edges((130, 95)) == index.get_nearest_edges((130, 95))
+
+
+def test_edges_without_geometry():
+    net = networkx.MultiGraph()
+    net.add_edge(0, 1, key="A")
+    index = spatial.create_spatial_index(net)
+
+    assert len(index) == 0
+    assert index.get_nearest_edges((0, 0)) == []
+    assert index.get_nearest_edges_for_points([(0, 0)]) == [None]
+
+
+def test_remove_added_edge():
+    net = create_geometry_grid(size=5, keep_geometry=True)
+    index = spatial.create_spatial_index(net)
+
+    edge = functions.add_edge(
+        net, "0|0", "new", "X", {"geometry": LineString([(0, 0), (-100, 0)])}
+    )
+    functions.remove_edge(net, edge)
+
+    # an edge that was never in the tree is not recorded as removed
+    assert len(index) == len(net.edges()) == 40
+    assert index._removed == set()
+
+
+def test_doctest():
+    import doctest
+
+    print(doctest.testmod(spatial))
@@ -3,9 +3,12 @@ pytest -v tests/test_splitting.py
 """
 
 import logging
+import random
 import pytest
-from wayfarer import splitter, functions, loader, routing
+from shapely.geometry import LineString, Point
+from wayfarer import splitter, functions, loader, routing, validator, indexes
 from tests.helper import simple_features
+from tests.networks import create_geometry_grid
 
 
 @pytest.mark.parametrize("use_reverse_lookup", [(True), (False)])
@@ -212,6 +215,72 @@ def test_split_with_points(use_reverse_lookup):
     assert len(edges) == 6
 
 
+def get_edge_data(net):
+    return sorted(
+        (str(k), u, v, {f: d[f] for f in d if f != "geometry"})
+        for u, v, k, d in net.edges(keys=True, data=True)
+    )
+
+
+@pytest.mark.parametrize("use_reverse_lookup", [(True), (False)])
+def test_split_network_edges(use_reverse_lookup):
+    feats = simple_features()
+    net = loader.load_network_from_geometries(
+        feats, use_reverse_lookup=use_reverse_lookup, keep_geometry=True
+    )
+    expected_net = loader.load_network_from_geometries(
+        feats, use_reverse_lookup=use_reverse_lookup, keep_geometry=True
+    )
+
+    splits = [(2, 60), (1, 50), (2, 20), (3, 100), (2, 60), (1, -10)]
+    split_edges = splitter.split_network_edges(net, splits)
+
+    measures = splitter.group_measures_by_edge(splits)
+    for key, edge_measures in measures.items():
+        expected = splitter.split_network_edge(expected_net, key, edge_measures)
+        assert split_edges[key] == expected
+
+    assert list(split_edges) == [2, 1, 3]
+    assert get_edge_data(net) == get_edge_data(expected_net)
+    if use_reverse_lookup:
+        assert net.graph["keys"] == expected_net.graph["keys"]
+        assert validator.valid_reverse_lookup(net)
+
+    # the geometries are cut from the original lines
+    edge = functions.get_edge_by_key(net, "2::60")
+    assert list(edge.attributes["geometry"].coords) == [(120.0, 0.0), (160.0, 0.0)]
+
+
+def test_split_network_edges_missing():
+    net = loader.load_network_from_geometries(simple_features())
+    with pytest.raises(KeyError):
+        splitter.split_network_edges(net, [(1, 50), (99, 10)])
+    # the network is unchanged
+    assert len(net.edges()) == 3
+
+
+def test_split_network_edges_grid():
+    net = create_geometry_grid(size=10)
+    for u, v, atts in net.edges(data=True):
+        start, end = atts["NODEID_FROM"], atts["NODEID_TO"]
+        coords = [[float(c) for c in node.split("|")] for node in (start, end)]
+        atts["geometry"] = LineString(coords)
+    indexes.create_attribute_index(net, "EDGE_ID")
+    rng = random.Random(0)
+    keys = list(net.graph["keys"])
+    splits = [(rng.choice(keys), rng.randint(1, 99)) for i in range(2000)]
+
+    split_edges = splitter.split_network_edges(net, splits)
+
+    assert validator.valid_reverse_lookup(net)
+    for key, edges in split_edges.items():
+        assert sum(e.attributes["LEN_"] for e in edges) == 100
+        assert sum(e.attributes["geometry"].length for e in edges) == 100
+        # the index is updated with the split edges
+        indexed = functions.get_edges_by_attribute(net, "EDGE_ID", key)
+        assert sorted(e.key for e in indexed) == sorted(e.key for e in edges)
+
+
 def test_unsplit_network_edges():
     """
     Test splitting a network edge and then joining it back
@@ -252,6 +321,16 @@ def test_unsplit_network_edges():
     assert unsplit_edge == original_edge
 
 
+def test_get_measures_for_points():
+
+    line = LineString([(0, 0), (0, 50), (50, 50)])
+    points = [(1, 10), (-2, 60), (25, 49)]
+    measures = splitter.get_measures_for_points(line, points)
+
+    expected = [splitter.get_measure_for_point(line, Point(p)) for p in points]
+    assert measures.tolist() == pytest.approx(expected)
+
+
 def test_doctest():
     import doctest
 
@@ -2,7 +2,8 @@
 pytest -v tests/test_validator.py
 """
 
-from wayfarer import loader, validator
+from wayfarer import loader, validator, functions, splitter
+from tests import networks
 import networkx
 
 
@@ -72,6 +73,130 @@ def test_recalculate_keys():
     }
 
 
+def test_valid_reverse_lookup_corrupted():
+    net = networks.simple_network()
+    assert validator.valid_reverse_lookup(net)
+
+    # the same number of keys, but with nodes that do not match the network
+    keys = net.graph["keys"]
+    del keys[1]
+    keys[1] = (3, 4)
+    assert len(keys) == len(net.edges())
+    assert not validator.valid_reverse_lookup(net)
+
+    # plain dictionaries are also checked
+    validator.recalculate_keys(net)
+    net.graph["keys"] = dict(net.graph["keys"])
+    assert validator.valid_reverse_lookup(net)
+    net.graph["keys"][1] = (3, 4)
+    assert not validator.valid_reverse_lookup(net)
+
+
+def test_valid_reverse_lookup_integer_nodes():
+    net = loader.create_graph()
+    functions.add_edge(net, 0, 1, "A", {})
+    functions.add_edge(net, 1, 1, "B", {})
+    assert validator.valid_reverse_lookup(net)
+
+    # integer nodes hash to themselves, and 0 ^ 1 == 2 ^ 3
+    keys = net.graph["keys"]
+    del keys["A"]
+    keys["A"] = (2, 3)
+    assert not validator.valid_reverse_lookup(net)
+
+    # self-loops at different nodes
+    validator.recalculate_keys(net)
+    keys = net.graph["keys"]
+    del keys["B"]
+    keys["B"] = (2, 2)
+    assert not validator.valid_reverse_lookup(net)
+
+
+def test_valid_reverse_lookup_directed():
+    net = loader.create_graph(graph_type=networkx.MultiDiGraph)
+    functions.add_edge(net, 0, 1, "A", {})
+    assert net.graph["keys"].directed
+    assert validator.valid_reverse_lookup(net)
+
+    # the nodes of an entry are in the wrong direction
+    keys = net.graph["keys"]
+    del keys["A"]
+    keys["A"] = (1, 0)
+    assert not validator.valid_reverse_lookup(net)
+
+    validator.recalculate_keys(net)
+    assert validator.valid_reverse_lookup(net)
+    assert validator.get_lookup_checksum(dict(net.graph["keys"]), directed=True) == (
+        validator.get_checksum(net)
+    )
+
+
+def test_reconcile_keys():
+    recs1 = [
+        {"EDGE_ID": "A", "LEN_": 100, "NODEID_FROM": 0, "NODEID_TO": 100},
+        {"EDGE_ID": 1, "LEN_": 100, "NODEID_FROM": 100, "NODEID_TO": 200},
+    ]
+    net1 = loader.load_network_from_records(recs1)
+
+    recs2 = [
+        {"EDGE_ID": "B", "LEN_": 100, "NODEID_FROM": 100, "NODEID_TO": 200},
+        {"EDGE_ID": 2, "LEN_": 100, "NODEID_FROM": 200, "NODEID_TO": 300},
+    ]
+    net2 = loader.load_network_from_records(recs2)
+
+    net = networkx.compose(net1, net2)
+    net.graph["keys"] = net.graph["keys"].copy()
+    assert not validator.valid_reverse_lookup(net)
+
+    assert validator.reconcile_keys(net, net1.edges(keys=True)) == 2
+    assert validator.valid_reverse_lookup(net)
+    assert net.graph["keys"] == {
+        "A": (0, 100),
+        1: (100, 200),
+        "B": (100, 200),
+        2: (200, 300),
+    }
+
+    # edges removed without updating the keys
+    net.remove_edge(200, 300, 2)
+    assert validator.reconcile_keys(net, [(200, 300, 2)]) == 1
+    assert 2 not in net.graph["keys"]
+    assert validator.valid_reverse_lookup(net)
+
+
+def test_reconcile_keys_changes():
+    net = networks.simple_network()
+    assert validator.reconcile_keys(net) == 0
+    keys = net.graph["keys"]
+
+    # changes made by wayfarer functions are recorded but need no repairs
+    splitter.split_network_edge(net, 1, [5])
+    functions.remove_edge_by_key(net, 2)
+    assert keys.changes == {1, "1::5", "1::10", 2}
+    assert validator.reconcile_keys(net) == 0
+    assert keys.changes == set()
+
+    # entries changed directly in the index are repaired
+    keys["X"] = (1, 2)
+    assert validator.reconcile_keys(net) == 1
+    assert "X" not in keys
+    assert validator.valid_reverse_lookup(net)
+
+
+def test_reconcile_keys_plain_dict():
+    net = networkx.MultiGraph()
+    net.add_edge(0, 1, key="A")
+    assert validator.reconcile_keys(net, [(0, 1, "A")]) == 1
+    assert isinstance(net.graph["keys"], loader.KeyIndex)
+    assert validator.valid_reverse_lookup(net)
+
+
+def test_doctest():
+    import doctest
+
+    print(doctest.testmod(validator))
+
+
 def test_edge_attributes():
     recs = [{"EDGE_ID": 0, "LEN_": 10, "NODEID_FROM": 0, "NODEID_TO": 10, "PROP1": "A"}]
     net = loader.load_network_from_records(recs)
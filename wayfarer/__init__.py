@@ -1,4 +1,5 @@
 from __future__ import annotations
+from collections.abc import MutableMapping
 from typing import NamedTuple
 
 
@@ -33,7 +34,7 @@ class Edge(NamedTuple):
     start_node: int | str
     end_node: int | str
     key: int | str
-    attributes: dict
+    attributes: MutableMapping
 
 
 def to_edge(edge: tuple) -> Edge:
@@ -0,0 +1,370 @@
+"""
+This module contains a compact store for edge attributes, to reduce the memory used by
+large networks
+
+By default each edge in a networkx graph has its own attribute dictionary, containing the
+wayfarer fields ``EDGE_ID``, ``LEN_``, ``NODEID_FROM``, and ``NODEID_TO`` as well as any other
+properties. In an :class:`AttributeStore` the four wayfarer fields are stored in typed columns
+using the standard library ``array`` module, and other properties are stored as a tuple of values.
+The names of the properties of each edge are stored in a :class:`Schema`, which is
+"hash-consed" so all edges with the same property names share a single schema.
+
+Each edge then has an :class:`EdgeAttributes` view in place of its dictionary. Views behave as a dictionary
+of attributes, so can be used with functions such as :func:`wayfarer.functions.get_edge_by_key`
+and the networkx routing functions, and can be modified.
+
+The module also contains the :class:`AttributeProxy` which can be returned as the attributes of edges
+by functions such as :func:`wayfarer.functions.get_edges_from_nodes` by setting ``copy_on_write``,
+so the attributes of each edge in a route are only copied if they are modified.
+"""
+
+from __future__ import annotations
+import copy
+import logging
+from array import array
+from collections.abc import Mapping, MutableMapping
+from typing import Iterable, Iterator
+import networkx
+from wayfarer import (
+    EDGE_ID_FIELD,
+    LENGTH_FIELD,
+    NODEID_FROM_FIELD,
+    NODEID_TO_FIELD,
+)
+
+log = logging.getLogger("wayfarer")
+
+# the fields stored in columns, and the array typecode used for each column
+CORE_FIELDS = {
+    EDGE_ID_FIELD: "q",
+    LENGTH_FIELD: "d",
+    NODEID_FROM_FIELD: "q",
+    NODEID_TO_FIELD: "q",
+}
+
+# the Python types that can be stored in each type of array
+_ARRAY_TYPES = {"q": (int,), "d": (int, float)}
+
+
+class Schema:
+    """
+    The names of the attributes of an edge, shared by all edges with the
+    same attribute names. Create using :meth:`AttributeStore.get_schema`
+    """
+
+    __slots__ = ("names", "positions")
+
+    def __init__(self, names: tuple[str, ...]):
+        self.names = names
+        # the position of each attribute in the tuple of values, or -1 for the core fields
+        # which are stored in columns
+        positions = {}
+        i = 0
+        for name in names:
+            if name in CORE_FIELDS:
+                positions[name] = -1
+            else:
+                positions[name] = i
+                i += 1
+        self.positions = positions
+
+    def __repr__(self) -> str:
+        return f"Schema({self.names})"
+
+
+class _Column:
+    """
+    A column of values, stored in an array while all values are of the type
+    of the array, and in a list otherwise
+    """
+
+    __slots__ = ("typecode", "values")
+
+    def __init__(self, typecode: str):
+        self.typecode = typecode
+        self.values = array(typecode)  # type: array | list
+
+    def _check(self, value) -> None:
+        if isinstance(self.values, array) and (
+            type(value) not in _ARRAY_TYPES[self.typecode]
+            or (self.typecode == "q" and not -(2**63) <= value < 2**63)
+        ):
+            self.values = self.values.tolist()
+
+    def append(self, value) -> None:
+        self._check(value)
+        self.values.append(value)
+
+    def __getitem__(self, i: int):
+        return self.values[i]
+
+    def __setitem__(self, i: int, value) -> None:
+        self._check(value)
+        self.values[i] = value
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class AttributeStore:
+    """
+    A compact store of the attributes of the edges of a network
+
+    >>> store = AttributeStore()
+    >>> atts = store.add({"EDGE_ID": 1, "LEN_": 10.5, "NODEID_FROM": 1, "NODEID_TO": 2, "TYPE": "road"})
+    >>> atts
+    {'EDGE_ID': 1, 'LEN_': 10.5, 'NODEID_FROM': 1, 'NODEID_TO': 2, 'TYPE': 'road'}
+    >>> atts["LEN_"]
+    10.5
+    >>> store.add({"EDGE_ID": 2, "TYPE": "road"})._schema is store.add({"EDGE_ID": 3, "TYPE": "road"})._schema
+    True
+    """
+
+    def __init__(self):
+        self.columns = {name: _Column(tc) for name, tc in CORE_FIELDS.items()}
+        self._schemas = {}  # type: dict[tuple[str, ...], Schema]
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def get_schema(self, names: tuple[str, ...]) -> Schema:
+        """
+        Get the shared schema for a tuple of attribute names
+
+        Args:
+            names: The attribute names
+        Returns:
+            The schema
+        """
+
+        schema = self._schemas.get(names)
+        if schema is None:
+            schema = Schema(names)
+            self._schemas[names] = schema
+        return schema
+
+    def add(self, attributes: Mapping) -> EdgeAttributes:
+        """
+        Add the attributes of an edge to the store
+
+        Args:
+            attributes: The attributes of the edge
+        Returns:
+            A view of the attributes in the store
+        """
+
+        schema = self.get_schema(tuple(attributes))
+        row = self._size
+
+        for name, column in self.columns.items():
+            column.append(attributes.get(name, 0))
+
+        values = tuple(v for k, v in attributes.items() if k not in CORE_FIELDS)
+        self._size += 1
+
+        return EdgeAttributes(self, row, schema, values)
+
+
+class EdgeAttributes(MutableMapping):
+    """
+    A view of the attributes of an edge in an :class:`AttributeStore`,
+    which can be used in place of a dictionary of attributes.
+    Changing the names of the attributes of an edge changes its schema.
+
+    >>> store = AttributeStore()
+    >>> atts = store.add({"EDGE_ID": 1, "LEN_": 10})
+    >>> atts["WITH_DIRECTION"] = True
+    >>> del atts["LEN_"]
+    >>> atts
+    {'EDGE_ID': 1, 'WITH_DIRECTION': True}
+    >>> atts == {"EDGE_ID": 1, "WITH_DIRECTION": True}
+    True
+    """
+
+    __slots__ = ("_store", "_row", "_schema", "_values")
+
+    def __init__(self, store: AttributeStore, row: int, schema: Schema, values: tuple):
+        self._store = store
+        self._row = row
+        self._schema = schema
+        self._values = values
+
+    def __getitem__(self, name: str):
+        position = self._schema.positions[name]
+        if position < 0:
+            return self._store.columns[name][self._row]
+        return self._values[position]
+
+    def __setitem__(self, name: str, value) -> None:
+        store = self._store
+        position = self._schema.positions.get(name)
+
+        if position is None:
+            self._schema = store.get_schema(self._schema.names + (name,))
+            if name not in CORE_FIELDS:
+                self._values = self._values + (value,)
+                return
+        elif position >= 0:
+            values = self._values
+            following = position + 1
+            self._values = values[:position] + (value,) + values[following:]
+            return
+
+        store.columns[name][self._row] = value
+
+    def __delitem__(self, name: str) -> None:
+        schema = self._schema
+        position = schema.positions[name]
+
+        if position >= 0:
+            values = self._values
+            following = position + 1
+            self._values = values[:position] + values[following:]
+
+        self._schema = self._store.get_schema(
+            tuple(n for n in schema.names if n != name)
+        )
+
+    def __contains__(self, name) -> bool:
+        return name in self._schema.positions
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._schema.names)
+
+    def __len__(self) -> int:
+        return len(self._schema.names)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+    def copy(self) -> dict:
+        """
+        Return a dictionary copy of the attributes
+        """
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(dict(self), memo)
+
+
+class AttributeProxy(MutableMapping):
+    """
+    A copy-on-write view of the attributes of a network edge, which can be used for the edges
+    returned by the routing functions. Values are read from the network until the proxy is modified,
+    when a private shallow copy of the attributes is made so the network is unchanged.
+    Values such as lists and geometries are shared with the network so should be replaced
+    rather than modified in place.
+
+    >>> atts = {"EDGE_ID": 1, "LEN_": 10}
+    >>> proxy = AttributeProxy(atts)
+    >>> proxy["LEN_"], proxy.is_copy
+    (10, False)
+    >>> proxy["WITH_DIRECTION"] = True
+    >>> proxy, proxy.is_copy
+    ({'EDGE_ID': 1, 'LEN_': 10, 'WITH_DIRECTION': True}, True)
+    >>> atts
+    {'EDGE_ID': 1, 'LEN_': 10}
+    """
+
+    __slots__ = ("_attributes", "_copied")
+
+    def __init__(self, attributes: Mapping):
+        self._attributes = attributes
+        self._copied = False
+
+    @property
+    def is_copy(self) -> bool:
+        """
+        ``True`` if the proxy has been modified and no longer reads from the network
+        """
+        return self._copied
+
+    def _get_copy(self) -> dict:
+        if not self._copied:
+            self._attributes = dict(self._attributes)
+            self._copied = True
+        return self._attributes  # type: ignore[return-value]
+
+    def __getitem__(self, name: str):
+        return self._attributes[name]
+
+    def get(self, name: str, default=None):
+        return self._attributes.get(name, default)
+
+    def __setitem__(self, name: str, value) -> None:
+        self._get_copy()[name] = value
+
+    def __delitem__(self, name: str) -> None:
+        del self._get_copy()[name]
+
+    def __contains__(self, name) -> bool:
+        return name in self._attributes
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._attributes)
+
+    def __len__(self) -> int:
+        return len(self._attributes)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, AttributeProxy):
+            other = other._attributes
+        return self._attributes == other
+
+    def __repr__(self) -> str:
+        return repr(dict(self._attributes))
+
+    def copy(self) -> dict:
+        """
+        Return a dictionary copy of the attributes
+        """
+        return dict(self._attributes)
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(dict(self._attributes), memo)
+
+
+def compact_network(
+    net: networkx.MultiGraph | networkx.MultiDiGraph,
+    store: AttributeStore | None = None,
+    edges: Iterable[tuple] | None = None,
+) -> AttributeStore:
+    """
+    Replace the attribute dictionaries of the edges in a network with views of an :class:`AttributeStore`.
+    Edges added to the network afterwards have attribute dictionaries unless they are
+    also compacted.
+
+    Args:
+        net: The network
+        store: An existing store to add the edge attributes to. If not supplied a new store is created
+        edges: An optional list of edges to compact, as (start_node, end_node, key) tuples. By default
+               all edges are compacted
+    Returns:
+        The store
+
+    >>> net = networkx.MultiGraph()
+    >>> net.add_edges_from([(0, 1, "A", {"EDGE_ID": "A", "LEN_": 10}), (1, 2, "B", {"EDGE_ID": "B", "LEN_": 5})])
+    ['A', 'B']
+    >>> store = compact_network(net)
+    >>> type(net[1][2]["B"]).__name__, net[1][2]["B"]
+    ('EdgeAttributes', {'EDGE_ID': 'B', 'LEN_': 5.0})
+    """
+
+    if store is None:
+        store = AttributeStore()
+
+    if edges is None:
+        edges = net.edges(keys=True)
+
+    # undirected edges, and the successors and predecessors of directed edges,
+    # share a single key dictionary so each edge is only updated once
+    adj = net._adj
+    for u, v, key, *_ in edges:
+        key_dict = adj[u][v]
+        attributes = key_dict[key]
+        if not isinstance(attributes, EdgeAttributes):
+            key_dict[key] = store.add(attributes)
+
+    log.debug(f"The store contains the attributes of {len(store)} edges")
+    return store
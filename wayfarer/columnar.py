@@ -0,0 +1,763 @@
+"""
+This module contains a versioned, columnar file format for networks, that can be
+loaded using memory-mapping
+
+Unlike a pickle file, no objects are created when a network is loaded. Nodes, edges, and
+attributes are stored in columns that are read directly from the memory-mapped file when
+they are accessed, so loading is near-instant and several processes loading the same file
+share the same physical memory pages. The CSR arrays used by :mod:`wayfarer.compiled` are
+also stored in the file so a loaded network can be routed on immediately.
+
+The file layout is a fixed-size prelude, a series of 8-byte aligned sections, and a
+JSON header describing the sections:
+
+.. code-block:: text
+
+    magic (8 bytes) | version (uint32) | reserved (uint32) | header offset (uint64) | header length (uint64)
+    sections...
+    header (UTF-8 JSON)
+
+A loaded network is a read-only (frozen) networkx graph. Use :func:`wayfarer.overlay.create_overlay`
+to make changes to a loaded network, or :func:`to_network` to convert it to a standard networkx graph.
+"""
+
+from __future__ import annotations
+import copy
+import json
+import logging
+import mmap
+import pickle
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from functools import cached_property
+from collections.abc import Mapping, Sequence
+from types import MappingProxyType
+from typing import Any
+import networkx
+from wayfarer import LENGTH_FIELD, compiled as compiled_network
+from wayfarer.loader import KeyIndex
+
+log = logging.getLogger("wayfarer")
+
+MAGIC = b"WAYFARER"
+VERSION = 1
+
+_PRELUDE = struct.Struct("<8sIIQQ")
+_ALIGNMENT = 8
+
+# the number of nodes whose neighbours are kept by each adjacency mapping,
+# so routing does not recreate them each time a node is visited
+ADJACENCY_CACHE_SIZE = 65536
+
+# a placeholder for attributes that are not set for a node or edge
+_MISSING = object()
+_EMPTY = MappingProxyType({})  # type: MappingProxyType
+
+
+def _get_column_type(values: list) -> str:
+    """
+    Get the type of column required to store a list of values, so that
+    the values are unchanged when loaded again
+    """
+
+    present = [v for v in values if v is not _MISSING]
+
+    if all(type(v) is bool for v in present):
+        return "bool"
+    if all(type(v) is int and -(2**63) <= v < 2**63 for v in present):
+        return "int"
+    if all(type(v) is float for v in present):
+        return "float"
+    if all(type(v) is str for v in present):
+        return "str"
+
+    try:
+        if all(json.loads(json.dumps(v)) == v for v in present):
+            return "json"
+    except (TypeError, ValueError):
+        pass
+
+    return "pickle"
+
+
+class _Writer:
+    """
+    Collect the sections and header of a network file
+    """
+
+    def __init__(self):
+        self.sections = []  # type: list[tuple[str, bytes]]
+
+    def add_section(self, name: str, data) -> str:
+        self.sections.append((name, bytes(data)))
+        return name
+
+    def add_column(self, name: str, values: list) -> dict:
+        """
+        Add a column of values, returning the column specification
+        """
+
+        column_type = _get_column_type(values)
+        spec = {"type": column_type, "data": name, "offsets": None, "mask": None}
+
+        if any(v is _MISSING for v in values):
+            mask = bytes(0 if v is _MISSING else 1 for v in values)
+            spec["mask"] = self.add_section(name + ".mask", mask)
+
+        if column_type in ("bool", "int", "float"):
+            typecode = {"bool": "b", "int": "q", "float": "d"}[column_type]
+            placeholder = {"bool": False, "int": 0, "float": 0.0}[column_type]
+            data = array(
+                typecode, (placeholder if v is _MISSING else v for v in values)
+            )
+            self.add_section(name, data.tobytes())
+        else:
+            encode = {
+                "str": lambda v: v.encode("utf-8"),
+                "json": lambda v: json.dumps(v).encode("utf-8"),
+                "pickle": lambda v: pickle.dumps(v, protocol=pickle.HIGHEST_PROTOCOL),
+            }[column_type]
+            blobs = [b"" if v is _MISSING else encode(v) for v in values]
+            offsets = array("q", [0])
+            for blob in blobs:
+                offsets.append(offsets[-1] + len(blob))
+            spec["offsets"] = self.add_section(name + ".offsets", offsets.tobytes())
+            self.add_section(name, b"".join(blobs))
+
+        return spec
+
+    def add_table(self, prefix: str, records: list) -> list:
+        """
+        Add a column for each attribute in a list of attribute dictionaries
+        """
+
+        names = {}  # type: dict
+        for atts in records:
+            for name in atts:
+                names[name] = None
+
+        columns = []
+        for i, name in enumerate(names):
+            values = [atts.get(name, _MISSING) for atts in records]
+            columns.append([name, self.add_column(f"{prefix}.{i}", values)])
+
+        return columns
+
+    def add_index(self, name: str, values: list) -> str | None:
+        """
+        Add the sort order of a column of values, so a value can be found using a binary search
+        """
+        if _get_column_type(values) not in ("int", "str"):
+            return None
+        order = sorted(range(len(values)), key=values.__getitem__)
+        return self.add_section(name, array("q", order).tobytes())
+
+    def write(self, filename: str, header: dict):
+
+        with open(filename, "wb") as f:
+            f.write(bytes(_PRELUDE.size))
+            sections = {}
+            for name, data in self.sections:
+                position = f.tell()
+                padding = -position % _ALIGNMENT
+                f.write(bytes(padding))
+                sections[name] = [position + padding, len(data)]
+                f.write(data)
+
+            header["sections"] = sections
+            header_bytes = json.dumps(header).encode("utf-8")
+            header_offset = f.tell()
+            f.write(header_bytes)
+
+            f.seek(0)
+            f.write(_PRELUDE.pack(MAGIC, VERSION, 0, header_offset, len(header_bytes)))
+
+
+def save_network(
+    net: networkx.MultiGraph | networkx.MultiDiGraph,
+    filename: str,
+    weight: str | None = LENGTH_FIELD,
+) -> None:
+    """
+    Save a network to a columnar network file
+
+    Args:
+        net: The network
+        filename: The filename to save the network to
+        weight: The edge attribute used as the cost of an edge in the stored CSR arrays.
+                See :func:`wayfarer.compiled.compile_network`
+    """
+
+    nodes = list(net.nodes())
+    node_index = {n: i for i, n in enumerate(nodes)}
+    directed = net.is_directed()
+    lookup = net.graph.get("keys", {})
+
+    edge_from = array("q")
+    edge_to = array("q")
+    keys = []
+    records = []
+
+    for u, v, k, d in net.edges(keys=True, data=True):
+        if not directed and lookup.get(k) == (v, u):
+            # keep the orientation of undirected edges
+            u, v = v, u
+        edge_from.append(node_index[u])
+        edge_to.append(node_index[v])
+        keys.append(k)
+        records.append(d)
+
+    writer = _Writer()
+    # indexes are created in each process rather than stored
+    graph_attributes = {
+        k: v for k, v in net.graph.items() if k not in ("keys", "indexes")
+    }
+
+    header = {
+        "byteorder": sys.byteorder,
+        "directed": directed,
+        "weight": weight,
+        "has_keys": "keys" in net.graph,
+        "node_count": len(nodes),
+        "edge_count": len(keys),
+        "nodes": writer.add_column("nodes", nodes),
+        "node_order": writer.add_index("nodes.order", nodes),
+        "node_attributes": writer.add_table(
+            "nodes.attributes", [net.nodes[n] for n in nodes]
+        ),
+        "edge_from": writer.add_section("edges.from", edge_from.tobytes()),
+        "edge_to": writer.add_section("edges.to", edge_to.tobytes()),
+        "keys": writer.add_column("edges.keys", keys),
+        "key_order": writer.add_index("edges.keys.order", keys),
+        "edge_attributes": writer.add_table("edges.attributes", records),
+        "graph_attributes": writer.add_table("graph.attributes", [graph_attributes]),
+    }
+
+    cn = compiled_network.compile_network(net, weight=weight)
+    for name, values in zip(
+        ("offsets", "targets", "edges", "weights"),
+        (cn.offsets, cn.targets, cn.edges, cn.weights),
+    ):
+        header[f"csr.{name}"] = writer.add_section(f"csr.{name}", values)
+        if directed:
+            values = cn.reverse[("offsets", "targets", "edges", "weights").index(name)]
+            header[f"csr.reverse.{name}"] = writer.add_section(
+                f"csr.reverse.{name}", values
+            )
+
+    writer.write(filename, header)
+
+
+class _Column(Sequence):
+    """
+    A read-only column of values, decoded from a memory-mapped file when accessed
+    """
+
+    def __init__(
+        self,
+        column_type: str,
+        data: memoryview,
+        offsets: memoryview | None,
+        mask: memoryview | None,
+    ):
+        self.column_type = column_type
+        self.offsets = offsets
+        self.mask = mask
+
+        self.data = data  # type: memoryview[Any]
+        if column_type == "bool":
+            self.data = data.cast("?")
+        elif column_type == "int":
+            self.data = data.cast("q")
+        elif column_type == "float":
+            self.data = data.cast("d")
+
+        self._decode = {
+            "str": lambda b: str(b, "utf-8"),
+            "json": lambda b: json.loads(bytes(b)),
+            "pickle": pickle.loads,
+        }.get(column_type)
+
+    def get(self, i: int):
+        """
+        Return the value at index i, or ``_MISSING`` if no value was set
+        """
+        if self.mask is not None and not self.mask[i]:
+            return _MISSING
+        if self._decode is None:
+            return self.data[i]
+        assert self.offsets is not None
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self._decode(self.data[start:end])
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self.get(i)
+
+    def __len__(self):
+        if self.offsets is not None:
+            return len(self.offsets) - 1
+        return len(self.data)
+
+
+class _SortedIndex(Mapping):
+    """
+    A read-only mapping of the values in a column to their index, using a binary
+    search of the stored sort order
+    """
+
+    def __init__(self, values: _Column, order: memoryview):
+        self.column = values
+        self.order = order
+        self.value_type = int if values.column_type == "int" else str
+
+    def __getitem__(self, value) -> int:
+        if type(value) is not self.value_type:
+            raise KeyError(value)
+        position = bisect_left(self.order, value, key=self.column.get)
+        if position < len(self.order):
+            i = self.order[position]
+            if self.column.get(i) == value:
+                return i
+        raise KeyError(value)
+
+    def __contains__(self, value) -> bool:
+        try:
+            self[value]
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        return iter(self.column)
+
+    def __len__(self):
+        return len(self.column)
+
+
+class _Attributes(Mapping):
+    """
+    A read-only view of the attributes of a node or edge
+    """
+
+    __slots__ = ("_columns", "_index")
+
+    def __init__(self, columns: dict, index: int):
+        self._columns = columns
+        self._index = index
+
+    def __getitem__(self, name):
+        value = self._columns[name].get(self._index)
+        if value is _MISSING:
+            raise KeyError(name)
+        return value
+
+    def __iter__(self):
+        for name, column in self._columns.items():
+            if column.get(self._index) is not _MISSING:
+                yield name
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+    def copy(self) -> dict:
+        """
+        Return a shallow copy of the attributes as a dictionary
+        """
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(dict(self), memo)
+
+
+class NetworkFile:
+    """
+    A memory-mapped columnar network file. Create using :func:`load_network` rather
+    than directly.
+
+    Args:
+        filename: The path to a file created with :func:`save_network`
+    """
+
+    def __init__(self, filename: str):
+
+        with open(filename, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        buffer = memoryview(self._mmap)
+        magic, version, _, header_offset, header_length = _PRELUDE.unpack_from(buffer)
+
+        if magic != MAGIC:
+            raise ValueError(f"{filename} is not a wayfarer network file")
+        if version != VERSION:
+            raise ValueError(
+                f"{filename} uses version {version} of the file format. Only version {VERSION} is supported"
+            )
+
+        header_end = header_offset + header_length
+        self.header = header = json.loads(bytes(buffer[header_offset:header_end]))
+
+        if header["byteorder"] != sys.byteorder:
+            raise ValueError(
+                f"{filename} was saved on a {header['byteorder']}-endian system"
+            )
+
+        self._sections = {}
+        for name, (start, length) in header["sections"].items():
+            end = start + length
+            self._sections[name] = buffer[start:end]
+
+        self.directed = header["directed"]  # type: bool
+        self.weight = header["weight"]  # type: str | None
+        self.has_keys = header["has_keys"]  # type: bool
+
+        self.nodes = self._get_column(header["nodes"])
+        self.node_index = self._get_index(self.nodes, header["node_order"])
+        self.node_attributes = self._get_table(header["node_attributes"])
+
+        self.keys = self._get_column(header["keys"])
+        self.key_index = self._get_index(self.keys, header["key_order"])
+        self.edge_from = self._sections[header["edge_from"]].cast("q")
+        self.edge_to = self._sections[header["edge_to"]].cast("q")
+        self.edge_attributes = self._get_table(header["edge_attributes"])
+
+        self.graph_attributes = dict(
+            _Attributes(self._get_table(header["graph_attributes"]), 0)
+        )
+
+        names = ("offsets", "targets", "edges", "weights")
+        self.forward = tuple(
+            self._get_array(header[f"csr.{name}"], name) for name in names
+        )
+        if self.directed:
+            self.reverse = tuple(
+                self._get_array(header[f"csr.reverse.{name}"], name) for name in names
+            )
+        else:
+            self.reverse = self.forward
+
+    def _get_array(self, name: str, array_name: str) -> memoryview[Any]:
+        if array_name == "weights":
+            return self._sections[name].cast("d")
+        return self._sections[name].cast("q")
+
+    def _get_column(self, spec: dict) -> _Column:
+        return _Column(
+            spec["type"],
+            self._sections[spec["data"]],
+            self._sections[spec["offsets"]].cast("q") if spec["offsets"] else None,
+            self._sections[spec["mask"]] if spec["mask"] else None,
+        )
+
+    def _get_index(self, values: _Column, order: str | None) -> Mapping:
+        if order is None:
+            # values of mixed types cannot be sorted, so create a dictionary
+            return {v: i for i, v in enumerate(values)}
+        return _SortedIndex(values, self._sections[order].cast("q"))
+
+    def _get_table(self, columns: list) -> dict:
+        return {name: self._get_column(spec) for name, spec in columns}
+
+    def get_edge_index(self, key: int | str) -> int:
+        """
+        Get the index of an edge in the edge table from its key
+
+        Args:
+            key: The unique key of the edge
+        Returns:
+            The edge index
+        """
+        return self.key_index[key]
+
+    def get_edge_attributes(self, edge_index: int) -> Mapping:
+        """
+        Return a read-only view of the attributes of an edge
+
+        Args:
+            edge_index: The index of the edge in the edge table
+        Returns:
+            A mapping of the edge attributes
+        """
+        return _Attributes(self.edge_attributes, edge_index)
+
+    def get_node_attributes(self, node_index: int) -> Mapping:
+        """
+        Return a read-only view of the attributes of a node
+
+        Args:
+            node_index: The index of the node in the node table
+        Returns:
+            A mapping of the node attributes
+        """
+        if not self.node_attributes:
+            return _EMPTY
+        return _Attributes(self.node_attributes, node_index)
+
+    def get_compiled_network(self) -> compiled_network.CompiledNetwork:
+        """
+        Return a compiled network using the CSR arrays stored in the file
+
+        Returns:
+            A compiled network
+        """
+        offsets, targets, edges, weights = self.forward
+        return compiled_network.CompiledNetwork(
+            self.nodes,
+            offsets,
+            targets,
+            edges,
+            weights,
+            self.keys,
+            directed=self.directed,
+            weight=self.weight,
+            reverse=self.reverse if self.directed else None,
+            node_index=self.node_index,  # type: ignore[arg-type]
+        )
+
+
+class _KeyLookup(Mapping):
+    """
+    A read-only mapping of edge keys to (start_node, end_node) tuples, used
+    as the ``graph["keys"]`` reverse lookup of a loaded network
+    """
+
+    def __init__(self, network_file: NetworkFile):
+        self._file = network_file
+
+    def __getitem__(self, key) -> tuple:
+        f = self._file
+        i = f.get_edge_index(key)
+        return (f.nodes.get(f.edge_from[i]), f.nodes.get(f.edge_to[i]))
+
+    def __contains__(self, key) -> bool:
+        return key in self._file.key_index
+
+    def __iter__(self):
+        return iter(self._file.keys)
+
+    def __len__(self):
+        return len(self._file.keys)
+
+
+class _NodeLookup(Mapping):
+    """
+    A read-only mapping of node ids to node attributes
+    """
+
+    def __init__(self, network_file: NetworkFile):
+        self._file = network_file
+
+    def __getitem__(self, node) -> Mapping:
+        return self._file.get_node_attributes(self._file.node_index[node])
+
+    def __contains__(self, node) -> bool:
+        return node in self._file.node_index
+
+    def __iter__(self):
+        return iter(self._file.nodes)
+
+    def __len__(self):
+        return len(self._file.nodes)
+
+
+class _Adjacency(Mapping):
+    """
+    A read-only adjacency mapping created from CSR arrays. The neighbours of the
+    most recently used nodes are cached, up to :data:`ADJACENCY_CACHE_SIZE` nodes
+    """
+
+    def __init__(self, network_file: NetworkFile, csr: tuple):
+        self._file = network_file
+        self._offsets, self._targets, self._edges, _ = csr
+        self._cache = OrderedDict()  # type: OrderedDict
+
+    def __getitem__(self, node) -> Mapping:
+        cache = self._cache
+        view = cache.get(node)
+        if view is not None:
+            try:
+                cache.move_to_end(node)
+            except KeyError:
+                # removed from the cache by another thread
+                pass
+            return view
+
+        f = self._file
+        i = f.node_index[node]
+        neighbours = {}  # type: dict
+        for slot in range(self._offsets[i], self._offsets[i + 1]):
+            edge_index = self._edges[slot]
+            nbr = f.nodes.get(self._targets[slot])
+            keydict = neighbours.setdefault(nbr, {})
+            keydict[f.keys.get(edge_index)] = f.get_edge_attributes(edge_index)
+
+        # the views are shared by all callers so the key dictionaries are also read-only
+        view = MappingProxyType(
+            {nbr: MappingProxyType(keydict) for nbr, keydict in neighbours.items()}
+        )
+        cache[node] = view
+        while len(cache) > ADJACENCY_CACHE_SIZE:
+            try:
+                cache.popitem(last=False)
+            except KeyError:
+                break
+        return view
+
+    def __contains__(self, node) -> bool:
+        return node in self._file.node_index
+
+    def __iter__(self):
+        return iter(self._file.nodes)
+
+    def __len__(self):
+        return len(self._file.nodes)
+
+
+class _ColumnarNetwork(networkx.MultiGraph):
+    """
+    The shared implementation of networks loaded from a columnar network file
+    """
+
+    def _init_network(self, network_file: NetworkFile | None):
+
+        self.network_file = network_file
+
+        if network_file is None:
+            # networkx creates new instances of a graph class with no arguments
+            # for example when creating subgraph views
+            return
+
+        self.graph = dict(network_file.graph_attributes)
+        if network_file.has_keys:
+            self.graph["keys"] = _KeyLookup(network_file)
+
+        self._node = _NodeLookup(network_file)
+        self._adj = _Adjacency(network_file, network_file.forward)
+        if network_file.directed:
+            self._pred = _Adjacency(network_file, network_file.reverse)
+
+        networkx.freeze(self)
+
+    @cached_property
+    def compiled(self) -> compiled_network.CompiledNetwork:
+        """
+        Return a compiled network using the CSR arrays stored in the file
+        """
+        assert self.network_file is not None
+        return self.network_file.get_compiled_network()
+
+
+class ColumnarMultiGraph(_ColumnarNetwork):
+    """
+    A read-only undirected network loaded from a columnar network file. See :func:`load_network`
+    """
+
+    def __init__(self, network_file: NetworkFile | None = None):
+        networkx.MultiGraph.__init__(self)
+        self._init_network(network_file)
+
+
+class ColumnarMultiDiGraph(_ColumnarNetwork, networkx.MultiDiGraph):
+    """
+    A read-only directed network loaded from a columnar network file. See :func:`load_network`
+    """
+
+    def __init__(self, network_file: NetworkFile | None = None):
+        networkx.MultiDiGraph.__init__(self)
+        self._init_network(network_file)
+
+
+def load_network(filename: str) -> ColumnarMultiGraph | ColumnarMultiDiGraph:
+    """
+    Load a network from a columnar network file using memory-mapping. The network
+    is read-only - see :func:`wayfarer.overlay.create_overlay` to add edits to the network
+
+    Args:
+        filename: The path to a file created with :func:`save_network`
+    Returns:
+        A read-only network
+
+    >>> import os, tempfile
+    >>> from wayfarer import loader, functions
+    >>> net = loader.create_graph()
+    >>> edge = functions.add_edge(net, 0, 1, "A", {"LEN_": 10})
+    >>> fn = os.path.join(tempfile.mkdtemp(), "network.wyf")
+    >>> save_network(net, fn)
+    >>> loaded = load_network(fn)
+    >>> functions.get_edge_by_key(loaded, "A")
+    Edge(start_node=0, end_node=1, key='A', attributes={'LEN_': 10})
+    """
+
+    network_file = NetworkFile(filename)
+    if network_file.directed:
+        return ColumnarMultiDiGraph(network_file)
+    else:
+        return ColumnarMultiGraph(network_file)
+
+
+def get_compiled_network(
+    net: networkx.MultiGraph | networkx.MultiDiGraph, weight: str | None = LENGTH_FIELD
+) -> compiled_network.CompiledNetwork | None:
+    """
+    Return the compiled network stored with a network loaded from a columnar file,
+    if it was compiled using the same weight
+
+    Args:
+        net: A network
+        weight: The edge attribute used as the cost of an edge
+    Returns:
+        The compiled network, or None if the network was not loaded from a columnar file
+        or was compiled using a different weight
+    """
+
+    if isinstance(net, _ColumnarNetwork) and net.network_file is not None:
+        if net.network_file.weight == weight:
+            return net.compiled
+    return None
+
+
+def to_network(
+    net: ColumnarMultiGraph | ColumnarMultiDiGraph,
+) -> networkx.MultiGraph | networkx.MultiDiGraph:
+    """
+    Convert a network loaded from a columnar network file to a standard
+    networkx network, that can be modified
+
+    Args:
+        net: A network loaded using :func:`load_network`
+    Returns:
+        A new networkx network
+    """
+
+    f = net.network_file
+    assert f is not None
+
+    new_net = networkx.MultiDiGraph() if f.directed else networkx.MultiGraph()
+    new_net.graph.update(f.graph_attributes)
+
+    for i, node in enumerate(f.nodes):
+        new_net.add_node(node, **f.get_node_attributes(i))
+
+    keys = KeyIndex(directed=f.directed)
+
+    for i, key in enumerate(f.keys):
+        u = f.nodes.get(f.edge_from[i])
+        v = f.nodes.get(f.edge_to[i])
+        new_net.add_edge(u, v, key=key, **f.get_edge_attributes(i))
+        keys[key] = (u, v)
+
+    if f.has_keys:
+        new_net.graph["keys"] = keys
+
+    return new_net
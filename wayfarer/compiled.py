@@ -0,0 +1,715 @@
+"""
+This module contains a compiled, read-only representation of a network
+for fast repeated routing
+
+A network is compiled into integer node indices and Compressed Sparse Row (CSR)
+arrays. ``offsets[i]:offsets[i + 1]`` gives the range of "slots" for the edges leaving
+node ``i``, and for each slot ``targets`` holds the node index at the other end of the edge,
+``weights`` the cost of the edge, and ``edges`` the index of the edge key in ``keys``.
+
+Only the standard library ``array`` module is used so no additional dependencies are required.
+"""
+
+from __future__ import annotations
+import heapq
+import logging
+from array import array
+from math import hypot, inf as INFINITY
+from typing import Callable, Collection, Sequence
+import networkx
+from networkx import NetworkXNoPath, NodeNotFound
+from wayfarer import LENGTH_FIELD
+
+log = logging.getLogger("wayfarer")
+
+
+class CompiledNetwork:
+    """
+    A read-only CSR representation of a wayfarer network. Create using
+    :func:`compile_network` rather than directly.
+
+    Args:
+        nodes: A sequence of node ids, indexed by node index
+        offsets: The CSR offsets array, with a length of the number of nodes + 1
+        targets: The node index at the end of each slot
+        edges: The index of the edge key for each slot
+        weights: The weight (cost) of each slot
+        keys: A sequence of edge keys, indexed by edge index
+        directed: If the network was compiled from a directed network
+        weight: The name of the attribute used to create the weights
+        reverse: The reverse CSR arrays (offsets, targets, edges, weights) for a directed network
+        node_index: An optional mapping of node ids to node indices. Created from
+                    nodes if not supplied
+    """
+
+    def __init__(
+        self,
+        nodes: Sequence,
+        offsets,
+        targets,
+        edges,
+        weights,
+        keys: Sequence,
+        directed: bool = False,
+        weight: str | None = LENGTH_FIELD,
+        reverse: tuple | None = None,
+        node_index: dict | None = None,
+    ):
+        self.nodes = nodes
+        self.offsets = _readonly(offsets)
+        self.targets = _readonly(targets)
+        self.edges = _readonly(edges)
+        self.weights = _readonly(weights)
+        self.keys = keys
+        self.directed = directed
+        self.weight = weight
+
+        if reverse is None:
+            if directed:
+                raise ValueError(
+                    "The reverse CSR arrays are required for directed networks"
+                )
+            self.reverse = (self.offsets, self.targets, self.edges, self.weights)
+        else:
+            offsets, targets, edges, weights = reverse
+            self.reverse = (
+                _readonly(offsets),
+                _readonly(targets),
+                _readonly(edges),
+                _readonly(weights),
+            )
+
+        if node_index is None:
+            node_index = {n: i for i, n in enumerate(nodes)}
+
+        self.node_index = node_index
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def __contains__(self, node) -> bool:
+        return node in self.node_index
+
+    def __repr__(self) -> str:
+        return "{}(nodes={}, slots={}, edges={}, directed={})".format(
+            type(self).__name__,
+            len(self.nodes),
+            len(self.targets),
+            len(self.keys),
+            self.directed,
+        )
+
+    def __reduce__(self):
+        # memoryviews cannot be pickled, so convert back to arrays
+        # allowing networks to be passed to other processes
+        def to_array(mv):
+            return array(mv.format, mv.tobytes())
+
+        reverse = None
+        if self.directed:
+            reverse = tuple(to_array(a) for a in self.reverse)
+
+        return (
+            type(self),
+            (
+                list(self.nodes),
+                to_array(self.offsets),
+                to_array(self.targets),
+                to_array(self.edges),
+                to_array(self.weights),
+                list(self.keys),
+                self.directed,
+                self.weight,
+                reverse,
+            ),
+        )
+
+    def get_node_index(self, node: int | str) -> int:
+        """
+        Get the integer index of a node id
+
+        Args:
+            node: The node id
+        Returns:
+            The node index
+        """
+        try:
+            return self.node_index[node]
+        except KeyError:
+            raise NodeNotFound(f"Node {node} not found in the compiled network")
+
+
+def _readonly(values) -> memoryview:
+    """
+    Return a read-only memoryview of an array, so the compiled
+    network cannot be modified once created
+    """
+    return memoryview(values).toreadonly()
+
+
+def _get_weight(attributes: dict, weight: str | None) -> float:
+    """
+    Get the weight of an edge, matching the networkx defaults
+    of 1 for a missing attribute or when no weight is used
+    """
+    if weight is None:
+        return 1.0
+    return float(attributes.get(weight, 1))
+
+
+def _build_csr(node_count: int, slots: list[tuple[int, int, int, float]]) -> tuple:
+    """
+    Create CSR arrays from a list of (from_index, to_index, edge_index, weight) tuples
+    """
+    counts = [0] * (node_count + 1)
+    for u, _, _, _ in slots:
+        counts[u + 1] += 1
+
+    for i in range(node_count):
+        counts[i + 1] += counts[i]
+
+    offsets = array("q", counts)
+    position = list(counts[:-1])
+
+    targets = array("q", bytes(8 * len(slots)))
+    edges = array("q", bytes(8 * len(slots)))
+    weights = array("d", bytes(8 * len(slots)))
+
+    for u, v, edge_index, w in slots:
+        p = position[u]
+        targets[p] = v
+        edges[p] = edge_index
+        weights[p] = w
+        position[u] = p + 1
+
+    return offsets, targets, edges, weights
+
+
+def compile_network(
+    net: networkx.MultiGraph | networkx.MultiDiGraph,
+    weight: str | None = LENGTH_FIELD,
+) -> CompiledNetwork:
+    """
+    Compile a network into a read-only CSR representation for fast routing.
+    The compiled network is a snapshot - if the network is modified it should be compiled again.
+
+    Args:
+        net: A network
+        weight: The edge attribute to use as the cost of an edge, or None to
+                give every edge a cost of 1
+    Returns:
+        The compiled network
+
+    >>> net = networkx.MultiGraph()
+    >>> net.add_edges_from([(0, 1, "A", {"LEN_": 10}), (1, 2, "B", {"LEN_": 10})])
+    ['A', 'B']
+    >>> compile_network(net)
+    CompiledNetwork(nodes=3, slots=4, edges=2, directed=False)
+    """
+
+    nodes = list(net.nodes())
+    node_index = {n: i for i, n in enumerate(nodes)}
+    directed = net.is_directed()
+
+    keys = []  # type: list[int | str]
+    forward = []  # type: list[tuple[int, int, int, float]]
+    backward = []  # type: list[tuple[int, int, int, float]]
+
+    for u, v, k, d in net.edges(keys=True, data=True):
+        edge_index = len(keys)
+        keys.append(k)
+        w = _get_weight(d, weight)
+        ui, vi = node_index[u], node_index[v]
+
+        forward.append((ui, vi, edge_index, w))
+        if directed:
+            backward.append((vi, ui, edge_index, w))
+        elif ui != vi:
+            forward.append((vi, ui, edge_index, w))
+
+    reverse = None
+    if directed:
+        reverse = _build_csr(len(nodes), backward)
+
+    offsets, targets, edges, weights = _build_csr(len(nodes), forward)
+
+    return CompiledNetwork(
+        nodes,
+        offsets,
+        targets,
+        edges,
+        weights,
+        keys,
+        directed=directed,
+        weight=weight,
+        reverse=reverse,
+        node_index=node_index,
+    )
+
+
+def _get_path(pred: dict, target: int) -> list[int]:
+    """
+    Walk back through the predecessors to get the list of
+    node indices from the source to the target
+    """
+    path = [target]
+    node = target
+    while pred[node] is not None:
+        node = pred[node][0]
+        path.append(node)
+    path.reverse()
+    return path
+
+
+def _check_nodes(compiled: CompiledNetwork, source, target) -> tuple[int, int]:
+    source_index = compiled.get_node_index(source)
+    target_index = compiled.get_node_index(target)
+    return source_index, target_index
+
+
+def _astar(
+    compiled: CompiledNetwork,
+    source_index: int,
+    target_index: int,
+    heuristic: Callable[[int, int], float] | None = None,
+) -> tuple[list[int] | None, int]:
+    """
+    Run an A* search between two node indices, returning the path of node indices
+    (or None if there is no path), and the number of nodes settled by the search.
+    Without a heuristic this is a standard Dijkstra search.
+    """
+    offsets, targets, weights = compiled.offsets, compiled.targets, compiled.weights
+
+    dist = {source_index: 0.0}
+    pred = {source_index: None}  # type: dict[int, tuple[int, int] | None]
+    settled = set()
+
+    if heuristic is None:
+        heap = [(0.0, source_index)]
+    else:
+        heap = [(heuristic(source_index, target_index), source_index)]
+
+    while heap:
+        _, u = heapq.heappop(heap)
+        if u in settled:
+            continue
+        settled.add(u)
+
+        if u == target_index:
+            return _get_path(pred, target_index), len(settled)
+
+        d = dist[u]
+        for slot in range(offsets[u], offsets[u + 1]):
+            v = targets[slot]
+            nd = d + weights[slot]
+            if v not in dist or nd < dist[v]:
+                dist[v] = nd
+                pred[v] = (u, slot)
+                if heuristic is None:
+                    heapq.heappush(heap, (nd, v))
+                else:
+                    heapq.heappush(heap, (nd + heuristic(v, target_index), v))
+
+    return None, len(settled)
+
+
+def astar(
+    compiled: CompiledNetwork,
+    source: int | str,
+    target: int | str,
+    heuristic: Callable[[int, int], float] | None = None,
+) -> list[int | str]:
+    """
+    Solve the shortest path between two nodes using the A* algorithm. The heuristic
+    is a function taking a node index and the target node index, and returning an estimate
+    of the remaining cost which must never be more than the actual cost.
+    See :func:`euclidean_heuristic` and :func:`landmark_heuristic`.
+
+    Args:
+        compiled: The compiled network
+        source: The id of the start node
+        target: The id of the end node
+        heuristic: A function to estimate the cost between two node indices
+    Returns:
+        A list of node ids from the source to the target
+
+    >>> net = networkx.MultiGraph()
+    >>> net.add_edges_from([("0|0", "0|10", "A", {"LEN_": 10}), ("0|10", "0|20", "B", {"LEN_": 10})])
+    ['A', 'B']
+    >>> cn = compile_network(net)
+    >>> astar(cn, "0|0", "0|20", euclidean_heuristic(cn))
+    ['0|0', '0|10', '0|20']
+    """
+    source_index, target_index = _check_nodes(compiled, source, target)
+    path, _ = _astar(compiled, source_index, target_index, heuristic)
+
+    if path is None:
+        raise NetworkXNoPath(f"Node {target} not reachable from {source}")
+
+    return [compiled.nodes[i] for i in path]
+
+
+def dijkstra(
+    compiled: CompiledNetwork, source: int | str, target: int | str
+) -> list[int | str]:
+    """
+    Solve the shortest path between two nodes using Dijkstra's algorithm.
+
+    Args:
+        compiled: The compiled network
+        source: The id of the start node
+        target: The id of the end node
+    Returns:
+        A list of node ids from the source to the target
+
+    >>> net = networkx.MultiGraph()
+    >>> net.add_edges_from([(0, 1, "A", {"LEN_": 10}), (1, 2, "B", {"LEN_": 10}), (0, 2, "C", {"LEN_": 50})])
+    ['A', 'B', 'C']
+    >>> dijkstra(compile_network(net), 0, 2)
+    [0, 1, 2]
+    """
+    return astar(compiled, source, target, heuristic=None)
+
+
+def bidirectional_dijkstra(
+    compiled: CompiledNetwork, source: int | str, target: int | str
+) -> list[int | str]:
+    """
+    Solve the shortest path between two nodes running Dijkstra's algorithm
+    from both the source and the target, until the two searches meet.
+    This usually settles far fewer nodes than :func:`dijkstra` on large networks.
+
+    Args:
+        compiled: The compiled network
+        source: The id of the start node
+        target: The id of the end node
+    Returns:
+        A list of node ids from the source to the target
+
+    >>> net = networkx.MultiGraph()
+    >>> net.add_edges_from([(0, 1, "A", {"LEN_": 10}), (1, 2, "B", {"LEN_": 10}), (0, 2, "C", {"LEN_": 50})])
+    ['A', 'B', 'C']
+    >>> bidirectional_dijkstra(compile_network(net), 0, 2)
+    [0, 1, 2]
+    """
+    source_index, target_index = _check_nodes(compiled, source, target)
+
+    if source_index == target_index:
+        return [source]
+
+    csr = (
+        (compiled.offsets, compiled.targets, compiled.weights),
+        (compiled.reverse[0], compiled.reverse[1], compiled.reverse[3]),
+    )
+
+    dists = ({source_index: 0.0}, {target_index: 0.0})
+    preds = ({source_index: None}, {target_index: None})  # type: tuple[dict, dict]
+    settled = (set(), set())  # type: tuple[set, set]
+    heaps = ([(0.0, source_index)], [(0.0, target_index)])
+
+    best = float("inf")
+    meeting_node = None
+
+    while heaps[0] and heaps[1]:
+        # the searches can stop once no shorter path can be found
+        if heaps[0][0][0] + heaps[1][0][0] >= best:
+            break
+
+        # expand the search with the smallest frontier
+        direction = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+        d, u = heapq.heappop(heaps[direction])
+
+        if u in settled[direction]:
+            continue
+        settled[direction].add(u)
+
+        offsets, targets, weights = csr[direction]
+        dist = dists[direction]
+        other_dist = dists[1 - direction]
+        pred = preds[direction]
+
+        for slot in range(offsets[u], offsets[u + 1]):
+            v = targets[slot]
+            nd = d + weights[slot]
+            if v not in dist or nd < dist[v]:
+                dist[v] = nd
+                pred[v] = (u, slot)
+                heapq.heappush(heaps[direction], (nd, v))
+            if v in other_dist:
+                total = dist[v] + other_dist[v]
+                if total < best:
+                    best = total
+                    meeting_node = v
+
+    if meeting_node is None:
+        raise NetworkXNoPath(f"Node {target} not reachable from {source}")
+
+    forward_path = _get_path(preds[0], meeting_node)
+    backward_path = _get_path(preds[1], meeting_node)
+    backward_path.reverse()
+    path = forward_path + backward_path[1:]
+
+    return [compiled.nodes[i] for i in path]
+
+
+def shortest_path(
+    compiled: CompiledNetwork,
+    source: int | str,
+    target: int | str,
+    bidirectional: bool = True,
+) -> list[int | str]:
+    """
+    Solve the shortest path between two nodes on a compiled network,
+    returning the same list of nodes as ``networkx.shortest_path``
+
+    Args:
+        compiled: The compiled network
+        source: The id of the start node
+        target: The id of the end node
+        bidirectional: Use a bidirectional search
+    Returns:
+        A list of node ids from the source to the target
+    """
+    if bidirectional:
+        return bidirectional_dijkstra(compiled, source, target)
+    else:
+        return dijkstra(compiled, source, target)
+
+
+def single_source_dijkstra(
+    compiled: CompiledNetwork,
+    source_index: int,
+    reverse: bool = False,
+    cutoff: float | None = None,
+    target_indices: Collection[int] | None = None,
+) -> dict[int, float]:
+    """
+    Get the cost from a node to all other reachable nodes. Set ``reverse`` to get the
+    cost from all nodes to the node instead (only different for directed networks).
+
+    Args:
+        compiled: The compiled network
+        source_index: The index of the node to search from
+        reverse: Search the reverse of the network
+        cutoff: Stop the search at nodes with a cost greater than this value
+        target_indices: Stop the search once all of these nodes have been reached
+    Returns:
+        A dictionary of node indices and their cost from the source node
+    """
+    if reverse:
+        offsets, targets, _, weights = compiled.reverse
+    else:
+        offsets, targets, weights = compiled.offsets, compiled.targets, compiled.weights
+
+    remaining = None if target_indices is None else set(target_indices)
+
+    dist = {source_index: 0.0}
+    settled = {}  # type: dict[int, float]
+    heap = [(0.0, source_index)]
+
+    while heap:
+        d, u = heapq.heappop(heap)
+        if u in settled:
+            continue
+        if cutoff is not None and d > cutoff:
+            break
+        settled[u] = d
+
+        if remaining is not None:
+            remaining.discard(u)
+            if not remaining:
+                break
+
+        for slot in range(offsets[u], offsets[u + 1]):
+            v = targets[slot]
+            nd = d + weights[slot]
+            if v not in dist or nd < dist[v]:
+                dist[v] = nd
+                heapq.heappush(heap, (nd, v))
+
+    return settled
+
+
+def get_node_coordinates(compiled: CompiledNetwork, interner=None) -> array:
+    """
+    Get the coordinates of all nodes in a compiled network, from node ids in the
+    ``"x|y"`` form created by :func:`wayfarer.loader.load_network_from_geometries`,
+    or from a :class:`wayfarer.loader.NodeInterner` for networks with integer node ids
+
+    Args:
+        compiled: The compiled network
+        interner: The node interner of the network, stored as ``net.graph["node_interner"]``
+    Returns:
+        An array of the x and y value of each node, with the coordinates of node index ``i``
+        at positions ``2 * i`` and ``2 * i + 1``
+
+    >>> net = networkx.MultiGraph()
+    >>> net.add_edges_from([("0|0", "0.5|10", "A", {"LEN_": 10})])
+    ['A']
+    >>> get_node_coordinates(compile_network(net))
+    array('d', [0.0, 0.0, 0.5, 10.0])
+    """
+    coordinates = array("d")
+
+    if interner is not None:
+        for node in compiled.nodes:
+            coordinates.extend(interner.get_coordinates(node))
+        return coordinates
+
+    for node in compiled.nodes:
+        try:
+            x, y = str(node).split("|")
+            coordinates.append(float(x))
+            coordinates.append(float(y))
+        except ValueError:
+            raise ValueError(
+                f"The node {node} does not contain coordinates in the form x|y"
+            )
+
+    return coordinates
+
+
+def euclidean_heuristic(
+    compiled: CompiledNetwork, coordinates=None, scale: float = 1.0
+) -> Callable[[int, int], float]:
+    """
+    Create a heuristic for :func:`astar` using the straight-line distance between nodes.
+    This is only valid (admissible) if the cost of every edge is at least its straight-line length
+    multiplied by ``scale``, for example when edge lengths are calculated from projected geometries.
+
+    Args:
+        compiled: The compiled network
+        coordinates: An array of node coordinates. If not supplied these are created using
+                     :func:`get_node_coordinates`
+        scale: The minimum cost per unit of distance, for example set to 1 / maximum speed
+               when edge costs are travel times
+    Returns:
+        A heuristic function
+    """
+    if coordinates is None:
+        coordinates = get_node_coordinates(compiled)
+
+    xs = coordinates[0::2]
+    ys = coordinates[1::2]
+
+    def heuristic(node_index: int, target_index: int) -> float:
+        return scale * hypot(
+            xs[node_index] - xs[target_index], ys[node_index] - ys[target_index]
+        )
+
+    return heuristic
+
+
+class Landmarks:
+    """
+    Precomputed costs to and from a set of landmark nodes, used to create
+    a heuristic for the ALT (A*, Landmarks, Triangle inequality) algorithm.
+    Create using :func:`create_landmarks`.
+
+    Args:
+        nodes: The node indices of the landmarks
+        from_costs: An array of costs from each landmark to every node
+        to_costs: An array of costs from every node to each landmark
+    """
+
+    def __init__(
+        self, nodes: list[int], from_costs: list[array], to_costs: list[array]
+    ):
+        self.nodes = nodes
+        self.from_costs = from_costs
+        self.to_costs = to_costs
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(nodes={self.nodes})"
+
+
+def _to_cost_array(node_count: int, costs: dict[int, float]) -> array:
+    values = array("d", [INFINITY]) * node_count
+    for n, c in costs.items():
+        values[n] = c
+    return values
+
+
+def create_landmarks(compiled: CompiledNetwork, count: int = 8) -> Landmarks:
+    """
+    Select landmark nodes and calculate the costs to and from every node in the network.
+    Landmarks are chosen using "farthest" selection - each new landmark is the node furthest
+    from the landmarks already chosen. Unlike :func:`euclidean_heuristic` this works for any
+    edge costs, such as travel times, that do not match planar distances.
+
+    Args:
+        compiled: The compiled network
+        count: The number of landmarks to create
+    Returns:
+        The landmarks
+    """
+    node_count = len(compiled)
+    count = min(count, node_count)
+
+    landmark_nodes = []  # type: list[int]
+    from_costs = []  # type: list[array]
+    to_costs = []  # type: list[array]
+
+    # minimum cost from any chosen landmark, used to find the next landmark
+    closest = array("d", [INFINITY]) * node_count
+    candidate = 0
+
+    while len(landmark_nodes) < count:
+        landmark_nodes.append(candidate)
+
+        forward = single_source_dijkstra(compiled, candidate)
+        from_costs.append(_to_cost_array(node_count, forward))
+
+        if compiled.directed:
+            backward = single_source_dijkstra(compiled, candidate, reverse=True)
+            to_costs.append(_to_cost_array(node_count, backward))
+        else:
+            to_costs.append(from_costs[-1])
+
+        for n, c in forward.items():
+            if c < closest[n]:
+                closest[n] = c
+
+        # choose the furthest reachable node, or an unreached node for disconnected networks
+        remaining = [n for n in range(node_count) if n not in landmark_nodes]
+        if not remaining:
+            break
+        candidate = max(remaining, key=lambda n: closest[n])
+
+    log.debug("Created %i landmarks", len(landmark_nodes))
+    return Landmarks(landmark_nodes, from_costs, to_costs)
+
+
+def landmark_heuristic(landmarks: Landmarks) -> Callable[[int, int], float]:
+    """
+    Create a heuristic for :func:`astar` using landmarks and the triangle inequality.
+    For a landmark L the cost from node v to target t is at least both
+    ``cost(L, t) - cost(L, v)`` and ``cost(v, L) - cost(t, L)``.
+
+    Args:
+        landmarks: Landmarks created with :func:`create_landmarks`
+    Returns:
+        A heuristic function
+
+    >>> net = networkx.MultiGraph()
+    >>> net.add_edges_from([(0, 1, "A", {"LEN_": 10}), (1, 2, "B", {"LEN_": 10}), (0, 2, "C", {"LEN_": 50})])
+    ['A', 'B', 'C']
+    >>> cn = compile_network(net)
+    >>> astar(cn, 0, 2, landmark_heuristic(create_landmarks(cn, count=2)))
+    [0, 1, 2]
+    """
+    costs = list(zip(landmarks.from_costs, landmarks.to_costs))
+
+    def heuristic(node_index: int, target_index: int) -> float:
+        estimate = 0.0
+        for from_cost, to_cost in costs:
+            forward = from_cost[target_index] - from_cost[node_index]
+            backward = to_cost[node_index] - to_cost[target_index]
+            # ignore landmarks where either node cannot be reached
+            if forward > estimate and forward != INFINITY:
+                estimate = forward
+            if backward > estimate and backward != INFINITY:
+                estimate = backward
+        return estimate
+
+    return heuristic
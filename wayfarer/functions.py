@@ -10,7 +10,9 @@ import logging
 from collections import OrderedDict
 import networkx
 from wayfarer import loops
-from typing import Iterable
+from array import array
+from collections.abc import Mapping, MutableMapping
+from typing import Iterable, Literal, NamedTuple, overload
 
 
 from wayfarer import (
@@ -22,6 +24,8 @@ from wayfarer import (
     OFFSET_FIELD,
     Edge,
 )
+from wayfarer.attributes import AttributeProxy
+from wayfarer.indexes import HashIndex, SortedIndex, get_attribute_index
 
 
 log = logging.getLogger("wayfarer")
@@ -109,7 +113,9 @@ def add_edge(
 ) -> Edge:
     """
     Add an edge to a network. When adding an edge to a network, nodes are automatically
-    added
+    added. Any indexes registered on the network, such as a
+    :class:`wayfarer.spatial.SpatialIndex`, are updated. If the edge cannot be added
+    to an index the error is raised before the network is modified
 
     Args:
         net: A network
@@ -125,6 +131,11 @@ def add_edge(
     MultiGraph with 2 nodes and 1 edges
     """
     new_edge = Edge(start_node, end_node, key, attributes)
+
+    # check the edge can be indexed before the network is modified
+    for index in net.graph.get("indexes", []):
+        index.check_edges([new_edge])
+
     net.add_edge(
         new_edge.start_node, new_edge.end_node, new_edge.key, **new_edge.attributes
     )
@@ -133,6 +144,9 @@ def add_edge(
         # we are using a reverse lookup dict so update this also
         net.graph["keys"][key] = (start_node, end_node)
 
+    for index in net.graph.get("indexes", []):
+        index.add_edge(new_edge)
+
     return new_edge
 
 
@@ -180,6 +194,9 @@ def remove_edge(net: networkx.MultiGraph | networkx.MultiDiGraph, edge: Edge):
     if "keys" in net.graph.keys():
         del net.graph["keys"][edge.key]
 
+    for index in net.graph.get("indexes", []):
+        index.remove_edge(edge)
+
 
 def get_edge_by_key(
     net: networkx.MultiGraph | networkx.MultiDiGraph,
@@ -231,14 +248,160 @@ def get_edge_by_key(
     return edge
 
 
+class EdgeColumns(NamedTuple):
+    """
+    The keys, nodes, and lengths of a list of edges, stored in columns
+    rather than as a list of :class:`wayfarer.Edge` tuples
+    """
+
+    keys: list
+    start_nodes: list
+    end_nodes: list
+    # the lengths of the edges, or NaN for edges without a length
+    lengths: array
+
+
+@overload
+def get_edges_by_keys(
+    net: networkx.MultiGraph | networkx.MultiDiGraph,
+    keys: Iterable[int | str],
+    with_data: bool = ...,
+    as_columns: Literal[False] = ...,
+    length_field: str = ...,
+) -> tuple[list[Edge], list]: ...
+
+
+@overload
+def get_edges_by_keys(
+    net: networkx.MultiGraph | networkx.MultiDiGraph,
+    keys: Iterable[int | str],
+    with_data: bool = ...,
+    *,
+    as_columns: Literal[True],
+    length_field: str = ...,
+) -> tuple[EdgeColumns, list]: ...
+
+
+def get_edges_by_keys(
+    net: networkx.MultiGraph | networkx.MultiDiGraph,
+    keys: Iterable[int | str],
+    with_data: bool = True,
+    as_columns: bool = False,
+    length_field: str = LENGTH_FIELD,
+) -> tuple[list[Edge] | EdgeColumns, list]:
+    """
+    Get the edges for a list of keys in a single pass, using the reverse lookup dictionary
+    if the network has one, or otherwise a single loop through all edges. Rather than raising a
+    ``KeyError`` for the first missing key, all keys not found in the network are returned.
+
+    Args:
+        net: A network
+        keys: The keys of the edges
+        with_data: Include the attributes of the edges, as a copy-on-write
+                   :class:`wayfarer.attributes.AttributeProxy` of each edge's attributes
+        as_columns: Return the edges as :class:`EdgeColumns` rather than a list of edges
+        length_field: The edge attribute used for the lengths when returning columns
+    Returns:
+        A tuple containing the edges found, in the order of the keys, and a list of the missing keys
+
+    >>> net = networkx.MultiGraph()
+    >>> net.add_edges_from([(0, 1, "A", {"LEN_": 10}), (1, 2, "B", {"LEN_": 20})])
+    ['A', 'B']
+    >>> edges, missing = get_edges_by_keys(net, ["B", "C", "A"])
+    >>> [e.key for e in edges], missing
+    (['B', 'A'], ['C'])
+    >>> columns, missing = get_edges_by_keys(net, ["A", "B"], as_columns=True)
+    >>> columns.start_nodes, columns.end_nodes, columns.lengths.tolist()
+    ([0, 1], [1, 2], [10.0, 20.0])
+    """
+
+    keys = list(keys)
+
+    if "keys" in net.graph:
+        lookup = net.graph["keys"]
+    else:
+        wanted = set(keys)
+        lookup = {k: (u, v) for u, v, k in net.edges(keys=True) if k in wanted}
+
+    adj = net._adj
+    found_keys = []
+    start_nodes = []
+    end_nodes = []
+    edge_attributes = []
+    missing = []
+
+    for key in keys:
+        nodes = lookup.get(key)
+        if nodes is None:
+            missing.append(key)
+            continue
+
+        u, v = nodes
+        try:
+            attributes = adj[u][v][key]
+        except KeyError:
+            # the reverse lookup dictionary is out-of-date
+            missing.append(key)
+            continue
+
+        found_keys.append(key)
+        start_nodes.append(u)
+        end_nodes.append(v)
+        edge_attributes.append(attributes)
+
+    if missing:
+        log.debug(f"{len(missing)} of {len(keys)} keys were not found in the network")
+
+    if as_columns:
+        nan = float("nan")
+        lengths = array("d", (atts.get(length_field, nan) for atts in edge_attributes))
+        return EdgeColumns(found_keys, start_nodes, end_nodes, lengths), missing
+
+    if with_data:
+        # attributes are only copied if modified, so the network is unchanged
+        proxies = map(AttributeProxy, edge_attributes)
+        edges = list(map(Edge, start_nodes, end_nodes, found_keys, proxies))
+    else:
+        edges = [
+            Edge(u, v, key, {}) for u, v, key in zip(start_nodes, end_nodes, found_keys)
+        ]
+
+    return edges, missing
+
+
 def get_edges_by_attribute(net, attribute_field: str, value) -> Iterable[Edge]:
     """
     Go through all edge property dicts until the relevant attribute is found.
     Edges can have different attribute dicts, so add a check that the key exists
     If the attribute_field does not exist for a particular edge then it is ignored.
+    If an index of the attribute has been created using
+    :func:`wayfarer.indexes.create_attribute_index` it is used rather than checking every edge.
     Returns an iterator
+
+    >>> net = networkx.MultiGraph()
+    >>> net.add_edges_from([(0, 1, "A", {"TYPE": "road"}), (1, 2, "B", {"TYPE": "path"})])
+    ['A', 'B']
+    >>> list(get_edges_by_attribute(net, "TYPE", "road"))
+    [Edge(start_node=0, end_node=1, key='A', attributes={'TYPE': 'road'})]
     """
 
+    index = get_attribute_index(net, attribute_field)
+    edges = None
+
+    if index is not None:
+        try:
+            if isinstance(index, HashIndex):
+                edges = index.get_edges(value)
+            elif value is not None:
+                # edges with a value of None are not in a sorted index
+                edges = index.get_edges(value, value)
+        except TypeError:
+            # the value cannot be looked up in the index, so check every edge
+            pass
+
+    if edges is not None:
+        return (Edge(u, v, k, net[u][v][k]) for u, v, k in edges)
+
     return (
         Edge(u, v, k, d)
         for u, v, k, d in net.edges(keys=True, data=True)
@@ -246,6 +409,48 @@ def get_edges_by_attribute(net, attribute_field: str, value) -> Iterable[Edge]:
     )
 
 
+def get_edges_by_attribute_range(
+    net, attribute_field: str, min_value=None, max_value=None
+) -> Iterable[Edge]:
+    """
+    Get the edges with an attribute value between a minimum and maximum value, including edges
+    with values equal to the minimum or maximum. Edges without the attribute, or with a value of ``None``,
+    are ignored. If a sorted index of the attribute has been created using
+    :func:`wayfarer.indexes.create_attribute_index` it is used rather than checking every edge,
+    and edges are returned ordered by value. Returns an iterator
+
+    Args:
+        net: A network
+        attribute_field: The edge attribute
+        min_value: The minimum value. If ``None`` there is no minimum
+        max_value: The maximum value. If ``None`` there is no maximum
+    Returns:
+        An iterator of the edges
+
+    >>> net = networkx.MultiGraph()
+    >>> net.add_edges_from([(0, 1, "A", {"SPEED": 50}), (1, 2, "B", {"SPEED": 80})])
+    ['A', 'B']
+    >>> [e.key for e in get_edges_by_attribute_range(net, "SPEED", 40, 60)]
+    ['A']
+    """
+
+    index = get_attribute_index(net, attribute_field, SortedIndex)
+
+    if index is not None:
+        return (
+            Edge(u, v, k, net[u][v][k])
+            for u, v, k in index.get_edges(min_value, max_value)
+        )
+
+    return (
+        Edge(u, v, k, d)
+        for u, v, k, d in net.edges(keys=True, data=True)
+        if d.get(attribute_field) is not None
+        and (min_value is None or d[attribute_field] >= min_value)
+        and (max_value is None or d[attribute_field] <= max_value)
+    )
+
+
 # def get_edge_by_keys(net, keys, key_field=EDGE_ID_FIELD):
 #    #  set(a).intersection(b)
 #    return (
@@ -284,10 +489,14 @@ def get_all_complex_paths(net: networkx.MultiGraph | networkx.MultiDiGraph, node
     return paths
 
 
-def get_all_paths_from_nodes(net, node_list, with_direction_flag=False):
+def get_all_paths_from_nodes(
+    net, node_list, with_direction_flag=False, copy_on_write: bool = False
+):
     """
     Get all combinations of edges along a set of nodes, rather
-    than just the shortest edges
+    than just the shortest edges.
+    Set ``copy_on_write`` to return the attributes of each edge as a
+    :class:`wayfarer.attributes.AttributeProxy` rather than a copy
     l = [("a","b"), ("c"), ("d","e")]
     [('a', 'c', 'd'), ('a', 'c', 'e'), ('b', 'c', 'd'), ('b', 'c', 'e')]
 
@@ -326,7 +535,7 @@ def get_all_paths_from_nodes(net, node_list, with_direction_flag=False):
                 for key, attributes in edges.items():
                     # make a copy so client programs can modify without
                     # affecting the original edge dict
-                    atts_copy = copy_attributes(attributes)
+                    atts_copy = get_attributes_copy(attributes, copy_on_write)
                     edge = Edge(start_node=u, end_node=v, key=key, attributes=atts_copy)
                     if with_direction_flag:
                         add_direction_flag(
@@ -378,12 +587,17 @@ def get_edges_from_node_pair(
     return edges
 
 
-def copy_attributes(attributes: dict) -> dict:
+def copy_attributes(attributes: Mapping) -> dict:
     """
     Make a copy of the attributes dictionary.
-    Using ``marshal`` is much faster, but fails on dictionary values such as classes
+    Using ``marshal`` is much faster, but fails on dictionary values such as classes.
+    Read-only attribute mappings, such as those of a network loaded from a columnar
+    file, are returned as a dictionary
     """
 
+    if not isinstance(attributes, dict):
+        attributes = dict(attributes)
+
     try:
         atts_copy = marshal.loads(marshal.dumps(attributes))
     except Exception:
@@ -392,6 +606,27 @@ def copy_attributes(attributes: dict) -> dict:
     return atts_copy
 
 
+def get_attributes_copy(
+    attributes: Mapping, copy_on_write: bool = False
+) -> MutableMapping:
+    """
+    Copy the attributes of an edge using :func:`copy_attributes`, or if ``copy_on_write``
+    is set return a :class:`wayfarer.attributes.AttributeProxy`. A proxy reads from the
+    network and is only copied when modified, which is faster for read-only results. It is not
+    a ``dict``, so for example cannot be passed to ``json.dumps``, and values such as lists
+    are shared with the network
+
+    >>> atts = {"LEN_": 10, "NAMES": ["A"]}
+    >>> get_attributes_copy(atts)["NAMES"] is atts["NAMES"]
+    False
+    >>> type(get_attributes_copy(atts, copy_on_write=True)).__name__
+    'AttributeProxy'
+    """
+    if copy_on_write:
+        return AttributeProxy(attributes)
+    return copy_attributes(attributes)
+
+
 def get_edges_from_nodes(
     net: networkx.MultiGraph | networkx.MultiDiGraph,
     node_list: list[int | str],
@@ -399,6 +634,7 @@ def get_edges_from_nodes(
     length_field: str | None = LENGTH_FIELD,
     return_unique: bool = True,
     shortest_path_only: bool = True,
+    copy_on_write: bool = False,
 ) -> list[Edge]:
     """
     From a list of nodes, create pairs and then get all the edges between the two nodes.
@@ -406,7 +642,9 @@ def get_edges_from_nodes(
     ``shortest_path_only`` to ``False`` will return all edges ignoring the ``length_field``.
     Set ``with_direction_flag`` to add a new attribute to the edge to show if it is matching the
     direction of the path.
-    ``return_unique`` ensures only one copy of each edge is returned in the case of loops
+    ``return_unique`` ensures only one copy of each edge is returned in the case of loops.
+    Set ``copy_on_write`` to return the attributes of each edge as a
+    :class:`wayfarer.attributes.AttributeProxy` rather than a copy.
     """
     edge_list = []
 
@@ -418,13 +656,13 @@ def get_edges_from_nodes(
         if edges:
             if shortest_path_only:
                 key, attributes = get_shortest_edge(edges, length_field)
-                atts_copy = copy_attributes(attributes)
+                atts_copy = get_attributes_copy(attributes, copy_on_write)
                 edge = Edge(start_node=u, end_node=v, key=key, attributes=atts_copy)
                 node_edges.append(edge)
             else:
                 # get all edges between the nodes, ignoring the length_field
                 for key, attributes in edges.items():
-                    atts_copy = copy_attributes(attributes)
+                    atts_copy = get_attributes_copy(attributes, copy_on_write)
                     node_edges.append(
                         Edge(start_node=u, end_node=v, key=key, attributes=atts_copy)
                     )
@@ -443,6 +681,37 @@ def get_edges_from_nodes(
         return edge_list
 
 
+def get_path_edges(
+    net: networkx.MultiGraph | networkx.MultiDiGraph,
+    path: Iterable[tuple],
+    with_direction_flag: bool = False,
+    copy_on_write: bool = False,
+) -> list[Edge]:
+    """
+    From a list of (start_node, end_node, key) tuples in the order they are traversed,
+    get the Edges from the network. Unlike ``get_edges_from_nodes`` there is no need
+    to choose between edges connecting the same nodes.
+    Set ``copy_on_write`` to return the attributes of each edge as a
+    :class:`wayfarer.attributes.AttributeProxy` rather than a copy.
+
+    >>> net = networkx.MultiGraph()
+    >>> net.add_edges_from([(0, 1, "A", {'val': 'foo'}), (0, 1, "B", {'val': 'bar'})])
+    ['A', 'B']
+    >>> get_path_edges(net, [(1, 0, "B")])
+    [Edge(start_node=1, end_node=0, key='B', attributes={'val': 'bar'})]
+    """
+    edge_list = []
+
+    for u, v, key in path:
+        atts_copy = get_attributes_copy(net[u][v][key], copy_on_write)
+        edge = Edge(start_node=u, end_node=v, key=key, attributes=atts_copy)
+        if with_direction_flag:
+            add_direction_flag(**edge._asdict())  # unpack namedtuple to **kwargs
+        edge_list.append(edge)
+
+    return edge_list
+
+
 def get_shortest_edge(edges: dict, length_field: str | None = LENGTH_FIELD):
     """
     From a dictionary of edges, get the shortest edge
@@ -0,0 +1,499 @@
+"""
+This module contains functions to create and query a contraction hierarchy
+
+A contraction hierarchy is created once for a static network, by "contracting" nodes one by one
+in order of importance and adding shortcut edges so that shortest path distances are preserved.
+Queries then run a bidirectional Dijkstra search that only follows edges to more important nodes,
+settling a tiny fraction of the nodes of a standard Dijkstra search.
+
+Shortcuts store the two edges they replace, so paths are unpacked back to the original
+edge keys of the network.
+"""
+
+from __future__ import annotations
+import heapq
+import logging
+from array import array
+import networkx
+from networkx import NetworkXNoPath
+from wayfarer import LENGTH_FIELD
+from wayfarer.compiled import CompiledNetwork, compile_network
+
+log = logging.getLogger("wayfarer")
+
+# the value used in the arc arrays to show there is no edge or child arc
+NO_ARC = -1
+
+
+class ContractionHierarchy:
+    """
+    A contraction hierarchy for a compiled network. Create using
+    :func:`build_contraction_hierarchy` rather than directly.
+
+    Args:
+        compiled: The compiled network the hierarchy was created from
+        rank: The contraction order of each node index
+        arcs: Arrays of (sources, targets, weights, edges, first_child, second_child) for all
+              original and shortcut arcs. Original arcs have the index of their edge key, and shortcut arcs
+              the ids of the two arcs they replace
+        upward: CSR arrays (offsets, arc ids) of arcs leading to a higher ranked node
+        downward: CSR arrays (offsets, arc ids) of arcs arriving from a higher ranked node
+    """
+
+    def __init__(
+        self,
+        compiled: CompiledNetwork,
+        rank,
+        arcs: tuple,
+        upward: tuple,
+        downward: tuple,
+    ):
+        self.compiled = compiled
+        self.rank = memoryview(rank).toreadonly()
+        (
+            self.arc_sources,
+            self.arc_targets,
+            self.arc_weights,
+            self.arc_edges,
+            self.arc_first,
+            self.arc_second,
+        ) = (memoryview(a).toreadonly() for a in arcs)
+        self.upward = tuple(memoryview(a).toreadonly() for a in upward)
+        self.downward = tuple(memoryview(a).toreadonly() for a in downward)
+
+    @property
+    def shortcut_count(self) -> int:
+        """
+        The number of shortcut arcs added to the network
+        """
+        return sum(1 for e in self.arc_edges if e == NO_ARC)
+
+    def __repr__(self) -> str:
+        return "{}(nodes={}, arcs={}, shortcuts={})".format(
+            type(self).__name__,
+            len(self.rank),
+            len(self.arc_weights),
+            self.shortcut_count,
+        )
+
+
+class _Builder:
+    """
+    Holds the state of the remaining (uncontracted) network while the
+    hierarchy is created
+    """
+
+    def __init__(self, compiled: CompiledNetwork, max_settled: int):
+        self.max_settled = max_settled
+        self.sources = []  # type: list[int]
+        self.targets = []  # type: list[int]
+        self.weights = []  # type: list[float]
+        self.edges = []  # type: list[int]
+        self.first = []  # type: list[int]
+        self.second = []  # type: list[int]
+
+        node_count = len(compiled)
+        # adjacency of the remaining network, with the arc id between each node pair
+        self.out_arcs = [dict() for _ in range(node_count)]  # type: list[dict]
+        self.in_arcs = [dict() for _ in range(node_count)]  # type: list[dict]
+
+        offsets, targets, edges, weights = (
+            compiled.offsets,
+            compiled.targets,
+            compiled.edges,
+            compiled.weights,
+        )
+
+        for u in range(node_count):
+            for slot in range(offsets[u], offsets[u + 1]):
+                v = targets[slot]
+                if u != v:  # self-loops are never part of a shortest path
+                    self.add_arc(u, v, weights[slot], edges[slot], NO_ARC, NO_ARC)
+
+    def add_arc(
+        self, u: int, v: int, weight: float, edge: int, first: int, second: int
+    ) -> None:
+        """
+        Add an arc between two nodes, unless there is already a shorter arc between them.
+        Only the shortest of any parallel edges is needed for routing.
+        """
+        existing = self.out_arcs[u].get(v)
+        if existing is not None and self.weights[existing] <= weight:
+            return
+
+        arc_id = len(self.weights)
+        self.sources.append(u)
+        self.targets.append(v)
+        self.weights.append(weight)
+        self.edges.append(edge)
+        self.first.append(first)
+        self.second.append(second)
+
+        self.out_arcs[u][v] = arc_id
+        self.in_arcs[v][u] = arc_id
+
+    def witness_search(self, source: int, excluded: int, limit: float) -> dict:
+        """
+        Run a bounded Dijkstra search from a node, avoiding the node being contracted,
+        to find any paths that are at least as short as a potential shortcut
+        """
+        dist = {source: 0.0}
+        settled = 0
+        heap = [(0.0, source)]
+        done = set()
+
+        while heap and settled < self.max_settled:
+            d, u = heapq.heappop(heap)
+            if u in done:
+                continue
+            if d > limit:
+                break
+            done.add(u)
+            settled += 1
+
+            for v, arc_id in self.out_arcs[u].items():
+                if v == excluded:
+                    continue
+                nd = d + self.weights[arc_id]
+                if nd < dist.get(v, float("inf")):
+                    dist[v] = nd
+                    heapq.heappush(heap, (nd, v))
+
+        return dist
+
+    def get_shortcuts(self, v: int) -> list[tuple[int, int, float, int, int]]:
+        """
+        Get the shortcuts required if a node is contracted
+        """
+        shortcuts = []
+        out_arcs = self.out_arcs[v]
+
+        for u, in_arc in self.in_arcs[v].items():
+            out_weights = [self.weights[a] for w, a in out_arcs.items() if w != u]
+            if not out_weights:
+                continue
+
+            in_weight = self.weights[in_arc]
+            dist = self.witness_search(u, v, in_weight + max(out_weights))
+
+            for w, out_arc in out_arcs.items():
+                if w == u:
+                    continue
+                weight = in_weight + self.weights[out_arc]
+                if dist.get(w, float("inf")) <= weight:
+                    continue  # a witness path was found so no shortcut is needed
+                shortcuts.append((u, w, weight, in_arc, out_arc))
+
+        return shortcuts
+
+    def get_priority(self, v: int, contracted_neighbours: list[int]) -> int:
+        """
+        Get the priority of a node, based on the edge difference
+        (shortcuts added minus arcs removed) and the number of neighbours already contracted.
+        Lower priority nodes are contracted first.
+        """
+        shortcut_count = len(self.get_shortcuts(v))
+        removed_count = len(self.in_arcs[v]) + len(self.out_arcs[v])
+        return shortcut_count - removed_count + contracted_neighbours[v]
+
+    def contract(self, v: int) -> set[int]:
+        """
+        Contract a node, adding any required shortcuts, and remove it from the
+        remaining network. The neighbouring nodes are returned.
+        """
+        for u, w, weight, in_arc, out_arc in self.get_shortcuts(v):
+            self.add_arc(u, w, weight, NO_ARC, in_arc, out_arc)
+
+        neighbours = set(self.in_arcs[v]) | set(self.out_arcs[v])
+
+        for u in self.in_arcs[v]:
+            del self.out_arcs[u][v]
+        for w in self.out_arcs[v]:
+            del self.in_arcs[w][v]
+
+        self.in_arcs[v] = {}
+        self.out_arcs[v] = {}
+
+        return neighbours
+
+
+def _build_upward_csr(
+    node_count: int, nodes: list[int], arc_ids: list[int]
+) -> tuple[array, array]:
+    """
+    Create CSR arrays of arc ids, grouped by node
+    """
+    counts = [0] * (node_count + 1)
+    for n in nodes:
+        counts[n + 1] += 1
+    for i in range(node_count):
+        counts[i + 1] += counts[i]
+
+    position = list(counts[:-1])
+    slots = array("q", bytes(8 * len(arc_ids)))
+
+    for n, arc_id in zip(nodes, arc_ids):
+        slots[position[n]] = arc_id
+        position[n] += 1
+
+    return array("q", counts), slots
+
+
+def build_contraction_hierarchy(
+    net: networkx.MultiGraph | networkx.MultiDiGraph,
+    weight: str | None = LENGTH_FIELD,
+    compiled: CompiledNetwork | None = None,
+    max_settled: int = 100,
+) -> ContractionHierarchy:
+    """
+    Create a contraction hierarchy for a network. This is a one-off preprocessing step
+    for static networks - if the network is modified the hierarchy should be created again.
+
+    Args:
+        net: A network
+        weight: The edge attribute to use as the cost of an edge
+        compiled: An existing compiled network for ``net``. If not supplied the network is compiled
+        max_settled: The maximum number of nodes settled in each witness search. Lower values
+                     create the hierarchy faster but add more shortcuts
+    Returns:
+        The contraction hierarchy
+
+    >>> net = networkx.MultiGraph()
+    >>> net.add_edges_from([(0, 1, "A", {"LEN_": 10}), (1, 2, "B", {"LEN_": 10})])
+    ['A', 'B']
+    >>> build_contraction_hierarchy(net)
+    ContractionHierarchy(nodes=3, arcs=4, shortcuts=0)
+    """
+
+    if compiled is None:
+        compiled = compile_network(net, weight)
+    elif compiled.weight != weight:
+        raise ValueError(
+            f"The network was compiled using the weight {compiled.weight} rather than {weight}"
+        )
+
+    node_count = len(compiled)
+    builder = _Builder(compiled, max_settled)
+    contracted_neighbours = [0] * node_count
+
+    heap = [
+        (builder.get_priority(v, contracted_neighbours), v) for v in range(node_count)
+    ]
+    heapq.heapify(heap)
+
+    rank = array("q", bytes(8 * node_count))
+    contracted = [False] * node_count
+    order = 0
+
+    while heap:
+        _, v = heapq.heappop(heap)
+        if contracted[v]:
+            continue
+
+        # lazy updates - the priority may have changed since the node was added
+        priority = builder.get_priority(v, contracted_neighbours)
+        if heap and priority > heap[0][0]:
+            heapq.heappush(heap, (priority, v))
+            continue
+
+        for n in builder.contract(v):
+            contracted_neighbours[n] += 1
+
+        contracted[v] = True
+        rank[v] = order
+        order += 1
+
+    log.debug(
+        "Created contraction hierarchy with %i arcs for %i nodes",
+        len(builder.weights),
+        node_count,
+    )
+
+    # split the arcs into those leading up the hierarchy, and those
+    # coming down the hierarchy (searched in reverse from the target)
+    up_nodes, up_arcs, down_nodes, down_arcs = [], [], [], []
+
+    for arc_id, (u, v) in enumerate(zip(builder.sources, builder.targets)):
+        if rank[u] < rank[v]:
+            up_nodes.append(u)
+            up_arcs.append(arc_id)
+        else:
+            down_nodes.append(v)
+            down_arcs.append(arc_id)
+
+    arcs = (
+        array("q", builder.sources),
+        array("q", builder.targets),
+        array("d", builder.weights),
+        array("q", builder.edges),
+        array("q", builder.first),
+        array("q", builder.second),
+    )
+
+    return ContractionHierarchy(
+        compiled,
+        rank,
+        arcs,
+        _build_upward_csr(node_count, up_nodes, up_arcs),
+        _build_upward_csr(node_count, down_nodes, down_arcs),
+    )
+
+
+def _unpack_arc(hierarchy: ContractionHierarchy, arc_id: int) -> list[int]:
+    """
+    Unpack an arc into the list of original arcs it represents
+    """
+    original_arcs = []
+    stack = [arc_id]
+
+    while stack:
+        a = stack.pop()
+        if hierarchy.arc_edges[a] == NO_ARC:
+            # add the second arc to the stack first, so the first arc is processed first
+            stack.append(hierarchy.arc_second[a])
+            stack.append(hierarchy.arc_first[a])
+        else:
+            original_arcs.append(a)
+
+    return original_arcs
+
+
+def _query(hierarchy: ContractionHierarchy, source: int, target: int) -> list[int]:
+    """
+    Run a bidirectional search on the hierarchy, returning the list of
+    original arcs from the source to the target
+    """
+    if source == target:
+        return []
+
+    searches = (hierarchy.upward, hierarchy.downward)
+    next_nodes = (hierarchy.arc_targets, hierarchy.arc_sources)
+    weights = hierarchy.arc_weights
+
+    dists = ({source: 0.0}, {target: 0.0})  # type: tuple[dict, dict]
+    preds = ({source: NO_ARC}, {target: NO_ARC})  # type: tuple[dict, dict]
+    heaps = ([(0.0, source)], [(0.0, target)])
+    settled = (set(), set())  # type: tuple[set, set]
+
+    best = float("inf")
+    meeting_node = None
+
+    while heaps[0] or heaps[1]:
+        for direction in (0, 1):
+            heap = heaps[direction]
+            if not heap:
+                continue
+            if heap[0][0] >= best:
+                # this search cannot find a shorter path
+                heap.clear()
+                continue
+
+            d, u = heapq.heappop(heap)
+            if u in settled[direction]:
+                continue
+            settled[direction].add(u)
+
+            other_dist = dists[1 - direction]
+            if u in other_dist and d + other_dist[u] < best:
+                best = d + other_dist[u]
+                meeting_node = u
+
+            offsets, slots = searches[direction]
+            dist, pred, arc_nodes = (
+                dists[direction],
+                preds[direction],
+                next_nodes[direction],
+            )
+
+            for slot in range(offsets[u], offsets[u + 1]):
+                arc_id = slots[slot]
+                v = arc_nodes[arc_id]
+                nd = d + weights[arc_id]
+                if nd < dist.get(v, float("inf")):
+                    dist[v] = nd
+                    pred[v] = arc_id
+                    heapq.heappush(heap, (nd, v))
+
+    if meeting_node is None:
+        raise NetworkXNoPath("No path found in the contraction hierarchy")
+
+    path_arcs = []
+
+    node = meeting_node
+    while preds[0][node] != NO_ARC:
+        arc_id = preds[0][node]
+        path_arcs.append(arc_id)
+        node = hierarchy.arc_sources[arc_id]
+    path_arcs.reverse()
+
+    node = meeting_node
+    while preds[1][node] != NO_ARC:
+        arc_id = preds[1][node]
+        path_arcs.append(arc_id)
+        node = hierarchy.arc_targets[arc_id]
+
+    original_arcs = []
+    for arc_id in path_arcs:
+        original_arcs.extend(_unpack_arc(hierarchy, arc_id))
+
+    return original_arcs
+
+
+def shortest_path_edges(
+    hierarchy: ContractionHierarchy, source: int | str, target: int | str
+) -> list[tuple[int | str, int | str, int | str]]:
+    """
+    Solve the shortest path between two nodes using a contraction hierarchy,
+    returning the original edges in the order they are traversed
+
+    Args:
+        hierarchy: The contraction hierarchy
+        source: The id of the start node
+        target: The id of the end node
+    Returns:
+        A list of (start_node, end_node, key) tuples in the direction of travel
+
+    >>> net = networkx.MultiGraph()
+    >>> net.add_edges_from([(0, 1, "A", {"LEN_": 10}), (2, 1, "B", {"LEN_": 10}), (0, 2, "C", {"LEN_": 50})])
+    ['A', 'B', 'C']
+    >>> ch = build_contraction_hierarchy(net)
+    >>> shortest_path_edges(ch, 0, 2)
+    [(0, 1, 'A'), (1, 2, 'B')]
+    """
+    compiled = hierarchy.compiled
+    source_index = compiled.get_node_index(source)
+    target_index = compiled.get_node_index(target)
+
+    try:
+        arcs = _query(hierarchy, source_index, target_index)
+    except NetworkXNoPath:
+        raise NetworkXNoPath(f"Node {target} not reachable from {source}")
+
+    nodes, keys = compiled.nodes, compiled.keys
+
+    return [
+        (
+            nodes[hierarchy.arc_sources[a]],
+            nodes[hierarchy.arc_targets[a]],
+            keys[hierarchy.arc_edges[a]],
+        )
+        for a in arcs
+    ]
+
+
+def shortest_path(
+    hierarchy: ContractionHierarchy, source: int | str, target: int | str
+) -> list[int | str]:
+    """
+    Solve the shortest path between two nodes using a contraction hierarchy,
+    returning the list of nodes in the same form as ``networkx.shortest_path``
+
+    Args:
+        hierarchy: The contraction hierarchy
+        source: The id of the start node
+        target: The id of the end node
+    Returns:
+        A list of node ids from the source to the target
+    """
+    edges = shortest_path_edges(hierarchy, source, target)
+    return [source] + [v for _, v, _ in edges]
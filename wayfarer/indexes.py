@@ -0,0 +1,457 @@
+"""
+This module contains secondary indexes of edge attributes, used to find edges by the value
+of an attribute without checking every edge in the network, for example all edges with a road class
+or river name. A :class:`HashIndex` finds edges with a value equal to a query value, and a
+:class:`SortedIndex` also finds edges with values within a range.
+
+An index created with :func:`create_attribute_index` is registered on the network alongside any
+spatial index, and updated when edges are added or removed using :func:`wayfarer.functions.add_edge`
+and :func:`wayfarer.functions.remove_edge`, for example when edges are split using :mod:`wayfarer.splitter`.
+Registered indexes are used automatically by :func:`wayfarer.functions.get_edges_by_attribute`
+and :func:`wayfarer.functions.get_edges_by_attribute_range`. Changes to the attributes of an edge
+already in the network are not tracked, so the edge should be removed and added again.
+
+As with :class:`wayfarer.spatial.SpatialIndex`, edges added or removed are recorded as changes
+alongside the index, which is rebuilt when the number of changes becomes large. An overlay created
+with :func:`wayfarer.overlay.create_overlay` gets its own copy of the index, which shares the
+unchanged index with the base network.
+"""
+
+from __future__ import annotations
+import logging
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable
+import networkx
+from wayfarer import Edge
+
+log = logging.getLogger("wayfarer")
+
+# an index is rebuilt when there are more changes than this, or a tenth
+# of the number of edges in the index
+MIN_REBUILD_CHANGES = 64
+
+# used for edges without the attribute, as attribute values can be None
+_MISSING = object()
+
+
+class _SortedList:
+    """
+    Parallel lists of values and edge keys, ordered by value
+    """
+
+    __slots__ = ("values", "keys")
+
+    def __init__(self, items: list[tuple] | None = None):
+        # sort on the values only, so keys of different types can be stored
+        items = sorted(items or [], key=lambda item: item[0])
+        self.values = [value for value, _ in items]
+        self.keys = [key for _, key in items]
+
+    def copy(self) -> _SortedList:
+        sorted_list = _SortedList()
+        sorted_list.values = list(self.values)
+        sorted_list.keys = list(self.keys)
+        return sorted_list
+
+    def insert(self, value, key) -> None:
+        i = bisect_right(self.values, value)
+        self.values.insert(i, value)
+        self.keys.insert(i, key)
+
+    def remove(self, value, key) -> None:
+        lo = bisect_left(self.values, value)
+        hi = bisect_right(self.values, value, lo)
+        i = self.keys.index(key, lo, hi)
+        del self.values[i]
+        del self.keys[i]
+
+    def get_keys(self, min_value=None, max_value=None) -> list:
+        lo = 0 if min_value is None else bisect_left(self.values, min_value)
+        hi = (
+            len(self.values)
+            if max_value is None
+            else bisect_right(self.values, max_value)
+        )
+        return self.keys[lo:hi]
+
+
+class AttributeIndex(ABC):
+    """
+    The base class of the attribute indexes. Indexes contain the keys and nodes of the edges
+    with a value for the attribute. Create using :func:`create_attribute_index` rather than directly.
+    """
+
+    def __init__(
+        self,
+        attribute_field: str,
+        net: networkx.MultiGraph | networkx.MultiDiGraph | None = None,
+    ):
+
+        self.attribute_field = attribute_field
+
+        # the start node, end node, and attribute value of each edge
+        nodes = {}
+        if net is not None:
+            for u, v, key, value in net.edges(
+                keys=True, data=attribute_field, default=_MISSING
+            ):
+                if self._can_index(value):
+                    nodes[key] = (u, v, value)
+
+        self._set_items(nodes)
+
+    @abstractmethod
+    def _can_index(self, value) -> bool:
+        """
+        Return ``True`` if an attribute value can be stored in the index
+        """
+
+    def _set_items(self, nodes: dict) -> None:
+
+        # the base index is shared with any copies, so is never modified
+        self._nodes = nodes
+        self._create_base_index()
+
+        # edges changed since the base index was created
+        self._added = {}  # type: dict
+        self._removed = set()  # type: set
+        self._create_added_index()
+
+    @abstractmethod
+    def _create_base_index(self) -> None:
+        """
+        Create the index of the edges in ``_nodes``
+        """
+
+    @abstractmethod
+    def _create_added_index(self) -> None:
+        """
+        Create an empty index of the edges added since the base index was created
+        """
+
+    def __len__(self) -> int:
+        return len(self._nodes) - len(self._removed) + len(self._added)
+
+    def copy(self) -> AttributeIndex:
+        """
+        Create a copy of the index, which shares the base index with the
+        original index but records its own changes
+        """
+
+        index = self.__class__.__new__(self.__class__)
+        index.__dict__.update(self.__dict__)
+        index._added = dict(self._added)
+        index._removed = set(self._removed)
+        index._copy_added_index()
+        return index
+
+    @abstractmethod
+    def _copy_added_index(self) -> None:
+        """
+        Copy the index of the added edges, so changes to a copy of the index are not shared
+        """
+
+    def check_edges(self, edges: Iterable[Edge]) -> None:
+        """
+        Check that edges can be added to the index, so errors are raised
+        before a network is modified. Edges without a value for the attribute are ignored
+
+        Args:
+            edges: The edges to check
+        """
+
+        values = [edge.attributes.get(self.attribute_field, _MISSING) for edge in edges]
+        self._check_values([value for value in values if self._can_index(value)])
+
+    @abstractmethod
+    def _check_values(self, values: list) -> None:
+        """
+        Raise an error if any of the attribute values cannot be added to the index
+        """
+
+    def add_edge(self, edge: Edge) -> None:
+        """
+        Add an edge to the index. Edges without a value for the attribute are ignored
+
+        Args:
+            edge: The edge to add
+        """
+
+        self.check_edges([edge])
+
+        # replace any existing edge with the same key
+        self.remove_edge(edge)
+
+        value = edge.attributes.get(self.attribute_field, _MISSING)
+        if self._can_index(value):
+            self._add_to_index(value, edge.key)
+            self._added[edge.key] = (edge.start_node, edge.end_node, value)
+            self._check_rebuild()
+
+    def remove_edge(self, edge: Edge) -> None:
+        """
+        Remove an edge from the index
+
+        Args:
+            edge: The edge to remove
+        """
+
+        added = self._added.pop(edge.key, None)
+        if added is not None:
+            self._remove_from_index(added[2], edge.key)
+        elif edge.key in self._nodes and edge.key not in self._removed:
+            self._removed.add(edge.key)
+            self._check_rebuild()
+
+    def _check_rebuild(self) -> None:
+
+        if len(self._added) + len(self._removed) > max(
+            MIN_REBUILD_CHANGES, len(self._nodes) // 10
+        ):
+            self._rebuild()
+
+    @abstractmethod
+    def _add_to_index(self, value, key) -> None:
+        """
+        Add the key of an edge to the index of added edges
+        """
+
+    @abstractmethod
+    def _remove_from_index(self, value, key) -> None:
+        """
+        Remove the key of an edge from the index of added edges
+        """
+
+    def _rebuild(self) -> None:
+
+        log.debug(f"Rebuilding the index of {self.attribute_field}")
+        removed = self._removed
+        nodes = {k: v for k, v in self._nodes.items() if k not in removed}
+        nodes.update(self._added)
+        self._set_items(nodes)
+
+    def _get_edges(self, base_keys: list, added_keys) -> list[tuple]:
+
+        removed = self._removed
+        base_nodes = self._nodes
+        added_nodes = self._added
+
+        edges = []
+        for key in base_keys:
+            if key not in removed:
+                u, v, _ = base_nodes[key]
+                edges.append((u, v, key))
+
+        for key in added_keys:
+            u, v, _ = added_nodes[key]
+            edges.append((u, v, key))
+
+        return edges
+
+
+class HashIndex(AttributeIndex):
+    """
+    An index of the edges with each value of an attribute. Values must be hashable,
+    and edges with unhashable values are not indexed
+
+    >>> net = networkx.MultiGraph()
+    >>> net.add_edges_from([(0, 1, "A", {"TYPE": "road"}), (1, 2, "B", {"TYPE": "path"})])
+    ['A', 'B']
+    >>> index = HashIndex("TYPE", net)
+    >>> index.get_edges("road")
+    [(0, 1, 'A')]
+    """
+
+    def _can_index(self, value) -> bool:
+        if value is _MISSING:
+            return False
+        try:
+            hash(value)
+        except TypeError:
+            return False
+        return True
+
+    def _create_base_index(self) -> None:
+        keys_by_value = {}  # type: dict
+        for key, (_, _, value) in self._nodes.items():
+            keys_by_value.setdefault(value, []).append(key)
+        self._keys_by_value = keys_by_value
+
+    def _create_added_index(self) -> None:
+        self._added_by_value = {}  # type: dict
+
+    def _check_values(self, values: list) -> None:
+        # any hashable value can be added
+        pass
+
+    def _copy_added_index(self) -> None:
+        self._added_by_value = {
+            value: dict(keys) for value, keys in self._added_by_value.items()
+        }
+
+    def _add_to_index(self, value, key) -> None:
+        self._added_by_value.setdefault(value, {})[key] = None
+
+    def _remove_from_index(self, value, key) -> None:
+        keys = self._added_by_value[value]
+        del keys[key]
+        if not keys:
+            del self._added_by_value[value]
+
+    def get_edges(self, value) -> list[tuple]:
+        """
+        Get the edges with an attribute value
+
+        Args:
+            value: The attribute value
+        Returns:
+            A list of (start_node, end_node, key) tuples
+        """
+
+        return self._get_edges(
+            self._keys_by_value.get(value, []), self._added_by_value.get(value, {})
+        )
+
+
+class SortedIndex(AttributeIndex):
+    """
+    An index of the edges ordered by the value of an attribute, used to find edges
+    with values within a range. All values must be comparable with each other, and edges with
+    a value of ``None`` are not indexed. A ``TypeError`` is raised when adding an edge with
+    a value that cannot be compared
+
+    >>> net = networkx.MultiGraph()
+    >>> net.add_edges_from([(0, 1, "A", {"SPEED": 50}), (1, 2, "B", {"SPEED": 80})])
+    ['A', 'B']
+    >>> index = SortedIndex("SPEED", net)
+    >>> index.get_edges(min_value=60)
+    [(1, 2, 'B')]
+    """
+
+    def _can_index(self, value) -> bool:
+        return value is not _MISSING and value is not None
+
+    def _create_base_index(self) -> None:
+        try:
+            self._sorted = _SortedList(
+                [(value, key) for key, (_, _, value) in self._nodes.items()]
+            )
+        except TypeError as ex:
+            raise TypeError(
+                f"The values of {self.attribute_field} cannot be compared: {ex}"
+            ) from ex
+
+    def _create_added_index(self) -> None:
+        self._added_sorted = _SortedList()
+
+    def _check_values(self, values: list) -> None:
+        if not values:
+            return
+        try:
+            # values must be comparable with each other and with the values
+            # already in the index
+            values = sorted(values)
+            for sorted_list in (self._sorted, self._added_sorted):
+                bisect_right(sorted_list.values, values[0])
+                bisect_right(sorted_list.values, values[-1])
+        except TypeError as ex:
+            raise TypeError(
+                f"The values of {self.attribute_field} cannot be compared: {ex}"
+            ) from ex
+
+    def _copy_added_index(self) -> None:
+        self._added_sorted = self._added_sorted.copy()
+
+    def _add_to_index(self, value, key) -> None:
+        self._added_sorted.insert(value, key)
+
+    def _remove_from_index(self, value, key) -> None:
+        self._added_sorted.remove(value, key)
+
+    def get_edges(self, min_value=None, max_value=None) -> list[tuple]:
+        """
+        Get the edges with an attribute value between a minimum and maximum value,
+        including edges with values equal to the minimum or maximum. Edges are returned
+        ordered by value, with any edges added since the index was created last
+
+        Args:
+            min_value: The minimum value. If ``None`` there is no minimum
+            max_value: The maximum value. If ``None`` there is no maximum
+        Returns:
+            A list of (start_node, end_node, key) tuples
+        """
+
+        return self._get_edges(
+            self._sorted.get_keys(min_value, max_value),
+            self._added_sorted.get_keys(min_value, max_value),
+        )
+
+
+def create_attribute_index(
+    net: networkx.MultiGraph | networkx.MultiDiGraph,
+    attribute_field: str,
+    ordered: bool = False,
+) -> HashIndex | SortedIndex:
+    """
+    Create an index of an edge attribute, and register it on the network so it is
+    updated as edges are added and removed. If an index of the same type already exists
+    for the attribute it is returned
+
+    Args:
+        net: The network
+        attribute_field: The edge attribute to index
+        ordered: Create a :class:`SortedIndex` which can be used for range queries,
+                 rather than a :class:`HashIndex`
+    Returns:
+        The index
+
+    >>> from wayfarer import functions
+    >>> net = networkx.MultiGraph()
+    >>> index = create_attribute_index(net, "TYPE")
+    >>> edge = functions.add_edge(net, 0, 1, "A", {"TYPE": "road"})
+    >>> index.get_edges("road")
+    [(0, 1, 'A')]
+    """
+
+    index_type = SortedIndex if ordered else HashIndex
+    index = get_attribute_index(net, attribute_field, index_type)
+
+    if index is None:
+        index = index_type(attribute_field, net)
+        net.graph.setdefault("indexes", []).append(index)
+
+    return index
+
+
+def get_attribute_index(
+    net: networkx.MultiGraph | networkx.MultiDiGraph,
+    attribute_field: str,
+    index_type: type[AttributeIndex] = AttributeIndex,
+):
+    """
+    Get an index of an edge attribute registered on a network, if one has been created
+
+    Args:
+        net: The network
+        attribute_field: The edge attribute
+        index_type: The type of index to return. By default any type of attribute index is returned,
+                    with a :class:`HashIndex` used in preference to a :class:`SortedIndex`
+    Returns:
+        The index, or ``None`` if the network has no index of the attribute
+
+    >>> net = networkx.MultiGraph()
+    >>> get_attribute_index(net, "TYPE") is None
+    True
+    """
+
+    indexes = [
+        index
+        for index in net.graph.get("indexes", [])
+        if isinstance(index, index_type) and index.attribute_field == attribute_field
+    ]
+
+    if not indexes:
+        return None
+
+    return next((i for i in indexes if isinstance(i, HashIndex)), indexes[0])
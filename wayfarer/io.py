@@ -38,7 +38,7 @@ def edge_to_feature(edge: Edge):
             edge.attributes[k] = None
 
     return geojson.Feature(
-        id=edge.key, geometry=line.__geo_interface__, properties=edge.attributes
+        id=edge.key, geometry=line.__geo_interface__, properties=dict(edge.attributes)
     )
 
 
@@ -0,0 +1,229 @@
+"""
+This module contains functions to find the parts of a network that can be reached from
+a node within a set of costs, for example to create isochrones of travel time from a point
+
+A single search of the network is run for the largest cost, and the nodes and edges reached are
+then split into a band for each of the requested costs.
+"""
+
+from __future__ import annotations
+import logging
+from collections.abc import Mapping
+from typing import NamedTuple
+import networkx
+from wayfarer import (
+    compiled as compiled_network,
+    columnar,
+    functions,
+    Edge,
+    LENGTH_FIELD,
+    OFFSET_FIELD,
+    GEOMETRY_FIELD,
+    NODEID_FROM_FIELD,
+)
+
+log = logging.getLogger("wayfarer")
+
+
+class Isochrone(NamedTuple):
+    """
+    The parts of a network that can be reached within a cost
+    """
+
+    cutoff: float
+    # the reachable node ids and their cost from the start node
+    nodes: dict
+    # edges that can be fully traversed
+    edges: list[Edge]
+    # edges that can only be partly traversed, with their attributes updated to the reachable part
+    partial_edges: list[Edge]
+
+
+def _merge_intervals(intervals: list[tuple[float, float]]) -> list[tuple[float, float]]:
+    """
+    Merge overlapping intervals
+
+    >>> _merge_intervals([(0.6, 1.0), (0.0, 0.7)])
+    [(0.0, 1.0)]
+    >>> _merge_intervals([(0.0, 0.2), (0.8, 1.0)])
+    [(0.0, 0.2), (0.8, 1.0)]
+    """
+    merged = []  # type: list[tuple[float, float]]
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(end, merged[-1][1]))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _get_edge(net, key, u, v) -> Edge:
+    """
+    Get an edge, with the start and end nodes in the direction of any geometry
+    """
+    atts = net[u][v][key]
+    if not net.is_directed():
+        if "keys" in net.graph:
+            u, v = net.graph["keys"][key]
+        elif atts.get(NODEID_FROM_FIELD) == v:
+            u, v = v, u
+    return Edge(u, v, key, atts)
+
+
+def get_partial_attributes(
+    attributes: Mapping,
+    from_ratio: float,
+    to_ratio: float,
+    geometry_field: str = GEOMETRY_FIELD,
+) -> dict:
+    """
+    Get the attributes for part of an edge, with the part defined as a ratio of
+    the edge length. The length and offset of the part are updated and any geometry
+    is clipped using :func:`wayfarer.linearref.create_line`
+
+    Args:
+        attributes: The attributes of the edge
+        from_ratio: The start of the part of the edge, from 0 to 1
+        to_ratio: The end of the part of the edge, from 0 to 1
+        geometry_field: The attribute containing the edge geometry
+    Returns:
+        A new dictionary of attributes
+
+    >>> get_partial_attributes({"LEN_": 100}, 0.5, 0.75)
+    {'LEN_': 25.0, 'OFFSET': 50.0}
+    """
+
+    atts = functions.copy_attributes(attributes)
+
+    if LENGTH_FIELD in attributes:
+        length = float(attributes[LENGTH_FIELD])
+        atts[LENGTH_FIELD] = length * (to_ratio - from_ratio)
+        atts[OFFSET_FIELD] = length * from_ratio + attributes.get(OFFSET_FIELD, 0)
+
+    if geometry_field in attributes:
+        from shapely.geometry import shape
+        from wayfarer import linearref
+
+        # geometries can be stored as shapely objects or as __geo_interface__ dicts
+        line = shape(attributes[geometry_field])
+        atts[geometry_field] = linearref.create_line(
+            line, line.length * from_ratio, line.length * to_ratio
+        )
+
+    return atts
+
+
+def solve_isochrones(
+    net: networkx.MultiGraph | networkx.MultiDiGraph,
+    start_node: int | str,
+    cutoffs: list[float],
+    weight: str | None = LENGTH_FIELD,
+    compiled: compiled_network.CompiledNetwork | None = None,
+    geometry_field: str = GEOMETRY_FIELD,
+) -> list[Isochrone]:
+    """
+    Find the nodes and edges that can be reached from a start node within each
+    of a list of costs. A single search is run for the largest cost.
+
+    Edges that can only be partly traversed within a cost are returned as partial edges, with
+    their length, offset, and geometry updated to the reachable part using :func:`get_partial_attributes`.
+    For undirected networks both ends of an edge may be reached, in which case an edge can have two partial
+    parts. The attributes of fully traversed edges are those of the network and should not be modified.
+
+    Args:
+        net: The network
+        start_node: The node to start from
+        cutoffs: A list of costs, such as travel times, to create isochrones for
+        weight: The edge attribute to use as the cost of an edge
+        compiled: An optional compiled network. It must have been compiled using the same weight.
+                  If not supplied the network is compiled.
+        geometry_field: The edge attribute containing the edge geometry
+    Returns:
+        A list of isochrones, in the same order as the cutoffs
+
+    >>> net = networkx.MultiGraph()
+    >>> net.add_edges_from([(0, 1, "A", {"LEN_": 10}), (1, 2, "B", {"LEN_": 10})])
+    ['A', 'B']
+    >>> isochrones = solve_isochrones(net, 0, [5, 15])
+    >>> [(iso.cutoff, iso.nodes) for iso in isochrones]
+    [(5, {0: 0.0}), (15, {0: 0.0, 1: 10.0})]
+    >>> [e.key for e in isochrones[1].edges], [e.attributes for e in isochrones[1].partial_edges]
+    (['A'], [{'LEN_': 5.0, 'OFFSET': 0.0}])
+    """
+
+    if compiled is None:
+        compiled = columnar.get_compiled_network(net, weight)
+        if compiled is None:
+            compiled = compiled_network.compile_network(net, weight=weight)
+    elif compiled.weight != weight:
+        raise ValueError(
+            f"The network was compiled using the weight {compiled.weight} rather than {weight}"
+        )
+
+    if not cutoffs:
+        return []
+
+    source_index = compiled.get_node_index(start_node)
+    costs = compiled_network.single_source_dijkstra(
+        compiled, source_index, cutoff=max(cutoffs)
+    )
+
+    # for each edge reached, the start node, end node, cost of the start node and weight
+    reached = {}  # type: dict[int, list[tuple[int, int, float, float]]]
+    offsets, targets, edges, weights = (
+        compiled.offsets,
+        compiled.targets,
+        compiled.edges,
+        compiled.weights,
+    )
+
+    for u, cost in costs.items():
+        for slot in range(offsets[u], offsets[u + 1]):
+            reached.setdefault(edges[slot], []).append(
+                (u, targets[slot], cost, weights[slot])
+            )
+
+    nodes = compiled.nodes
+    isochrones = [Isochrone(c, {}, [], []) for c in cutoffs]
+
+    for i, cost in costs.items():
+        node = nodes[i]
+        for iso in isochrones:
+            if cost <= iso.cutoff:
+                iso.nodes[node] = cost
+
+    for edge_index, traversals in reached.items():
+        u, v = traversals[0][0], traversals[0][1]
+        edge = _get_edge(net, compiled.keys[edge_index], nodes[u], nodes[v])
+
+        for iso in isochrones:
+            intervals = []
+            for u, v, cost, w in traversals:
+                remaining = iso.cutoff - cost
+                if remaining < 0:
+                    continue
+                ratio = 1.0 if w <= remaining else remaining / w
+                if nodes[u] == edge.start_node:
+                    intervals.append((0.0, ratio))
+                else:
+                    intervals.append((1.0 - ratio, 1.0))
+
+            if not intervals:
+                continue
+
+            merged = _merge_intervals(intervals)
+            if merged == [(0.0, 1.0)]:
+                iso.edges.append(edge)
+            else:
+                for from_ratio, to_ratio in merged:
+                    if from_ratio == to_ratio:
+                        # only the node at the end of the edge is reached
+                        continue
+                    atts = get_partial_attributes(
+                        edge.attributes, from_ratio, to_ratio, geometry_field
+                    )
+                    iso.partial_edges.append(
+                        Edge(edge.start_node, edge.end_node, edge.key, atts)
+                    )
+
+    return isochrones
@@ -17,11 +17,17 @@ import sys
 from math import sqrt
 import itertools
 from itertools import islice as slice
+import numpy
+import shapely
 from shapely.geometry import LineString, Point
 
 
 log = logging.getLogger("wayfarer")
 
+# the maximum number of point to segment projections calculated at once
+# when snapping arrays of points, to limit memory use
+MAX_PROJECTIONS = 1000000
+
 
 class IdenticalMeasuresError(Exception):
     """
@@ -67,7 +73,8 @@ def create_line(
 ) -> LineString:
     """
     Create a new line feature based on a start and end measure
-    This function also handles ring LineStrings (where start and end nodes are the same)
+    This function also handles ring LineStrings (where start and end nodes are the same).
+    To create lines between many measures on the same line use :func:`split_line`
 
     Args:
         line: The original LineString
@@ -88,6 +95,11 @@ def create_line(
     check_valid_m(start_m, line.length, tolerance)
     check_valid_m(end_m, line.length, tolerance)
 
+    # measures within the tolerance of the end of the line are moved to the end
+    # before they are compared, as in split_line
+    coords, cumulative = _get_cumulative_lengths(line)
+    start_m, end_m = numpy.clip([start_m, end_m], 0.0, cumulative[-1])
+
     if start_m > end_m:
         raise ValueError(
             f"The start measure {start_m} must be less than the end measure {end_m}"
@@ -98,48 +110,103 @@ def create_line(
             f"The start measure {start_m} cannot be equal to the end measure {end_m}"
         )
 
-    start_pt = None
-    end_pt = None
-    new_coords = []
-    new_line = None
-
-    for p in list(line.coords):
-        # loop through all the coordinates of the original line
-        distance_along = line.project(Point(p))
-
-        if distance_along >= start_m:
-            if start_pt is None:
-                # create the start point
-                start_pt = line.interpolate(start_m)
-                new_coords.append(start_pt.coords[0])
-
-            if distance_along < end_m:
-                # add in the point just after the start point
-                if distance_along != start_m:
-                    # the point is not the start_pt
-                    new_coords.append(p)
-                else:
-                    pass
-                    # this is the same as the start point, unless the original feature
-                    # is a ring, and needs to be closed
-                    # if line.is_ring:
-                    #    new_coords.append(p)
-
-        if distance_along >= end_m:
-            # create the end point, and then exit the loop
-            end_pt = line.interpolate(end_m)
-            new_coords.append(end_pt.coords[0])
-            break
-
-    # add an end point if the feature is a ring, and the to point
-    # has not yet been added
-    if line.is_ring and end_pt is None:
-        end_pt = line.interpolate(end_m)
-        new_coords.append(end_pt.coords[0])
-
-    new_line = LineString(new_coords)
-
-    return new_line
+    return _create_lines(coords, cumulative, numpy.array([start_m, end_m]))[0]
+
+
+def _get_cumulative_lengths(line: LineString) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    Get the coordinates of a line, and the distance along the line of each vertex
+    """
+
+    coords = numpy.asarray(line.coords, dtype=float)
+    segment_lengths = numpy.hypot(*numpy.diff(coords[:, :2], axis=0).T)
+    cumulative = numpy.concatenate(([0.0], numpy.cumsum(segment_lengths)))
+
+    return coords, cumulative
+
+
+def _create_lines(
+    coords: numpy.ndarray, cumulative: numpy.ndarray, bounds: numpy.ndarray
+) -> list[LineString]:
+    """
+    Create a line between each pair of consecutive measures in a single walk along a line.
+    As the measures of the vertices are taken from the cumulative lengths of the segments,
+    the vertices at the start and end of a ring are at different measures
+    """
+
+    segment_lengths = numpy.diff(cumulative)
+
+    # interpolate the points at each measure along the segment containing them,
+    # where any zero length segments are skipped
+    segments = numpy.clip(
+        numpy.searchsorted(cumulative, bounds, side="right") - 1,
+        0,
+        len(segment_lengths) - 1,
+    )
+    starts = cumulative[segments]
+    seg_lengths = segment_lengths[segments]
+    ratios = numpy.divide(
+        bounds - starts,
+        seg_lengths,
+        out=numpy.zeros_like(bounds),
+        where=seg_lengths > 0,
+    )
+    points = (
+        coords[segments] + (coords[segments + 1] - coords[segments]) * ratios[:, None]
+    )
+
+    # the vertices between the measures of each part
+    first_vertices = numpy.searchsorted(cumulative, bounds[:-1], side="right")
+    last_vertices = numpy.searchsorted(cumulative, bounds[1:], side="left")
+
+    lines = []
+    for i, (first, last) in enumerate(zip(first_vertices, last_vertices)):
+        part = numpy.vstack((points[i], coords[first:last], points[i + 1]))
+        lines.append(LineString(part))
+
+    return lines
+
+
+def split_line(
+    line: LineString, measures: list[float], tolerance: float = 0.00001
+) -> list[LineString]:
+    """
+    Split a line into parts at a list of measures, returning a line for each part.
+    All parts are created in a single walk along the line, using the cumulative lengths of its
+    segments calculated once with NumPy. Ring LineStrings are also handled.
+
+    Args:
+        line: The original LineString
+        measures: The measures to split the line at, in increasing order
+        tolerance: The tolerance the m-values can be beyond the length of the line
+    Returns:
+        A list of new lines, one more than the number of measures
+
+    >>> ls = LineString([(0, 0), (0, 100), (100, 100)])
+    >>> split_line(ls, [50, 150])
+    [<LINESTRING (0 0, 0 50)>, <LINESTRING (0 50, 0 100, 50 100)>, <LINESTRING (50 100, 100 100)>]
+    """
+
+    length = line.length
+
+    for m in measures:
+        check_valid_m(m, length, tolerance)
+
+    coords, cumulative = _get_cumulative_lengths(line)
+
+    # the measures of the start and end of each part
+    bounds = numpy.clip(
+        numpy.array([0.0] + [float(m) for m in measures] + [cumulative[-1]]),
+        0.0,
+        cumulative[-1],
+    )
+    steps = numpy.diff(bounds)
+    if (steps < 0).any():
+        raise ValueError(f"The measures {measures} must be in increasing order")
+    if (steps == 0).any():
+        raise IdenticalMeasuresError(f"The measures {measures} cannot be repeated")
+
+    return _create_lines(coords, cumulative, bounds)
 
 
 def find_common_vertices(line1: LineString, line2: LineString) -> list[Point]:
@@ -535,6 +602,164 @@ def get_closest_line(lines: list[LineString], point: Point) -> tuple[int, Point]
     return (code, snapped_point)
 
 
+def get_coordinate_array(points) -> numpy.ndarray:
+    """
+    Convert points to a NumPy array of x and y coordinates. Any z-values are ignored
+
+    Args:
+        points: A sequence of (x, y) coordinates, an array of shape (n, 2), or
+                a sequence of shapely points
+    Returns:
+        A float array of shape (n, 2)
+
+    >>> get_coordinate_array([(0, 1), (2, 3, 4)]).tolist()
+    [[0.0, 1.0], [2.0, 3.0]]
+    >>> get_coordinate_array([Point(0, 1)]).tolist()
+    [[0.0, 1.0]]
+    """
+
+    if len(points) == 0:
+        return numpy.empty((0, 2))
+
+    if isinstance(points, numpy.ndarray) and points.dtype != object:
+        coords = points.astype(float)
+    elif isinstance(points[0], Point):
+        coords = shapely.get_coordinates(numpy.asarray(points, dtype=object))
+    else:
+        # coordinates may be a mix of 2D and 3D tuples
+        coords = numpy.array([(p[0], p[1]) for p in points], dtype=float)
+
+    return coords[:, :2]
+
+
+def get_nearest_vertices(
+    points, line: LineString
+) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    Get the points on the line that are closest to each of the input points. A batch
+    version of :func:`get_nearest_vertex`, where the projections of all points onto all
+    segments of the line are calculated using NumPy arrays
+
+    Args:
+        points: The input points to place along the line. See :func:`get_coordinate_array`
+        line: The input line
+    Returns:
+        A tuple containing an array of the snapped coordinates along the line,
+        and an array of their distances from the input points
+
+    >>> line = LineString([(0, 0), (0, 50), (0, 100)])
+    >>> coords, distances = get_nearest_vertices([(2, 21), (-1, 120)], line)
+    >>> coords.tolist(), distances.tolist()
+    ([[0.0, 21.0], [0.0, 100.0]], [2.0, 20.024984394500787])
+    """
+
+    if line.geom_type != "LineString":
+        raise NotImplementedError(f"Geometry type {line.geom_type} is not valid")
+
+    xy = get_coordinate_array(points)
+    vertices = shapely.get_coordinates(line)
+    starts = vertices[:-1]
+    vectors = vertices[1:] - starts
+    squared_lengths = (vectors**2).sum(axis=1)
+    # duplicate vertices create zero length segments, which snap to their start point
+    divisors = numpy.where(squared_lengths > 0, squared_lengths, 1.0)
+
+    snapped = numpy.empty_like(xy)
+    distances = numpy.empty(len(xy))
+    chunk_size = max(1, MAX_PROJECTIONS // max(1, len(starts)))
+
+    for first in range(0, len(xy), chunk_size):
+        last = first + chunk_size
+        chunk = xy[first:last]
+        offsets = chunk[:, None, :] - starts[None, :, :]
+        # the position of each point along each segment, clamped to the segment ends
+        ratios = numpy.clip((offsets * vectors).sum(axis=2) / divisors, 0.0, 1.0)
+        projections = starts + ratios[:, :, None] * vectors
+        segment_distances = numpy.hypot(
+            chunk[:, None, 0] - projections[:, :, 0],
+            chunk[:, None, 1] - projections[:, :, 1],
+        )
+        # the first of any equally close segments is used
+        nearest = segment_distances.argmin(axis=1)
+        rows = numpy.arange(len(chunk))
+        snapped[first:last] = projections[rows, nearest]
+        distances[first:last] = segment_distances[rows, nearest]
+
+    return snapped, distances
+
+
+def get_measures_on_line(line: LineString, points) -> numpy.ndarray:
+    """
+    Get the measures along a line of a set of points. A batch version of :func:`get_measure_on_line`
+
+    Args:
+        line: The input line
+        points: The points to locate along the line. See :func:`get_coordinate_array`
+    Returns:
+        An array of measures
+
+    >>> line = LineString([(0, 0), (0, 100)])
+    >>> get_measures_on_line(line, [(0, 25), (10, 60)]).tolist()
+    [25.0, 60.0]
+    """
+
+    xy = get_coordinate_array(points)
+    return shapely.line_locate_point(line, shapely.points(xy))
+
+
+def get_closest_lines(
+    lines: list[tuple], points
+) -> tuple[list, numpy.ndarray, numpy.ndarray]:
+    """
+    Get the closest line to each of a set of points. A batch version of :func:`get_closest_line`,
+    where the distances between all points and lines are calculated using shapely array functions.
+    If two lines are equally close to a point, the line with the lowest code is returned
+
+    Args:
+        lines: A list of (code, line) tuples
+        points: The input points. See :func:`get_coordinate_array`
+    Returns:
+        A tuple containing a list of the code of the closest line for each point,
+        an array of the snapped coordinates on those lines, and an array of distances
+        from the input points to the snapped coordinates
+
+    >>> lines = [("A", LineString([(0, 0), (0, 100)])), ("B", LineString([(10, 0), (10, 100)]))]
+    >>> codes, coords, distances = get_closest_lines(lines, [(2, 50), (9, 10)])
+    >>> codes, coords.tolist(), distances.tolist()
+    (['A', 'B'], [[0.0, 50.0], [10.0, 10.0]], [2.0, 1.0])
+    """
+
+    if not lines:
+        raise ValueError("No lines were supplied")
+
+    for _, line in lines:
+        if line.geom_type == "MultiLineString":
+            raise ValueError("MultiLineString comparisons not supported")
+
+    # order the lines by code so the lowest code is used for equal distances
+    try:
+        lines = sorted(lines, key=lambda code_line: code_line[0])
+    except TypeError:
+        pass
+
+    codes = [code for code, _ in lines]
+    geometries = numpy.empty(len(lines), dtype=object)
+    geometries[:] = [line for _, line in lines]
+
+    pts = shapely.points(get_coordinate_array(points))
+    # a matrix of the distance from each point to each line
+    matrix = shapely.distance(pts[:, None], geometries[None, :])
+    closest = matrix.argmin(axis=1) if len(pts) else numpy.empty(0, dtype=int)
+    closest_lines = geometries[closest]
+
+    snapped = shapely.line_interpolate_point(
+        closest_lines, shapely.line_locate_point(closest_lines, pts)
+    )
+    distances = matrix[numpy.arange(len(pts)), closest]
+
+    return [codes[i] for i in closest], shapely.get_coordinates(snapped), distances
+
+
 if __name__ == "__main__":
     import doctest
 
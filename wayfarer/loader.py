@@ -10,13 +10,25 @@ from wayfarer import (
     GEOMETRY_FIELD,
 )
 from wayfarer import functions
+import os
 import pickle
-from typing import Iterable
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import chain, islice
+from typing import Callable, Generator, Iterable, Iterator, Sequence
 from networkx import MultiGraph, MultiDiGraph
 
 
 log = logging.getLogger("wayfarer")
 
+# the default number of records read at once when loading networks in chunks
+DEFAULT_CHUNK_SIZE = 10000
+
+# checksums of reverse lookup dictionaries are kept to 64 bits
+CHECKSUM_MASK = 2**64 - 1
+
 
 class UniqueDict(dict):
     """
@@ -30,6 +42,143 @@ class UniqueDict(dict):
             raise KeyError("The key {} already exists. Keys must be unique".format(key))
 
 
+def get_key_checksum(key, start_node, end_node, directed: bool = False) -> int:
+    """
+    Get the checksum of an entry in a reverse lookup dictionary. For undirected networks
+    the checksum does not depend on the order of the nodes, as the edges of an undirected
+    network can be returned in either order. Checksums use Python's ``hash`` function so
+    can only be compared within a single process
+
+    Args:
+        key: The key of the edge
+        start_node: The start node of the edge
+        end_node: The end node of the edge
+        directed: If ``True`` the order of the nodes is part of the checksum,
+                  as used for the edges of a ``MultiDiGraph``
+    Returns:
+        The checksum of the entry
+
+    >>> get_key_checksum("A", 1, 2) == get_key_checksum("A", 2, 1)
+    True
+    >>> get_key_checksum("A", 0, 1) == get_key_checksum("A", 2, 3)
+    False
+    >>> get_key_checksum("A", 1, 2, directed=True) == get_key_checksum("A", 2, 1, directed=True)
+    False
+    """
+    nodes = (start_node, end_node) if directed else frozenset((start_node, end_node))
+    return hash((key, nodes)) & CHECKSUM_MASK
+
+
+class KeyIndex(UniqueDict):
+    """
+    A reverse lookup dictionary of edge keys to (start_node, end_node) tuples, which
+    maintains an order-independent checksum of its entries so it can be compared
+    with a network using :func:`wayfarer.validator.valid_reverse_lookup`. All wayfarer
+    functions that add or remove edges update the index. Only the checksum of the index
+    is maintained, so comparing it with a network still reads every edge of the network.
+
+    After calling :meth:`checkpoint` the keys of any entries added or removed are recorded
+    in :attr:`changes`, so only these need to be checked by
+    :func:`wayfarer.validator.reconcile_keys`
+
+    Set ``directed`` to ``True`` for the reverse lookup of a ``MultiDiGraph``, so the
+    order of the nodes of each entry is included in the checksum
+
+    >>> keys = KeyIndex({"A": (0, 1)})
+    >>> keys.checkpoint()
+    >>> keys["B"] = (1, 2)
+    >>> del keys["A"]
+    >>> sorted(keys.changes)
+    ['A', 'B']
+    >>> keys.checksum == get_key_checksum("B", 1, 2)
+    True
+    """
+
+    def __init__(self, *args, directed: bool = False, **kwargs):
+        super().__init__()
+        self.directed = directed
+        self.checksum = 0
+        self.changes = None  # type: set | None
+        self.update(*args, **kwargs)
+
+    def checkpoint(self) -> None:
+        """
+        Start recording the keys of entries added or removed from this point,
+        clearing any previously recorded changes
+        """
+        self.changes = set()
+
+    def _add(self, key, nodes) -> None:
+        checksum = get_key_checksum(key, nodes[0], nodes[1], self.directed)
+        self.checksum = (self.checksum + checksum) & CHECKSUM_MASK
+        if self.changes is not None:
+            self.changes.add(key)
+
+    def _remove(self, key, nodes) -> None:
+        checksum = get_key_checksum(key, nodes[0], nodes[1], self.directed)
+        self.checksum = (self.checksum - checksum) & CHECKSUM_MASK
+        if self.changes is not None:
+            self.changes.add(key)
+
+    def __setitem__(self, key, value):
+        UniqueDict.__setitem__(self, key, value)
+        self._add(key, value)
+
+    def __delitem__(self, key):
+        value = self[key]
+        dict.__delitem__(self, key)
+        self._remove(key, value)
+
+    def update(self, *args, **kwargs):
+        """
+        Add entries to the index. As with :class:`UniqueDict` existing
+        entries are replaced
+        """
+        for key, value in dict(*args, **kwargs).items():
+            if key in self:
+                self._remove(key, dict.__getitem__(self, key))
+            dict.__setitem__(self, key, value)
+            self._add(key, value)
+
+    def __ior__(self, other):  # type: ignore[misc]
+        self.update(other)
+        return self
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key, *args):
+        if key not in self:
+            return dict.pop(self, key, *args)
+        value = self[key]
+        del self[key]
+        return value
+
+    def popitem(self):
+        key, value = dict.popitem(self)
+        self._remove(key, value)
+        return key, value
+
+    def clear(self):
+        if self.changes is not None:
+            self.changes.update(self)
+        dict.clear(self)
+        self.checksum = 0
+
+    def copy(self) -> KeyIndex:
+        return KeyIndex(self, directed=self.directed)
+
+    def __reduce__(self):
+        # checksums are specific to a process so are recalculated when unpickled
+        return (self.__class__, (), {"directed": self.directed, "entries": dict(self)})
+
+    def __setstate__(self, state: dict) -> None:
+        self.directed = state["directed"]
+        self.update(state["entries"])
+
+
 def distance(
     p1: tuple[(int | float), (int | float)], p2: tuple[(int | float), (int | float)]
 ) -> float:
@@ -55,7 +204,9 @@ def distance(
 def save_network_to_file(net: MultiGraph | MultiDiGraph, filename: str) -> None:
     """
     Save a network to a Python pickle file
-    Note these cannot be shared between different versions of Python
+    Note these cannot be shared between different versions of Python.
+    See :func:`wayfarer.columnar.save_network` for a versioned file format
+    that can be loaded using memory-mapping
 
     Args:
         net: The network
@@ -144,7 +295,7 @@ def create_graph(
     )
 
     if use_reverse_lookup:
-        reverse_lookup = UniqueDict()
+        reverse_lookup = KeyIndex(directed=issubclass(graph_type, MultiDiGraph))
         net = graph_type(name=graph_name, keys=reverse_lookup)
     else:
         net = graph_type(name=graph_name)
@@ -208,6 +359,248 @@ def load_network_from_records(
     return net
 
 
+def get_key(rec: dict, key_field: str = EDGE_ID_FIELD, use_integer_keys: bool = True):
+    """
+    Get the unique key of an edge from a ``__geo_interface__`` record
+
+    Args:
+        rec: The record
+        key_field: The property containing the key. If this is ``"id"`` then the ``id`` of the
+                   record is used if available
+        use_integer_keys: Convert string keys to integers
+    Returns:
+        The key
+
+    >>> get_key({"properties": {"EDGE_ID": "12"}})
+    12
+    """
+
+    properties = rec["properties"]
+
+    if key_field == "id" and "id" in rec:
+        key = rec["id"]
+    else:
+        try:
+            key = properties[key_field]
+        except KeyError:
+            log.error("Available properties: {}".format(",".join(properties.keys())))
+            raise
+
+    # keys as integers are faster than strings, so convert if possible
+    if use_integer_keys and isinstance(key, str):
+        if key.isdigit():
+            key = int(key)
+        else:
+            raise ValueError(f"Input string '{key}' is not a valid integer")
+
+    return key
+
+
+def get_node_id(coordinate: tuple | list, rounding: int = 5) -> str:
+    """
+    Create a node id from a coordinate
+
+    If we simply take the coordinates then often these differ due to rounding issues as they
+    are floats e.g. (-9.564484483347517, 52.421103202488965) and (-9.552925853749544, 52.41969110706263)
+    instead convert the coordinates to unique strings, apply rounding, and strip any z-values
+
+    Args:
+        coordinate: The coordinate
+        rounding: The number of decimal places to round the coordinate to
+    Returns:
+        The node id
+
+    >>> get_node_id((-9.564484483347517, 52.421103202488965, 10))
+    '-9.56448|52.4211'
+    """
+
+    return "{}|{}".format(
+        round(coordinate[0], rounding), round(coordinate[1], rounding)
+    )
+
+
+def get_node_key(coordinate: tuple | list, rounding: int = 5) -> tuple[float, float]:
+    """
+    Get the rounded x and y values of a coordinate, used to identify nodes
+    when creating integer node ids with a :class:`NodeInterner`
+
+    Args:
+        coordinate: The coordinate
+        rounding: The number of decimal places to round the coordinate to
+    Returns:
+        The rounded x and y values
+
+    >>> get_node_key((-9.564484483347517, 52.421103202488965, 10))
+    (-9.56448, 52.4211)
+    """
+
+    return (round(coordinate[0], rounding), round(coordinate[1], rounding))
+
+
+class NodeInterner:
+    """
+    Map the rounded start and end coordinates of edges to dense integer node ids,
+    as an alternative to the ``"x|y"`` string node ids created by :func:`get_node_id`.
+    Integer node ids use less memory and are faster to hash when routing.
+
+    The coordinates of each node are stored in a compact array, with the coordinates of node ``i``
+    at positions ``2 * i`` and ``2 * i + 1``, and a dictionary maps coordinates back to node ids.
+    A flag for each node records which of its coordinates were integers, so string ids match those
+    created by :func:`get_node_id`. Networks created with ``intern_nodes=True`` store the interner
+    as ``net.graph["node_interner"]``.
+
+    >>> interner = NodeInterner()
+    >>> interner.get_node((-9.564484483347517, 52.421103202488965))
+    0
+    >>> interner.get_node((1, 2)), interner.get_node((-9.56448, 52.4211))
+    (1, 0)
+    >>> interner.get_coordinates(0)
+    (-9.56448, 52.4211)
+    >>> interner.get_legacy_id(0)
+    '-9.56448|52.4211'
+    >>> interner.get_legacy_id(1)
+    '1|2'
+    >>> interner.get_node_from_legacy_id("1|2")
+    1
+    """
+
+    def __init__(self, rounding: int = 5):
+        self.rounding = rounding
+        self.coordinates = array("d")
+        # for each node, bit 0 is set if the x value was an integer, and bit 1 for the y value
+        self.integer_flags = bytearray()
+        self._nodes = {}  # type: dict[tuple[float, float], int]
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __getstate__(self) -> dict:
+        # the dictionary is recreated from the coordinates when unpickled
+        return {
+            "rounding": self.rounding,
+            "coordinates": self.coordinates,
+            "integer_flags": self.integer_flags,
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        self.rounding = state["rounding"]
+        self.coordinates = state["coordinates"]
+        self.integer_flags = state.get(
+            "integer_flags", bytearray(len(self.coordinates) // 2)
+        )
+        xs = self.coordinates[0::2]
+        ys = self.coordinates[1::2]
+        self._nodes = {node_key: i for i, node_key in enumerate(zip(xs, ys))}
+
+    def intern(self, node_key: tuple[float, float]) -> int:
+        """
+        Get the node id for rounded coordinates, adding a new node if required
+
+        Args:
+            node_key: Rounded x and y values created by :func:`get_node_key`
+        Returns:
+            The node id
+        """
+
+        node = self._nodes.get(node_key)
+        if node is None:
+            node = len(self._nodes)
+            self._nodes[node_key] = node
+            self.coordinates.extend(node_key)
+            x, y = node_key
+            self.integer_flags.append((type(x) is int) | (type(y) is int) << 1)
+        return node
+
+    def get_node(self, coordinate: tuple | list) -> int:
+        """
+        Get the node id for a coordinate, adding a new node if required
+
+        Args:
+            coordinate: The coordinate, which is rounded using the rounding of the interner
+        Returns:
+            The node id
+        """
+
+        return self.intern(get_node_key(coordinate, self.rounding))
+
+    def get_coordinates(self, node: int) -> tuple[float, float]:
+        """
+        Get the coordinates of a node
+
+        Args:
+            node: The node id
+        Returns:
+            The rounded x and y values of the node
+        """
+
+        if not isinstance(node, int) or not 0 <= node < len(self._nodes):
+            raise KeyError(f"The node {node} was not found")
+
+        return (self.coordinates[2 * node], self.coordinates[2 * node + 1])
+
+    def get_legacy_id(self, node: int) -> str:
+        """
+        Get the ``"x|y"`` string id of a node, as created by :func:`get_node_id`. Coordinates
+        that were integers are formatted without a decimal point, for example ``"1|2"``, and
+        whole number floats with a decimal point, for example ``"1.0|2.0"``
+
+        Args:
+            node: The node id
+        Returns:
+            The string id of the node
+        """
+
+        x, y = self.get_coordinates(node)
+        flags = self.integer_flags[node]
+
+        return "{}|{}".format(int(x) if flags & 1 else x, int(y) if flags & 2 else y)
+
+    def get_node_from_legacy_id(self, node_id: str) -> int:
+        """
+        Get the node id of a node from its ``"x|y"`` string id
+
+        Args:
+            node_id: The string id of the node
+        Returns:
+            The node id
+        """
+
+        try:
+            x, y = node_id.split("|")
+            node_key = (float(x), float(y))
+        except ValueError:
+            raise ValueError(f"The node id {node_id} is not in the form x|y")
+
+        try:
+            return self._nodes[node_key]
+        except KeyError:
+            raise KeyError(f"The node {node_id} was not found")
+
+    def intern_edges(self, edges: list[tuple]) -> list[tuple]:
+        """
+        Replace the rounded coordinates used as the start and end nodes of edges created by
+        :func:`create_edge_table` with ``intern_nodes=True`` with node ids
+
+        Args:
+            edges: A list of (start_node, end_node, key, attributes) tuples
+        Returns:
+            A new list of edges
+        """
+
+        intern = self.intern
+        interned_edges = []
+
+        for start_node, end_node, key, attributes in edges:
+            start_node = intern(start_node)
+            end_node = intern(end_node)
+            if NODEID_FROM_FIELD in attributes:
+                attributes[NODEID_FROM_FIELD] = start_node
+                attributes[NODEID_TO_FIELD] = end_node
+            interned_edges.append((start_node, end_node, key, attributes))
+
+        return interned_edges
+
+
 def load_network_from_geometries(
     recs: Iterable,
     use_reverse_lookup: bool = True,
@@ -219,6 +612,8 @@ def load_network_from_geometries(
     length_field: str = LENGTH_FIELD,
     rounding: int = 5,
     use_integer_keys: bool = True,
+    intern_nodes: bool = False,
+    processes: int | None = 1,
 ) -> MultiGraph | MultiDiGraph:
     """
     Create a new networkX graph using a list of recs of type ``__geo_interface__``
@@ -251,13 +646,44 @@ def load_network_from_geometries(
         use_integer_keys: Using Integer keys makes using wayfarer faster. By default keys will be attempted to be
                           converted to integers. Set this to ``False`` to leave keys unconverted (for example when using
                           String keys)
+        intern_nodes: Use integer node ids rather than ``"x|y"`` strings. The coordinates of the nodes
+                      are stored in a :class:`NodeInterner` as ``net.graph["node_interner"]``
+        processes: The number of processes used to create the edges. If more than one, or ``None``
+                   to use a process for each CPU, the network is created using
+                   :func:`load_network_from_geometries_in_chunks`. The properties of the records are
+                   then copied rather than modified, and lengths are summed using NumPy so can differ
+                   by rounding errors
     Returns:
         A new network
     """
 
+    if processes is None or processes > 1:
+        return load_network_from_geometries_in_chunks(
+            recs,
+            use_reverse_lookup=use_reverse_lookup,
+            graph_type=graph_type,
+            skip_errors=skip_errors,
+            strip_properties=strip_properties,
+            keep_geometry=keep_geometry,
+            key_field=key_field,
+            length_field=length_field,
+            rounding=rounding,
+            use_integer_keys=use_integer_keys,
+            processes=processes,
+            intern_nodes=intern_nodes,
+        )
+
     net = create_graph(use_reverse_lookup, graph_type)
     error_count = 0
 
+    get_node: Callable[[tuple | list], int | str]
+    if intern_nodes:
+        interner = NodeInterner(rounding)
+        net.graph["node_interner"] = interner
+        get_node = interner.get_node
+    else:
+        get_node = partial(get_node_id, rounding=rounding)
+
     for r in recs:
 
         # __geo__interface
@@ -282,34 +708,148 @@ def load_network_from_geometries(
         else:
             length = sum([distance(*combo) for combo in functions.pairwise(coords)])
 
-        if key_field == "id" and "id" in r:
-            key = r["id"]
+        key = get_key(r, key_field, use_integer_keys)
+        start_node = get_node(coords[0])
+        end_node = get_node(coords[-1])
+
+        network_attributes = {
+            EDGE_ID_FIELD: key,
+            LENGTH_FIELD: length,
+            NODEID_FROM_FIELD: start_node,
+            NODEID_TO_FIELD: end_node,
+        }
+
+        # only use fields required for routing
+        if strip_properties is True:
+            properties = network_attributes
         else:
-            try:
-                key = properties[key_field]
-            except KeyError:
-                log.error(
-                    "Available properties: {}".format(",".join(properties.keys()))
-                )
-                raise
+            properties.update(network_attributes)
+
+        if keep_geometry:
+            properties[GEOMETRY_FIELD] = geom
+
+        add_edge(net, properties)
+
+    if error_count > 0:
+        log.warning("{} MultiLineString features were ignored".format(error_count))
+
+    return net
+
 
-        # keys as integers are faster than strings, so convert if possible
-        if use_integer_keys and isinstance(key, str):
-            if key.isdigit():
-                key = int(key)
+def get_lengths(coordinate_lists: list) -> list[float]:
+    """
+    Calculate the lengths of a list of lines, using a single NumPy array of the coordinates
+    of all the lines. Any z-values associated with the coordinates are ignored.
+    Requires the NumPy module
+
+    Args:
+        coordinate_lists: A list containing the coordinates of each line
+    Returns:
+        The length of each line
+
+    >>> get_lengths([[(0, 0), (0, 10), (10, 10)], [(0, 0), (3, 4, 1)]])
+    [20.0, 5.0]
+    """
+
+    import numpy
+
+    if not coordinate_lists:
+        return []
+
+    counts = numpy.fromiter(
+        (len(coords) for coords in coordinate_lists), int, len(coordinate_lists)
+    )
+    xy = numpy.fromiter(
+        chain.from_iterable(
+            (c[0], c[1]) for coords in coordinate_lists for c in coords
+        ),
+        float,
+        int(counts.sum()) * 2,
+    ).reshape(-1, 2)
+
+    # the length of the segment starting at each coordinate, with the segments
+    # joining the end of a line to the start of the next line set to 0
+    segment_lengths = numpy.zeros(len(xy))
+    segment_lengths[:-1] = numpy.hypot(*numpy.diff(xy, axis=0).T)
+    ends = numpy.cumsum(counts) - 1
+    segment_lengths[ends] = 0
+
+    starts = ends - counts + 1
+    return numpy.add.reduceat(segment_lengths, starts).tolist()
+
+
+def create_edge_table(
+    recs: Iterable,
+    skip_errors: bool = False,
+    strip_properties: bool = False,
+    keep_geometry: bool = False,
+    key_field: str = EDGE_ID_FIELD,
+    length_field: str = LENGTH_FIELD,
+    rounding: int = 5,
+    use_integer_keys: bool = True,
+    intern_nodes: bool = False,
+) -> tuple[list[tuple], int]:
+    """
+    Create a list of edges from ``__geo_interface__`` records, ready to be added to a
+    network using :func:`add_edges`. Lengths of all the records are calculated at once using
+    :func:`get_lengths`. See :func:`load_network_from_geometries` for details of the arguments.
+    The properties of the records are copied rather than modified.
+
+    If ``intern_nodes`` is ``True`` the nodes of the edges are the rounded coordinates created by
+    :func:`get_node_key`, to be replaced with integer node ids using :meth:`NodeInterner.intern_edges`.
+    This allows edge tables to be created in other processes.
+
+    Unlike the lengths, node ids are created for each record rather than with NumPy. ``numpy.round``
+    rounds some values differently to Python's ``round``, for example ``2.675`` to two decimal places,
+    and converts integer coordinates to floats, so the node ids would no longer match those created
+    by :func:`get_node_id` for the same coordinates.
+
+    Returns:
+        A tuple containing a list of (start_node, end_node, key, attributes) tuples,
+        and the number of records that were skipped
+
+    >>> rec = {"geometry": {"type": "LineString", "coordinates": [(0, 0), (0, 1)]}, "properties": {"EDGE_ID": 1}}
+    >>> create_edge_table([rec])
+    ([('0|0', '0|1', 1, {'EDGE_ID': 1, 'LEN_': 1.0, 'NODEID_FROM': '0|0', 'NODEID_TO': '0|1'})], 0)
+    """
+
+    lines = []
+    error_count = 0
+
+    for r in recs:
+        geom = r["geometry"]
+        if geom["type"] != "LineString":
+            if skip_errors is True:
+                error_count += 1
+                continue
             else:
-                raise ValueError(f"Input string '{key}' is not a valid integer")
+                raise ValueError(
+                    "The geometry type {} is not supported - only LineString can be used".format(
+                        geom["type"]
+                    )
+                )
+        lines.append(r)
 
-        # if we simply take the coordinates then often these differ due to rounding issues as they
-        # are floats e.g. (-9.564484483347517, 52.421103202488965) and (-9.552925853749544, 52.41969110706263)
-        # instead convert the coordinates to unique strings, apply rounding, and strip any z-values
+    # calculate the lengths of any lines without a length property
+    missing_lengths = [r for r in lines if length_field not in r["properties"]]
+    lengths = iter(get_lengths([r["geometry"]["coordinates"] for r in missing_lengths]))
 
-        start_node = "{}|{}".format(
-            round(coords[0][0], rounding), round(coords[0][1], rounding)
-        )
-        end_node = "{}|{}".format(
-            round(coords[-1][0], rounding), round(coords[-1][1], rounding)
-        )
+    edges = []
+    get_node = get_node_key if intern_nodes else get_node_id
+
+    for r in lines:
+        geom = r["geometry"]
+        coords = geom["coordinates"]
+        properties = r["properties"]
+
+        if length_field in properties:
+            length = properties[length_field]
+        else:
+            length = next(lengths)
+
+        key = get_key(r, key_field, use_integer_keys)
+        start_node = get_node(coords[0], rounding)
+        end_node = get_node(coords[-1], rounding)
 
         network_attributes = {
             EDGE_ID_FIELD: key,
@@ -320,16 +860,259 @@ def load_network_from_geometries(
 
         # only use fields required for routing
         if strip_properties is True:
-            properties = network_attributes
+            attributes = network_attributes
         else:
-            properties.update(network_attributes)
+            attributes = dict(properties)
+            attributes.update(network_attributes)
 
         if keep_geometry:
-            properties[GEOMETRY_FIELD] = geom
+            attributes[GEOMETRY_FIELD] = geom
 
-        add_edge(net, properties)
+        edges.append((start_node, end_node, key, attributes))
+
+    return edges, error_count
+
+
+def add_edges(net: MultiGraph | MultiDiGraph, edges: Sequence[tuple]) -> list:
+    """
+    Add a list of edges to a network in a single call, updating any reverse lookup
+    dictionary and registered indexes. If the reverse lookup dictionary is a :class:`UniqueDict`
+    then a ``KeyError`` is raised if any of the keys already exist, and no edges are added.
+    Errors from indexes, such as values that cannot be compared in a
+    :class:`wayfarer.indexes.SortedIndex`, are also raised before any edges are added
+
+    Args:
+        net: A network
+        edges: A list of (start_node, end_node, key, attributes) tuples
+    Returns:
+        The keys of the edges
+
+    >>> net = create_graph()
+    >>> add_edges(net, [(1, 2, "A", {"LEN_": 10}), (2, 3, "B", {"LEN_": 10})])
+    ['A', 'B']
+    >>> net.graph["keys"]
+    {'A': (1, 2), 'B': (2, 3)}
+    """
+
+    # check the edges can be indexed before the network is modified
+    for index in net.graph.get("indexes", []):
+        index.check_edges(wayfarer.Edge(*edge) for edge in edges)
+
+    new_keys = {key: (start_node, end_node) for start_node, end_node, key, _ in edges}
+
+    if "keys" in net.graph:
+        keys = net.graph["keys"]
+        if isinstance(keys, UniqueDict):
+            if len(new_keys) != len(edges) or not keys.keys().isdisjoint(new_keys):
+                # find the first duplicate key
+                seen = set()  # type: set
+                for _, _, key, _ in edges:
+                    if key in keys or key in seen:
+                        raise KeyError(
+                            "The key {} already exists. Keys must be unique".format(key)
+                        )
+                    seen.add(key)
+        # the keys have been checked, and update does not check each key
+        keys.update(new_keys)
+
+    keys_added = net.add_edges_from(edges)
+
+    for index in net.graph.get("indexes", []):
+        for edge in edges:
+            index.add_edge(wayfarer.Edge(*edge))
+
+    return keys_added
+
+
+def remove_edges(net: MultiGraph | MultiDiGraph, edges: Sequence[tuple]) -> None:
+    """
+    Remove a list of edges from a network in a single call, updating any reverse lookup
+    dictionary and registered indexes. The edges are usually :class:`wayfarer.Edge` tuples
+    returned by functions such as :func:`wayfarer.functions.get_edges_by_keys`
+
+    Args:
+        net: A network
+        edges: A list of (start_node, end_node, key, attributes) tuples
+
+    >>> net = create_graph()
+    >>> add_edges(net, [(1, 2, "A", {"LEN_": 10}), (2, 3, "B", {"LEN_": 10})])
+    ['A', 'B']
+    >>> remove_edges(net, [(1, 2, "A", {"LEN_": 10})])
+    >>> net.graph["keys"]
+    {'B': (2, 3)}
+    """
+
+    net.remove_edges_from(
+        [(start_node, end_node, key) for start_node, end_node, key, _ in edges]
+    )
+
+    if "keys" in net.graph:
+        keys = net.graph["keys"]
+        for _, _, key, _ in edges:
+            del keys[key]
+
+    for index in net.graph.get("indexes", []):
+        for edge in edges:
+            index.remove_edge(wayfarer.Edge(*edge))
+
+
+def _iter_chunks(recs: Iterable, chunk_size: int) -> Iterator[list]:
+    """
+    Split an iterable into lists of a fixed size
+    """
+
+    if chunk_size < 1:
+        raise ValueError("The chunk size must be at least 1")
+
+    recs = iter(recs)
+    while True:
+        chunk = list(islice(recs, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _to_record(rec) -> dict:
+    """
+    Copy a ``__geo_interface__`` record to plain dicts, so records from libraries such as
+    Fiona can be sent to other processes
+    """
+
+    geom = rec["geometry"]
+    record = {
+        "geometry": {"type": geom["type"], "coordinates": geom["coordinates"]},
+        "properties": dict(rec["properties"]),
+    }
+    if "id" in rec:
+        record["id"] = rec["id"]
+    return record
+
+
+def load_network_from_geometries_in_chunks(
+    recs: Iterable,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    use_reverse_lookup: bool = True,
+    graph_type: MultiGraph | MultiDiGraph = MultiGraph,
+    skip_errors: bool = False,
+    strip_properties: bool = False,
+    keep_geometry: bool = False,
+    key_field: str = EDGE_ID_FIELD,
+    length_field: str = LENGTH_FIELD,
+    rounding: int = 5,
+    use_integer_keys: bool = True,
+    processes: int | None = 1,
+    intern_nodes: bool = False,
+    compact_attributes: bool = False,
+) -> MultiGraph | MultiDiGraph:
+    """
+    Create a new networkX graph from an iterable of ``__geo_interface__`` records, such as
+    a Fiona collection, reading the records in chunks. Each chunk is converted to edges using
+    :func:`create_edge_table` and added to the network using :func:`add_edges`, so only a few chunks
+    of records are held in memory at once. Requires the NumPy module.
+
+    The edge tables can be created in parallel by a pool of processes. The edge tables are
+    added to the network in the order of the records, so the network and the checks for duplicate
+    keys are the same as when a single process is used.
+
+    The network is the same as the network created by :func:`load_network_from_geometries`,
+    except the properties of the records are copied rather than modified.
+
+    >>> recs = ({"geometry": {"type": "LineString", "coordinates": [(0, i), (0, i + 1)]}, "properties": {"EDGE_ID": i}} for i in range(5))
+    >>> net = load_network_from_geometries_in_chunks(recs, chunk_size=2)
+    >>> str(net)  # doctest: +ELLIPSIS
+    "MultiGraph named 'Wayfarer Generated MultiGraph (version ...)' with 6 nodes and 5 edges"
+
+    Args:
+        recs: An iterable of ``__geo_interface__`` records
+        chunk_size: The number of records to read at once
+        use_reverse_lookup: Create a dictionary as part of the graph that stores unique edge keys for
+                            fast lookups
+        graph_type: The type of network to create
+        processes: The number of processes used to create the edge tables. Set to ``None``
+                   to use a process for each CPU
+        intern_nodes: Use integer node ids rather than ``"x|y"`` strings. Node ids are assigned
+                      in the main process, in the order of the records
+        compact_attributes: Store the attributes of the edges in a compact
+                            :class:`wayfarer.attributes.AttributeStore` rather than in a dictionary
+                            for each edge. Each chunk is compacted as it is added to the network
+    Returns:
+        A new network
+
+    See :func:`load_network_from_geometries` for details of the other arguments.
+    """
+
+    net = create_graph(use_reverse_lookup, graph_type)
+    error_count = 0
+
+    options: dict = dict(
+        skip_errors=skip_errors,
+        strip_properties=strip_properties,
+        keep_geometry=keep_geometry,
+        key_field=key_field,
+        length_field=length_field,
+        rounding=rounding,
+        use_integer_keys=use_integer_keys,
+        intern_nodes=intern_nodes,
+    )
+
+    if intern_nodes:
+        interner = NodeInterner(rounding)
+        net.graph["node_interner"] = interner
+
+    if compact_attributes:
+        from wayfarer import attributes
+
+        store = attributes.AttributeStore()
+
+    chunks = _iter_chunks(recs, chunk_size)
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    if processes <= 1:
+        edge_tables = (create_edge_table(chunk, **options) for chunk in chunks)
+    else:
+        log.debug(f"Creating edge tables using {processes} processes")
+        edge_tables = _create_edge_tables_in_parallel(chunks, processes, options)
+
+    try:
+        for edges, chunk_error_count in edge_tables:
+            if intern_nodes:
+                edges = interner.intern_edges(edges)
+            add_edges(net, edges)
+            if compact_attributes:
+                attributes.compact_network(net, store, edges)
+            error_count += chunk_error_count
+            log.debug(f"Added {len(edges)} edges to the network")
+    finally:
+        # stop creating edge tables if there is an error such as a duplicate key
+        edge_tables.close()
 
     if error_count > 0:
         log.warning("{} MultiLineString features were ignored".format(error_count))
 
     return net
+
+
+def _create_edge_tables_in_parallel(
+    chunks: Iterator[list], processes: int, options: dict
+) -> Generator[tuple[list[tuple], int], None, None]:
+    """
+    Create edge tables for chunks of records in a pool of processes, returning the tables
+    in the order of the chunks. Only a few chunks per process are read ahead, to limit memory use
+    """
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        pending = deque()  # type: deque
+        try:
+            for chunk in chunks:
+                records = [_to_record(r) for r in chunk]
+                pending.append(executor.submit(create_edge_table, records, **options))
+                if len(pending) >= processes * 2:
+                    yield pending.popleft().result()
+
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
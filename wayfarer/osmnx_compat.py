@@ -81,7 +81,7 @@ def to_osmnx(
         G.add_edge(edge.start_node, edge.end_node, key=edge.key, **edge.attributes)
 
         # now add the reversed edge
-        reversed_properties = edge.attributes.copy()
+        reversed_properties = dict(edge.attributes)
         reversed_properties.update(
             {
                 "reversed": True,
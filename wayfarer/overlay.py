@@ -0,0 +1,536 @@
+"""
+This module contains a copy-on-write overlay network, that wraps a read-only base network
+
+Any changes made to an overlay, such as adding, removing, or splitting edges, are recorded
+in a small delta held by the overlay, and the base network is never modified. This allows a
+single loaded network to be shared between many requests, each with its own overlay, rather than
+reloading or copying the whole network for every request.
+
+The overlay is a subclass of the networkx ``MultiGraph`` and ``MultiDiGraph`` classes so can be passed
+to any of the wayfarer or networkx functions expecting a network. Edge attribute dictionaries
+of the base network are returned by the overlay as read-only proxies, so the base network cannot be
+modified through them. Edges that are added or updated in the overlay get their own attribute dictionaries.
+Node attribute dictionaries of the base network are shared with the overlay, so should be treated as read-only.
+
+The base network should not be modified while any overlays are in use.
+"""
+
+from __future__ import annotations
+import logging
+from collections.abc import Mapping, MutableMapping
+from types import MappingProxyType
+import networkx
+from networkx import NetworkXError
+from wayfarer import Edge
+from wayfarer.attributes import AttributeProxy
+from wayfarer.loader import UniqueDict
+
+log = logging.getLogger("wayfarer")
+
+
+def _clear_cache(net):
+    # networkx >= 3.3 caches values such as backend conversions on the graph
+    cache = getattr(net, "__networkx_cache__", None)
+    if cache:
+        cache.clear()
+
+
+class OverlayDict(MutableMapping):
+    """
+    A mutable mapping that records any changes separately to a base mapping,
+    which is left unmodified
+
+    Args:
+        base: The base mapping
+        unique: If ``True`` a ``KeyError`` is raised when setting a key that already
+            exists, in the same way as :class:`wayfarer.loader.UniqueDict`
+
+    >>> base = {"A": 1, "B": 2}
+    >>> od = OverlayDict(base)
+    >>> od["C"] = 3
+    >>> del od["A"]
+    >>> sorted(od.items())
+    [('B', 2), ('C', 3)]
+    >>> base
+    {'A': 1, 'B': 2}
+    """
+
+    def __init__(self, base: Mapping, unique: bool = False):
+        self.base = base
+        self.unique = unique
+        self.added = {}  # type: dict
+        # keys removed from the base - always a subset of the base keys
+        self.removed = set()  # type: set
+
+    def __getitem__(self, key):
+        if key in self.added:
+            return self.added[key]
+        if key in self.removed:
+            raise KeyError(key)
+        return self.base[key]
+
+    def __contains__(self, key):
+        if key in self.added:
+            return True
+        return key not in self.removed and key in self.base
+
+    def __setitem__(self, key, value):
+        if self.unique and key in self:
+            raise KeyError("The key {} already exists. Keys must be unique".format(key))
+        self.added[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self.added.pop(key, None)
+        if key in self.base:
+            self.removed.add(key)
+
+    def __iter__(self):
+        for key in self.base:
+            if key not in self.removed and key not in self.added:
+                yield key
+        yield from self.added
+
+    def __len__(self):
+        readded = sum(
+            1 for key in self.added if key not in self.base or key in self.removed
+        )
+        return len(self.base) - len(self.removed) + readded
+
+
+class _ReadOnlyView(Mapping):
+    """
+    A read-only view of the nested dictionaries of the base network, where the
+    values are also returned as read-only views down to the edge attributes
+
+    Args:
+        mapping: The base network dictionary
+        depth: The number of levels of dictionaries below the mapping,
+            1 for a dictionary of edge keys, and 2 for a dictionary of neighbours
+    """
+
+    __slots__ = ("_mapping", "_depth")
+
+    def __init__(self, mapping: Mapping, depth: int):
+        self._mapping = mapping
+        self._depth = depth
+
+    def __getitem__(self, key):
+        value = self._mapping[key]
+        if self._depth > 1:
+            return _ReadOnlyView(value, self._depth - 1)
+        return MappingProxyType(value)
+
+    def __contains__(self, key):
+        return key in self._mapping
+
+    def __iter__(self):
+        return iter(self._mapping)
+
+    def __len__(self):
+        return len(self._mapping)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class _KeyDictView(Mapping):
+    """
+    A read-only view of the parallel edges between two nodes, keyed by edge key
+    """
+
+    __slots__ = ("_base", "_added", "_removed", "_u", "_v")
+
+    def __init__(self, base: Mapping, added: Mapping, removed: Mapping, u, v):
+        self._base = base
+        self._added = added
+        self._removed = removed
+        # (u, v) is always in the direction of the edge
+        self._u = u
+        self._v = v
+
+    def __getitem__(self, key):
+        if key in self._added:
+            return self._added[key]
+        if key in self._base and (self._u, self._v, key) not in self._removed:
+            return MappingProxyType(self._base[key])
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        if key in self._added:
+            return True
+        return key in self._base and (self._u, self._v, key) not in self._removed
+
+    def __iter__(self):
+        u, v = self._u, self._v
+        for key in self._base:
+            if key not in self._added and (u, v, key) not in self._removed:
+                yield key
+        yield from self._added
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return "{}({})".format(self.__class__.__name__, dict(self))
+
+
+class _NeighbourView(Mapping):
+    """
+    A read-only view of the neighbours of a node, where some edges
+    have been added or removed in an overlay
+    """
+
+    __slots__ = ("_node", "_base", "_added", "_removed", "_reverse")
+
+    def __init__(
+        self, node, base: Mapping, added: Mapping, removed: Mapping, reverse: bool
+    ):
+        self._node = node
+        self._base = base
+        self._added = added
+        self._removed = removed
+        self._reverse = reverse
+
+    def _get(self, nbr) -> _KeyDictView | None:
+        base = self._base.get(nbr)
+        added = self._added.get(nbr)
+        if base is None and added is None:
+            return None
+        if self._reverse:
+            u, v = nbr, self._node
+        else:
+            u, v = self._node, nbr
+        keydict = _KeyDictView(base or {}, added or {}, self._removed, u, v)
+        if added or any(True for _ in keydict):
+            return keydict
+        return None
+
+    def __getitem__(self, nbr):
+        keydict = self._get(nbr)
+        if keydict is None:
+            raise KeyError(nbr)
+        return keydict
+
+    def __contains__(self, nbr):
+        return self._get(nbr) is not None
+
+    def __iter__(self):
+        for nbr in self._base:
+            if nbr not in self._added and self._get(nbr) is not None:
+                yield nbr
+        for nbr, added in self._added.items():
+            if added:
+                yield nbr
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return "{}({})".format(self.__class__.__name__, dict(self))
+
+
+class _AdjacencyView(Mapping):
+    """
+    A read-only view of the adjacency of an overlay network. Nodes with no changes
+    are returned as read-only views of the base network dictionaries so routing on
+    unchanged parts of the network has very little overhead
+    """
+
+    __slots__ = ("_overlay", "_base", "_added", "_reverse")
+
+    def __init__(
+        self, overlay: _Overlay, base: Mapping, added: Mapping, reverse: bool = False
+    ):
+        self._overlay = overlay
+        self._base = base
+        self._added = added
+        self._reverse = reverse
+
+    def __getitem__(self, node):
+        overlay = self._overlay
+        if node not in overlay._node:
+            raise KeyError(node)
+        if node not in overlay._touched:
+            return _ReadOnlyView(self._base[node], depth=2)
+        return _NeighbourView(
+            node,
+            self._base.get(node, {}),
+            self._added.get(node, {}),
+            overlay._removed,
+            self._reverse,
+        )
+
+    def __contains__(self, node):
+        return node in self._overlay._node
+
+    def __iter__(self):
+        return iter(self._overlay._node)
+
+    def __len__(self):
+        return len(self._overlay._node)
+
+
+class _Overlay(networkx.MultiGraph):
+    """
+    The shared implementation of the overlay network classes. All changes are
+    recorded in the delta dictionaries, and the networkx adjacency dictionaries
+    are replaced with read-only views that merge the base network and the delta
+    """
+
+    def _init_overlay(self, base: networkx.MultiGraph | networkx.MultiDiGraph | None):
+
+        if base is None:
+            # networkx creates new instances of a graph class with no arguments
+            # for example when creating subgraph views
+            base = (
+                networkx.MultiDiGraph() if self.is_directed() else networkx.MultiGraph()
+            )
+
+        self.base = base
+        self._touched = set()  # type: set
+        # removed base edges as (u, v, key), undirected edges are stored in both directions
+        self._removed = {}  # type: dict[tuple, None]
+        self._added_succ = {}  # type: dict
+
+        self.graph = dict(base.graph)
+        if "keys" in base.graph:
+            keys = base.graph["keys"]
+            # read-only lookups, such as those of networks loaded from a columnar file, have unique keys
+            unique = isinstance(keys, UniqueDict) or not isinstance(
+                keys, MutableMapping
+            )
+            self.graph["keys"] = OverlayDict(keys, unique=unique)
+
+        if "indexes" in base.graph:
+            # each overlay records its own changes to any indexes
+            self.graph["indexes"] = [index.copy() for index in base.graph["indexes"]]
+
+        self._node = OverlayDict(base._node)
+        self._adj = _AdjacencyView(self, base._adj, self._added_succ)
+
+        if self.is_directed():
+            self._added_pred = {}  # type: dict
+            self._pred = _AdjacencyView(
+                self, base._pred, self._added_pred, reverse=True
+            )
+        else:
+            self._added_pred = self._added_succ
+
+    def _get_base_attributes(self, u, v, key) -> dict | None:
+        if (u, v, key) in self._removed:
+            return None
+        return self.base._adj.get(u, {}).get(v, {}).get(key)
+
+    def add_node(self, node_for_adding, **attr):
+        n = node_for_adding
+        if n not in self._node:
+            if n is None:
+                raise ValueError("None cannot be a node")
+            self._node[n] = self.node_attr_dict_factory()
+            self._touched.add(n)
+        elif n not in self._node.added:
+            # copy the base attributes before any updates
+            self._node[n] = dict(self._node[n])
+        self._node[n].update(attr)
+        _clear_cache(self)
+
+    def add_nodes_from(self, nodes_for_adding, **attr):
+        for n in nodes_for_adding:
+            if isinstance(n, tuple):
+                n, ndict = n
+                self.add_node(n, **{**attr, **ndict})
+            else:
+                self.add_node(n, **attr)
+
+    def remove_node(self, n):
+        if n not in self._node:
+            raise NetworkXError(f"The node {n} is not in the graph.")
+
+        for nbr, keydict in list(self._adj[n].items()):
+            for key in list(keydict):
+                self.remove_edge(n, nbr, key)
+
+        if self.is_directed():
+            for nbr, keydict in list(self._pred[n].items()):
+                for key in list(keydict):
+                    self.remove_edge(nbr, n, key)
+
+        del self._node[n]
+        self._touched.add(n)
+        _clear_cache(self)
+
+    def remove_nodes_from(self, nodes):
+        for n in nodes:
+            if n in self._node:
+                self.remove_node(n)
+
+    def add_edge(self, u_for_edge, v_for_edge, key=None, **attr):
+        u, v = u_for_edge, v_for_edge
+
+        for n in (u, v):
+            if n not in self._node:
+                if n is None:
+                    raise ValueError("None cannot be a node")
+                self._node[n] = self.node_attr_dict_factory()
+
+        if key is None:
+            key = self.new_edge_key(u, v)
+
+        keydict = self._added_succ.setdefault(u, {}).setdefault(
+            v, self.edge_key_dict_factory()
+        )
+        # the same keydict is shared by both directions, as in networkx
+        self._added_pred.setdefault(v, {})[u] = keydict
+
+        if key in keydict:
+            datadict = keydict[key]
+        else:
+            # copy-on-write any existing edge in the base network
+            datadict = self.edge_attr_dict_factory()
+            datadict.update(self._get_base_attributes(u, v, key) or {})
+            keydict[key] = datadict
+
+        datadict.update(attr)
+        self._touched.update((u, v))
+        _clear_cache(self)
+        return key
+
+    def add_edges_from(self, ebunch_to_add, **attr):
+        keylist = []
+        for e in ebunch_to_add:
+            ne = len(e)
+            if ne == 4:
+                u, v, key, dd = e
+            elif ne == 3:
+                u, v, dd = e
+                key = None
+                if not isinstance(dd, Mapping):
+                    key, dd = dd, {}
+            elif ne == 2:
+                u, v = e
+                key, dd = None, {}
+            else:
+                raise NetworkXError(
+                    f"Edge tuple {e} must be a 2-tuple, 3-tuple or 4-tuple."
+                )
+            keylist.append(self.add_edge(u, v, key, **{**attr, **dd}))
+        return keylist
+
+    def remove_edge(self, u, v, key=None):
+        try:
+            keydict = self._adj[u][v]
+        except KeyError as err:
+            raise NetworkXError(f"The edge {u}-{v} is not in the graph.") from err
+
+        if key is None:
+            # networkx removes the most recently added edge
+            key = list(keydict)[-1]
+        elif key not in keydict:
+            msg = f"The edge {u}-{v} with key {key} is not in the graph."
+            raise NetworkXError(msg)
+
+        added = self._added_succ.get(u, {}).get(v)
+        if added is not None and key in added:
+            del added[key]
+            if not added:
+                del self._added_succ[u][v]
+                self._added_pred[v].pop(u, None)
+
+        if key in self.base._adj.get(u, {}).get(v, {}):
+            self._removed[(u, v, key)] = None
+            if not self.is_directed():
+                self._removed[(v, u, key)] = None
+
+        self._touched.update((u, v))
+        _clear_cache(self)
+
+    def remove_edges_from(self, ebunch):
+        for e in ebunch:
+            try:
+                self.remove_edge(*e[:3])
+            except NetworkXError:
+                pass
+
+    @property
+    def added_edges(self) -> list[Edge]:
+        """
+        Return a list of edges added (or updated) in the overlay
+        """
+        edges = []
+        seen = set()
+        for u, nbrs in self._added_succ.items():
+            for v, keydict in nbrs.items():
+                for key, attributes in keydict.items():
+                    if (v, u, key) in seen:
+                        continue
+                    if not self.is_directed():
+                        seen.add((u, v, key))
+                    edges.append(Edge(u, v, key, attributes))
+        return edges
+
+    @property
+    def removed_edges(self) -> list[Edge]:
+        """
+        Return a list of base network edges removed in the overlay, in the order they were removed
+        """
+        edges = []
+        seen = set()
+        for u, v, key in self._removed:
+            if (v, u, key) in seen:
+                continue
+            if not self.is_directed():
+                seen.add((u, v, key))
+            attributes = AttributeProxy(self.base._adj[u][v][key])
+            edges.append(Edge(u, v, key, attributes))
+        return edges
+
+
+class OverlayMultiGraph(_Overlay):
+    """
+    A copy-on-write overlay of an undirected network. See :func:`create_overlay`
+    """
+
+    def __init__(self, base: networkx.MultiGraph | None = None):
+        networkx.MultiGraph.__init__(self)
+        self._init_overlay(base)
+
+
+class OverlayMultiDiGraph(_Overlay, networkx.MultiDiGraph):
+    """
+    A copy-on-write overlay of a directed network. See :func:`create_overlay`
+    """
+
+    def __init__(self, base: networkx.MultiDiGraph | None = None):
+        networkx.MultiDiGraph.__init__(self)
+        self._init_overlay(base)
+
+
+def create_overlay(
+    net: networkx.MultiGraph | networkx.MultiDiGraph,
+) -> OverlayMultiGraph | OverlayMultiDiGraph:
+    """
+    Create a copy-on-write overlay of a network. The overlay can be modified,
+    for example by splitting edges, without changing the base network
+
+    Args:
+        net: The base network
+    Returns:
+        A new overlay network
+
+    >>> from wayfarer import loader, functions
+    >>> net = loader.create_graph()
+    >>> edge = functions.add_edge(net, 0, 1, "A", {"LEN_": 10})
+    >>> overlay = create_overlay(net)
+    >>> edge = functions.add_edge(overlay, 1, 2, "B", {"LEN_": 20})
+    >>> print(len(overlay.edges()), len(net.edges()))
+    2 1
+    >>> [e.key for e in overlay.added_edges]
+    ['B']
+    """
+
+    if net.is_directed():
+        return OverlayMultiDiGraph(net)
+    else:
+        return OverlayMultiGraph(net)
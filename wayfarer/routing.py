@@ -1,8 +1,15 @@
 from __future__ import annotations
+import heapq
 import logging
 import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
 import networkx
-from wayfarer import functions, LENGTH_FIELD, Edge
+from collections.abc import Mapping
+from typing import Callable, Iterator
+from wayfarer import functions, compiled as compiled_network, LENGTH_FIELD, Edge
+from wayfarer import columnar
+from wayfarer.hierarchy import ContractionHierarchy, shortest_path_edges
 from networkx.algorithms import eulerian_path
 from networkx import NetworkXNoPath, NodeNotFound
 
@@ -20,13 +27,20 @@ def solve_shortest_path(
     end_node: str | int,
     with_direction_flag: bool = True,
     weight: str | None = LENGTH_FIELD,
+    compiled: compiled_network.CompiledNetwork | None = None,
+    heuristic: Callable[[int, int], float] | None = None,
 ):
     """
     Solve the shortest path between two nodes, returning a list of Edge objects.
     Set weight to the attribute name for deciding the shortest path, or to None
     to ignore any weightings (faster).
+    A network compiled using :func:`wayfarer.compiled.compile_network` can be
+    passed as ``compiled`` to solve using the compiled network rather than networkx, along
+    with an optional A* ``heuristic`` such as :func:`wayfarer.compiled.euclidean_heuristic`.
     """
-    nodes = solve_shortest_path_from_nodes(net, [start_node, end_node], weight)
+    nodes = solve_shortest_path_from_nodes(
+        net, [start_node, end_node], weight, compiled=compiled, heuristic=heuristic
+    )
     return functions.get_edges_from_nodes(
         net, nodes, with_direction_flag=with_direction_flag, length_field=weight
     )
@@ -35,13 +49,36 @@ def solve_shortest_path(
 def solve_shortest_path_from_nodes(
     net: networkx.MultiGraph | networkx.MultiDiGraph,
     node_list: list[int | str],
-    weight: str | None = LENGTH_FIELD,
+    weight: str | Callable | None = LENGTH_FIELD,
+    compiled: compiled_network.CompiledNetwork | None = None,
+    heuristic: Callable[[int, int], float] | None = None,
 ) -> list[int | str]:
     """
     Return a list of nodes found by solving from each node in node_list to
     the next. Set weight to the attribute name for deciding the shortest path, or to None
     to ignore any weightings (faster).
+    If a ``compiled`` network is supplied then a bidirectional Dijkstra search is run on
+    the compiled network. It must have been compiled using the same weight.
+    If a ``heuristic`` is also supplied then an A* search is used instead.
+    Networks loaded from a columnar file use their stored compiled network if it
+    matches the weight.
+    The weight can also be a function, as used by ``networkx.shortest_path``, which cannot
+    be used with a compiled network.
     """
+    if callable(weight):
+        if compiled is not None:
+            raise ValueError("A weight function cannot be used with a compiled network")
+    elif compiled is None:
+        compiled = columnar.get_compiled_network(net, weight)
+
+    if heuristic is not None and compiled is None:
+        raise ValueError("A compiled network is required to use a heuristic")
+
+    if compiled is not None and compiled.weight != weight:
+        raise ValueError(
+            f"The network was compiled using the weight {compiled.weight} rather than {weight}"
+        )
+
     nodes_in_path = []
 
     for start_node, end_node in functions.pairwise(node_list):
@@ -50,22 +87,371 @@ def solve_shortest_path_from_nodes(
         if start_node == end_node:
             log.debug("Same start and end node used for path: {}".format(start_node))
         else:
-            try:
-                nodes_in_path += networkx.shortest_path(
-                    net, source=start_node, target=end_node, weight=weight
+            if compiled is not None and heuristic is not None:
+                nodes_in_path += compiled_network.astar(
+                    compiled, start_node, end_node, heuristic
                 )
-            except KeyError:
-                raise
+            elif compiled is not None:
+                nodes_in_path += compiled_network.shortest_path(
+                    compiled, start_node, end_node
+                )
+            else:
+                try:
+                    nodes_in_path += networkx.shortest_path(
+                        net, source=start_node, target=end_node, weight=weight
+                    )
+                except KeyError:
+                    raise
 
     return nodes_in_path
 
 
+def solve_shortest_path_from_hierarchy(
+    net: networkx.MultiGraph | networkx.MultiDiGraph,
+    hierarchy: ContractionHierarchy,
+    start_node: str | int,
+    end_node: str | int,
+    with_direction_flag: bool = True,
+) -> list[Edge]:
+    """
+    Solve the shortest path between two nodes using a contraction hierarchy
+    created with :func:`wayfarer.hierarchy.build_contraction_hierarchy`, returning a list of Edge objects.
+    Shortcuts in the hierarchy are unpacked to the original edges of the network, so the results
+    can be used in the same way as :func:`solve_shortest_path`.
+    """
+    if start_node == end_node:
+        log.debug("Same start and end node used for path: {}".format(start_node))
+        return []
+
+    path = shortest_path_edges(hierarchy, start_node, end_node)
+    return functions.get_path_edges(net, path, with_direction_flag=with_direction_flag)
+
+
+class _SearchTree:
+    """
+    A Dijkstra search from a node which can be continued to reach further nodes, so a single
+    search is shared by all legs of a route that start or end at the node. The
+    predecessor of each node is stored with the key of the edge used to reach it.
+    """
+
+    def __init__(self, adj: Mapping, source: int | str, weight: str | None):
+        self.adj = adj
+        self.source = source
+        self.weight = weight
+        self.settled = {}  # type: dict
+        self.dist = {source: 0.0}
+        self.pred = {source: None}  # type: dict
+        self._counter = itertools.count()
+        self.heap = [(0.0, next(self._counter), source)]
+
+    def _get_shortest_edge(self, keydict: Mapping) -> tuple:
+        weight = self.weight
+        if weight is None:
+            return next(iter(keydict)), 1.0
+        # use the first of any edges with the lowest weight, as in functions.get_shortest_edge
+        shortest = None  # type: tuple | None
+        for key, attributes in keydict.items():
+            cost = attributes.get(weight, 1)
+            if shortest is None or cost < shortest[1]:
+                shortest = (key, cost)
+        assert shortest is not None
+        return shortest
+
+    def search(self, target: int | str) -> bool:
+        """
+        Continue the search until the target node is reached, returning
+        ``False`` if it cannot be reached
+        """
+        settled = self.settled
+        if target in settled:
+            return True
+
+        adj, dist, pred, heap = self.adj, self.dist, self.pred, self.heap
+
+        while heap:
+            d, _, u = heapq.heappop(heap)
+            if u in settled:
+                continue
+            settled[u] = d
+
+            for v, keydict in adj[u].items():
+                if v in settled:
+                    continue
+                key, cost = self._get_shortest_edge(keydict)
+                nd = d + cost
+                if v not in dist or nd < dist[v]:
+                    dist[v] = nd
+                    pred[v] = (u, key)
+                    heapq.heappush(heap, (nd, next(self._counter), v))
+
+            # the node is only returned once its edges have been added,
+            # so the search can be continued
+            if u == target:
+                return True
+
+        return False
+
+    def get_path(self, node: int | str, to_source: bool = False) -> list[tuple]:
+        """
+        Get the (start_node, end_node, key) tuples of the path from the source to a reached node,
+        or from the node to the source if ``to_source`` is set (undirected networks only)
+        """
+        pred = self.pred
+        path = []
+        step = pred[node]
+        while step is not None:
+            u, key = step
+            if to_source:
+                path.append((node, u, key))
+            else:
+                path.append((u, node, key))
+            node = u
+            step = pred[node]
+
+        if not to_source:
+            path.reverse()
+        return path
+
+
+def solve_shortest_path_from_waypoints(
+    net: networkx.MultiGraph | networkx.MultiDiGraph,
+    waypoints: list[int | str],
+    weight: str | None = LENGTH_FIELD,
+    with_direction_flag: bool = True,
+    return_unique: bool = True,
+) -> list[Edge]:
+    """
+    Solve the shortest path through a list of waypoint nodes, returning a list of Edge objects.
+    The results are the same as :func:`solve_shortest_path` solved for each pair of waypoints,
+    although a different path may be returned when several paths have the same cost.
+
+    Rather than running a separate search for each pair of waypoints, searches are shared between
+    the legs of the route. In undirected networks a single search from every second waypoint solves
+    both the leg arriving at and the leg leaving the waypoint, and in all networks searches from a waypoint
+    visited more than once are continued rather than repeated. Edges are recorded as the search runs,
+    so there is no need to find the edges between each pair of nodes afterwards.
+
+    Args:
+        net: The network
+        waypoints: A list of node ids to route through in order
+        weight: The edge attribute to use as the cost of an edge. If ``None`` each edge has a cost of 1
+        with_direction_flag: Add an attribute to each edge to show if it is traversed in the direction of the path
+        return_unique: Only return one copy of any edges traversed more than once
+    Returns:
+        A list of edges
+
+    >>> net = networkx.MultiGraph()
+    >>> net.add_edges_from([(0, 1, "A", {"LEN_": 10}), (1, 2, "B", {"LEN_": 5}), (0, 2, "C", {"LEN_": 20})])
+    ['A', 'B', 'C']
+    >>> edges = solve_shortest_path_from_waypoints(net, [0, 2, 0, 1])
+    >>> [edge.key for edge in edges]
+    ['A', 'B']
+    >>> edges = solve_shortest_path_from_waypoints(net, [0, 2, 0, 1], return_unique=False)
+    >>> [edge.key for edge in edges]
+    ['A', 'B', 'B', 'A', 'A']
+    """
+    for node in waypoints:
+        if node not in net:
+            raise NodeNotFound(f"Node {node} is not in the network")
+
+    directed = net.is_directed()
+    trees = {}  # type: dict[int | str, _SearchTree]
+
+    def get_tree(source):
+        tree = trees.get(source)
+        if tree is None:
+            tree = _SearchTree(net._adj, source, weight)
+            trees[source] = tree
+        return tree
+
+    path = []  # type: list[tuple]
+
+    for i, (start_node, end_node) in enumerate(functions.pairwise(waypoints)):
+        if start_node == end_node:
+            log.debug("Same start and end node used for path: {}".format(start_node))
+            continue
+
+        # search from every second waypoint, reusing any existing search
+        # from the other end of the leg
+        if not directed and (
+            end_node in trees or (i % 2 == 0 and start_node not in trees)
+        ):
+            tree = get_tree(end_node)
+            if not tree.search(start_node):
+                raise NetworkXNoPath(f"No path between {start_node} and {end_node}.")
+            path += tree.get_path(start_node, to_source=True)
+        else:
+            tree = get_tree(start_node)
+            if not tree.search(end_node):
+                raise NetworkXNoPath(f"No path between {start_node} and {end_node}.")
+            path += tree.get_path(end_node)
+
+    log.debug(f"Solved {len(waypoints) - 1} legs using {len(trees)} searches")
+    edges = functions.get_path_edges(net, path, with_direction_flag=with_direction_flag)
+
+    if return_unique:
+        return list({edge.key: edge for edge in edges}.values())
+    return edges
+
+
+# the minimum number of sources before a distance matrix is solved using multiple processes
+MIN_PARALLEL_SOURCES = 256
+
+# the compiled network used by worker processes when solving a distance matrix
+_worker_compiled = None  # type: compiled_network.CompiledNetwork | None
+
+
+def _init_distance_matrix_worker(compiled: compiled_network.CompiledNetwork):
+    global _worker_compiled
+    _worker_compiled = compiled
+
+
+def _get_distance_matrix_rows(
+    source_indices: list[int],
+    target_indices: list[int],
+    compiled: compiled_network.CompiledNetwork | None = None,
+) -> list[list[float]]:
+    """
+    Get the rows of a distance matrix, running a single search from each source
+    that stops once all targets have been reached
+    """
+    if compiled is None:
+        compiled = _worker_compiled
+        assert compiled is not None
+
+    rows = []
+    for source_index in source_indices:
+        costs = compiled_network.single_source_dijkstra(
+            compiled, source_index, target_indices=target_indices
+        )
+        rows.append([costs.get(t, float("inf")) for t in target_indices])
+    return rows
+
+
+def distance_matrix(
+    net: networkx.MultiGraph | networkx.MultiDiGraph,
+    sources: list[int | str],
+    targets: list[int | str],
+    weight: str | None = LENGTH_FIELD,
+    compiled: compiled_network.CompiledNetwork | None = None,
+    processes: int | None = None,
+):
+    """
+    Get the cost of the shortest path from each source node to each target node.
+    A single search is run from each source node, stopping once all target nodes
+    have been reached. Target nodes that cannot be reached from a source have a cost of ``inf``.
+
+    For large numbers of sources the searches are split across a pool of processes.
+    Requires numpy.
+
+    Args:
+        net: The network
+        sources: A list of source node ids
+        targets: A list of target node ids
+        weight: The edge attribute to use as the cost of an edge
+        compiled: An optional compiled network. It must have been compiled using the same weight.
+                  If not supplied the network is compiled.
+        processes: The number of processes to use. By default a process for each CPU is used
+                   when there are at least ``MIN_PARALLEL_SOURCES`` sources. Set to 1 to
+                   always solve in the current process.
+    Returns:
+        A numpy array of costs with a row for each source and a column for each target
+
+    >>> net = networkx.MultiGraph()
+    >>> net.add_edges_from([(0, 1, "A", {"LEN_": 10}), (1, 2, "B", {"LEN_": 5})])
+    ['A', 'B']
+    >>> distance_matrix(net, [0, 2], [0, 1, 2])
+    array([[ 0., 10., 15.],
+           [15.,  5.,  0.]])
+    """
+    import numpy
+
+    if compiled is None:
+        compiled = columnar.get_compiled_network(net, weight)
+        if compiled is None:
+            compiled = compiled_network.compile_network(net, weight=weight)
+    elif compiled.weight != weight:
+        raise ValueError(
+            f"The network was compiled using the weight {compiled.weight} rather than {weight}"
+        )
+
+    source_indices = [compiled.get_node_index(n) for n in sources]
+    target_indices = [compiled.get_node_index(n) for n in targets]
+
+    if processes is None:
+        if len(sources) >= MIN_PARALLEL_SOURCES:
+            processes = os.cpu_count() or 1
+        else:
+            processes = 1
+
+    if processes <= 1 or len(sources) < 2:
+        rows = _get_distance_matrix_rows(source_indices, target_indices, compiled)
+    else:
+        # split the sources into several chunks per process, to balance the load
+        chunk_size = max(1, -(-len(source_indices) // (processes * 4)))
+        chunks = [
+            source_indices[i:i + chunk_size]
+            for i in range(0, len(source_indices), chunk_size)
+        ]
+        log.debug(f"Solving a distance matrix using {processes} processes")
+        rows = []
+        with ProcessPoolExecutor(
+            max_workers=processes,
+            initializer=_init_distance_matrix_worker,
+            initargs=(compiled,),
+        ) as executor:
+            for chunk_rows in executor.map(
+                _get_distance_matrix_rows, chunks, itertools.repeat(target_indices)
+            ):
+                rows.extend(chunk_rows)
+
+    return numpy.array(rows, dtype=float).reshape(len(sources), len(targets))
+
+
+def _get_edges_from_nodes(
+    net: networkx.MultiGraph | networkx.MultiDiGraph,
+    node_list: list[int | str],
+    get_weight: Callable[[int | str, Mapping], float | None],
+) -> list[Edge]:
+    """
+    Get the edges between a list of nodes, choosing the edge with the lowest weight between
+    each pair of nodes. Edges with a weight of ``None`` are ignored. Only one copy of
+    each edge is returned, as with :func:`wayfarer.functions.get_edges_from_nodes`
+    """
+
+    edges = {}  # type: dict
+
+    for u, v in functions.pairwise(node_list):
+        keydict = functions.get_edges_from_node_pair(net, u, v)
+        if not keydict:
+            continue
+
+        # the weight and key of the shortest edge, using the first edge if
+        # edges have the same weight
+        shortest = None  # type: tuple | None
+        for key, atts in keydict.items():
+            edge_weight = get_weight(key, atts)
+            if edge_weight is not None and (
+                shortest is None or edge_weight < shortest[0]
+            ):
+                shortest = (edge_weight, key)
+
+        if shortest is not None:
+            key = shortest[1]
+            edges[key] = Edge(u, v, key, functions.copy_attributes(keydict[key]))
+
+    return list(edges.values())
+
+
 def solve_shortest_path_from_edges(
-    net: networkx.MultiGraph | networkx.MultiDiGraph, edge_id_list: list[int | str]
+    net: networkx.MultiGraph | networkx.MultiDiGraph,
+    edge_id_list: list[int | str],
+    weight: str = LENGTH_FIELD,
 ):
     """
     Return a path routing from edge to edge, rather than
-    from node to node
+    from node to node. The network is not modified, so paths can be
+    solved on a network shared between threads.
     """
 
     log.debug(f"Edge ids used for path solve: {edge_id_list}")
@@ -73,76 +459,89 @@ def solve_shortest_path_from_edges(
     # remove any duplicates
     edge_id_list = functions.get_unique_ordered_list(edge_id_list)
 
+    input_edges, missing = functions.get_edges_by_keys(net, edge_id_list)
+    if missing:
+        raise KeyError(f"The edges with keys {missing} were not found in the network")
+
+    # rather than modifying the network, the weights used for each solve
+    # are set using a weight function
+
+    # any dual edges between the nodes of an edge in the edge_id_list are ignored
+    # this is to handle loops in the middle of a path (with two edges connecting the same two nodes)
+    # simply setting the weight to 0 for one pass isn't enough, as in the next
+    # solve in this loop the shorter edge is returned. If we ignore the shorter edge we can
+    # ensure only the required edge is returned - see test_dual_path_middle_network
+    ignored_keys = set()  # type: set
+
+    # the edge currently being solved, which has a weight of 0 to ensure it is
+    # part of the route if there are alternative paths
+    current_key = None  # type: int | str | None
+
+    def get_weight(key, attributes):
+        if key in ignored_keys:
+            return None
+        if key == current_key:
+            return 0
+        return attributes[weight]
+
+    def get_shortest_weight(u, v, keydict):
+        weights = (get_weight(key, atts) for key, atts in keydict.items())
+        return min((w for w in weights if w is not None), default=None)
+
     edges = []
-    removed_edges = []
     previous_edge_nodes = []  # type: list[int | str]
+    edge_ids = set(edge_id_list)
 
-    for edge_id in edge_id_list:
-        edge = functions.get_edge_by_key(net, edge_id)
+    for edge in input_edges:
 
         end_nodes = [edge.start_node, edge.end_node]
 
-        # as a first-step remove any dual edges between points if they aren't in the input edge_id_list
-        # this is to handle loops in the middle of a path (with two edges connecting the same two nodes)
-        # simply setting the length to 0 for one pass isn't enough, as in the next
-        # solve in this loop the shorter edge is returned. If we remove the shorter edge we can
-        # ensure only the required edge is returned - see test_dual_path_middle_network
-
-        edges_between_nodes = functions.get_edges_from_nodes(
-            net, end_nodes, shortest_path_only=False
+        edges_between_nodes = functions.get_edges_from_node_pair(
+            net, edge.start_node, edge.end_node
         )
-        for path_edge in edges_between_nodes:
-            if path_edge.key not in edge_id_list:
-                removed_edges.append(path_edge)
-                functions.remove_edge(net, path_edge)
+        for key in edges_between_nodes or []:
+            if key not in edge_ids:
+                ignored_keys.add(key)
 
         if previous_edge_nodes:
             node_list = previous_edge_nodes + end_nodes
         else:
             node_list = end_nodes
 
-        # set the edge_id in the list to have a length of 0 to ensure it is
-        # part of the route if there are alternative paths
-
-        original_length = float(edge.attributes[LENGTH_FIELD])
-        edge.attributes[LENGTH_FIELD] = 0
-        log.debug(
-            f"Updated edge id {edge_id} to have length 0 from {original_length:.2f}"
-        )
+        current_key = edge.key
 
         if edge.start_node == edge.end_node:
             # self-loop
-            edges.extend(functions.get_edges_from_nodes(net, end_nodes))
+            edges.extend(_get_edges_from_nodes(net, end_nodes, get_weight))
         else:
             try:
-                nodes = solve_shortest_path_from_nodes(net, node_list)
+                nodes = solve_shortest_path_from_nodes(
+                    net, node_list, weight=get_shortest_weight
+                )
             except NetworkXNoPath as ex:
                 log.warning(f"No path found using node_list: {node_list}")
                 log.warning(ex)
                 raise
 
-            edges.extend(functions.get_edges_from_nodes(net, nodes))
+            edges.extend(_get_edges_from_nodes(net, nodes, get_weight))
 
-            # reset original length - note not in original implementation
-            # ensure this is only reset after get_edges_from_nodes has been called
-            edge.attributes[LENGTH_FIELD] = original_length
+        current_key = None
 
         if sorted(previous_edge_nodes) == sorted(end_nodes):
             # a loop of two edges - get all edges between the nodes
-            loop_edges = functions.get_edges_from_nodes(
-                net, [edge.start_node, edge.end_node]
-            )
+            loop_edges = _get_edges_from_nodes(net, end_nodes, get_weight)
             if loop_edges:
                 edges.extend(loop_edges)
 
         previous_edge_nodes = end_nodes
 
-    # reset network by adding back removed edges
-    for removed_edge in removed_edges:
-        functions.add_single_edge(net, removed_edge)
-
     # edge ids are not unique at this step - due to the case with doubling-back see test_simple_reversed
-    unique_edge_ids = functions.get_unique_ordered_list((e.key for e in edges))
+    # keep the first edge with each key from the full list of edges
+    first_edges = {}  # type: dict
+    for edge in edges:
+        first_edges.setdefault(edge.key, edge)
+
+    unique_edge_ids = list(first_edges)
     assert len(unique_edge_ids) <= len(edges)
 
     # the solve should have <= all edges clicked on
@@ -156,13 +555,7 @@ def solve_shortest_path_from_edges(
         log.debug(f"edge_id_list: {edge_id_list} unique_edge_ids: {unique_edge_ids}")
         raise
 
-    solved_edges = []
-
-    for edge_id in unique_edge_ids:
-        edge = [e for e in edges if e.key == edge_id][
-            0
-        ]  # get the first edge from full list of edges
-        solved_edges.append(edge)
+    solved_edges = list(first_edges.values())
 
     # start_key = edge_id_list[0]
     # start_edge = functions.get_edge_by_key(net, start_key)
@@ -171,6 +564,143 @@ def solve_shortest_path_from_edges(
     return find_ordered_path(solved_edges, start_node=None)
 
 
+# the relative tolerance of the lower bound of a path length before a partial path is pruned
+PRUNE_TOLERANCE = 1e-9
+
+
+def _search_matching_path(
+    net: networkx.MultiGraph | networkx.MultiDiGraph,
+    start_node: str | int,
+    end_node: str | int,
+    distance: float,
+    cutoff: int,
+    include_key: str | int | None = None,
+    length_field: str = LENGTH_FIELD,
+) -> tuple[float, float, list[tuple]] | None:
+    """
+    A depth-first search of the simple paths between two nodes, including any self-loops on the
+    nodes of a path and an edge closing the path back to the start node, as returned by
+    ``networkx.all_simple_paths`` and :func:`wayfarer.functions.get_all_paths_from_nodes`.
+
+    Partial paths are pruned when their length plus the shortest distance to the end node
+    can no longer match the best difference from ``distance``, and nodes from which the end node
+    cannot be reached are never visited. Edge lengths must not be negative. Paths with the same
+    difference are ordered by their (start_node, end_node, key) tuples, as when all paths were compared.
+    The search uses an explicit stack rather than recursion, so the cutoff is not limited by the
+    recursion limit. Returns the (difference, length, path) of the best path, where the path is a list
+    of (start_node, end_node, key) tuples, or ``None`` if no path is found
+    """
+
+    if start_node not in net:
+        raise NodeNotFound(f"source node {start_node} not in graph")
+
+    # the shortest distance from each node to the end node, used as a lower bound
+    # of the length still to be added to a partial path
+    reverse = net.reverse(copy=False) if net.is_directed() else net
+    remaining = networkx.single_source_dijkstra_path_length(
+        reverse, end_node, weight=length_field
+    )
+
+    adj = net._adj
+    path = []  # type: list[tuple]
+    visited = {start_node}
+    best = None  # type: tuple[float, float, list[tuple]] | None
+    visits = 0
+
+    def add_candidate(length, has_key):
+        nonlocal best
+        if not has_key:
+            return
+        difference = abs(length - distance)
+        if best is None or (difference, path) < (best[0], best[2]):
+            best = (difference, length, list(path))
+
+    def arrive(node, length, has_key):
+        # leave the node directly, or after traversing any self-loop on the node
+        yield None, length, has_key
+        for key, attributes in adj[node].get(node, {}).items():
+            yield (
+                (node, node, key),
+                length + attributes[length_field],
+                has_key or key == include_key,
+            )
+
+    def leave(node, length, depth, has_key):
+        nonlocal visits
+        visits += 1
+
+        if best is not None:
+            # allow for rounding in the shortest distances, which are summed from the end node
+            lower_bound = length + remaining[node]
+            if lower_bound - distance - best[0] > PRUNE_TOLERANCE * lower_bound:
+                return
+
+        if node == end_node:
+            add_candidate(length, has_key)
+            if (
+                start_node != end_node
+                and len(visited) > 2
+                and adj[start_node].get(end_node)
+            ):
+                # there is an edge between the start and end of the path
+                # so a possible loop closed by an edge back to the start
+                for key, attributes in adj[node].get(start_node, {}).items():
+                    path.append((node, start_node, key))
+                    add_candidate(
+                        length + attributes[length_field],
+                        has_key or key == include_key,
+                    )
+                    path.pop()
+            return
+
+        if depth == cutoff:
+            return
+
+        for v, keydict in adj[node].items():
+            if v in visited or v not in remaining:
+                continue
+            for key, attributes in keydict.items():
+                yield (
+                    (node, v, key),
+                    length + attributes[length_field],
+                    has_key or key == include_key,
+                )
+
+    # an explicit stack of the arrivals at and departures from each node of the path,
+    # so long paths are not limited by the recursion limit. Each frame is the
+    # (steps, node, depth, path length, is_arrival) of the frame
+    stack = []  # type: list[tuple]
+    if start_node in remaining:
+        stack.append((arrive(start_node, 0, not include_key), start_node, 0, 0, True))
+
+    while stack:
+        steps, node, depth, path_length, is_arrival = stack[-1]
+        step = next(steps, None)
+        del path[path_length:]
+
+        if step is None:
+            stack.pop()
+            if is_arrival and node != start_node:
+                visited.discard(node)
+            continue
+
+        edge, length, has_key = step
+        if is_arrival:
+            if edge is not None:
+                path.append(edge)
+            stack.append(
+                (leave(node, length, depth, has_key), node, depth, len(path), False)
+            )
+        else:
+            path.append(edge)
+            v = edge[1]
+            visited.add(v)
+            stack.append((arrive(v, length, has_key), v, depth + 1, len(path), True))
+
+    log.debug(f"Visited {visits} partial paths from {start_node} to {end_node}")
+    return best
+
+
 def solve_matching_path(
     net: networkx.MultiGraph | networkx.MultiDiGraph,
     start_node: str | int,
@@ -185,44 +715,37 @@ def solve_matching_path(
     If no distance is supplied the shortest path is returned
 
     Cut-off is the maximum number of edges to search for
-    If long solves are not as expected then increase this value
+    If long solves are not as expected then increase this value.
+    Partial paths which can no longer improve on the best match
+    found are not searched, so higher values can be used than when all
+    paths were compared
 
     include_key can be used to only include paths that contain this edge key
-    """
-
-    paths = []
 
-    all_shortest_paths = list(solve_all_simple_paths(net, start_node, end_node, cutoff))
-
-    # check for self-loops if start and end nodes are the same
-    if start_node == end_node:
-        all_shortest_paths.append([start_node])
+    >>> net = networkx.MultiGraph()
+    >>> net.add_edges_from([(0, 1, "A", {"LEN_": 10}), (0, 1, "B", {"LEN_": 25}), (1, 2, "C", {"LEN_": 5})])
+    ['A', 'B', 'C']
+    >>> [edge.key for edge in solve_matching_path(net, 0, 2, distance=28)]
+    ['B', 'C']
+    """
 
-    for path_nodes in all_shortest_paths:
-        all_paths = functions.get_all_paths_from_nodes(
-            net, path_nodes, with_direction_flag=True
+    try:
+        result = _search_matching_path(
+            net, start_node, end_node, distance, cutoff, include_key
         )
+    except NodeNotFound as ex:
+        log.error(ex)  # target node 99 not in graph
+        raise
 
-        for path_edges in all_paths:
-            if include_key and include_key not in [e.key for e in path_edges]:
-                continue
-            path_length = functions.get_path_length(path_edges)
-            length_difference = abs(path_length - distance)
-            log.debug([p.key for p in path_edges])
-            log.debug(
-                "Desired length: {} Solved path length: {} Difference: {}".format(
-                    distance, path_length, length_difference
-                )
+    # only the closest matching path to the original length is created
+    if result is not None:
+        length_difference, path_length, path = result
+        log.debug(
+            "Desired length: {} Solved path length: {} Difference: {}".format(
+                distance, path_length, length_difference
             )
-            paths.append((length_difference, path_edges, path_length))
-
-    # take the closest matching path to the original length based on absolute difference
-
-    if paths:
-        edges = min(paths)[
-            1
-        ]  # min in list based on first tuple value (length_difference)
-        log.debug("Desired and solved length difference: {}".format(min(paths)[0]))
+        )
+        edges = functions.get_path_edges(net, path, with_direction_flag=True)
     else:
         log.warning("No paths found")
         edges = None
@@ -382,24 +905,330 @@ def solve_all_shortest_paths(
     return all_shortest_paths
 
 
+# the network used by worker processes when solving spur paths
+_worker_net = None  # type: networkx.MultiGraph | networkx.MultiDiGraph | None
+
+
+def _init_spur_path_worker(net: networkx.MultiGraph | networkx.MultiDiGraph):
+    global _worker_net
+    _worker_net = net
+
+
+def _get_edge_cost(attributes: Mapping, weight: str | None) -> float:
+    """
+    Get the cost of an edge, matching the networkx defaults
+    of 1 for a missing attribute or when no weight is used
+    """
+    if weight is None:
+        return 1
+    return attributes.get(weight, 1)
+
+
+def _solve_spur_path(
+    spur_node: int | str,
+    end_node: int | str,
+    ignored_nodes: set,
+    ignored_edges: set,
+    weight: str | None,
+    net: networkx.MultiGraph | networkx.MultiDiGraph | None = None,
+) -> tuple[float, list[tuple]] | None:
+    """
+    Solve the shortest path from a spur node to the end node without using any of the
+    ignored nodes or (start_node, end_node, key) edges, returning the cost and
+    the edges of the path, or ``None`` if there is no path
+    """
+    if net is None:
+        net = _worker_net
+        assert net is not None
+
+    def get_allowed_edges(u, v, keydict):
+        return (
+            (_get_edge_cost(attributes, weight), key)
+            for key, attributes in keydict.items()
+            if (u, v, key) not in ignored_edges
+        )
+
+    def get_weight(u, v, keydict):
+        if v in ignored_nodes:
+            return None
+        return min((cost for cost, _ in get_allowed_edges(u, v, keydict)), default=None)
+
+    try:
+        cost, nodes = networkx.single_source_dijkstra(
+            net, spur_node, end_node, weight=get_weight
+        )
+    except NetworkXNoPath:
+        return None
+
+    # use the first of any edges with the lowest cost between each pair of nodes
+    adj = net._adj
+    path = []
+    for u, v in functions.pairwise(nodes):
+        edges = list(get_allowed_edges(u, v, adj[u][v]))
+        _, key = min(edges, key=lambda edge: edge[0])
+        path.append((u, v, key))
+
+    return cost, path
+
+
+def solve_k_shortest_paths(
+    net: networkx.MultiGraph | networkx.MultiDiGraph,
+    start_node: int | str,
+    end_node: int | str,
+    k: int | None = None,
+    weight: str | None = LENGTH_FIELD,
+    with_direction_flag: bool = True,
+    processes: int = 1,
+) -> Iterator[list[Edge]]:
+    """
+    Find the shortest paths between two nodes in order of cost, using Yen's algorithm.
+    Paths are generated lazily, so only the spur paths needed for the paths used
+    are solved. Paths do not have any repeated nodes, and paths using different parallel edges between
+    the same nodes are returned as separate paths.
+
+    Each path is found by solving the shortest path from each node of the previous path (a "spur node")
+    while avoiding the edges already used from that node. Spur paths are only solved from
+    nodes after the point where the previous path deviated from its parent (Lawler's modification).
+    As the spur paths of each path are independent, they can be solved using multiple processes.
+
+    Args:
+        net: The network
+        start_node: The node Id of the start node
+        end_node: The node Id of the end node
+        k: The maximum number of paths to return. If ``None`` all paths are returned
+        weight: The edge attribute to use as the cost of an edge. If ``None`` each edge has a cost of 1
+        with_direction_flag: Add an attribute to each edge to show if it is traversed in the direction of the path
+        processes: The number of processes to use to solve spur paths. Each process gets a copy of the network,
+                   so this is only worthwhile for large networks
+    Returns:
+        An iterator of lists of Edges
+
+    >>> net = networkx.MultiGraph()
+    >>> net.add_edges_from([(0, 1, "A", {"LEN_": 10}), (0, 1, "B", {"LEN_": 25}), (1, 2, "C", {"LEN_": 5}), (0, 2, "D", {"LEN_": 20})])
+    ['A', 'B', 'C', 'D']
+    >>> for edges in solve_k_shortest_paths(net, 0, 2):
+    ...     print([edge.key for edge in edges])
+    ['A', 'C']
+    ['D']
+    ['B', 'C']
+    """
+
+    if start_node not in net:
+        raise NodeNotFound(f"Node {start_node} is not in the network")
+    if end_node not in net:
+        raise NodeNotFound(f"Node {end_node} is not in the network")
+
+    if k is not None and k < 1:
+        return
+
+    if start_node == end_node:
+        log.debug("Same start and end node used for path: {}".format(start_node))
+        yield []
+        return
+
+    first = _solve_spur_path(start_node, end_node, set(), set(), weight, net)
+    if first is None:
+        raise NetworkXNoPath(f"No path between {start_node} and {end_node}.")
+
+    executor = None
+    if processes > 1:
+        log.debug(f"Solving spur paths using {processes} processes")
+        executor = ProcessPoolExecutor(
+            max_workers=processes,
+            initializer=_init_spur_path_worker,
+            initargs=(net,),
+        )
+
+    directed = net.is_directed()
+    counter = itertools.count()
+    # candidate paths, with the index of the edge where they deviate from their parent path
+    candidates = [(first[0], next(counter), first[1], 0)]
+    seen = {tuple(first[1])}
+    paths = []  # type: list[list[tuple]]
+
+    try:
+        while candidates:
+            cost, _, path, deviation = heapq.heappop(candidates)
+            log.debug(f"Found a path with a cost of {cost}")
+            paths.append(path)
+            yield functions.get_path_edges(
+                net, path, with_direction_flag=with_direction_flag
+            )
+
+            if k is not None and len(paths) >= k:
+                break
+
+            nodes = [start_node] + [v for _, v, _ in path]
+            root_costs = list(
+                itertools.accumulate(
+                    (_get_edge_cost(net._adj[u][v][key], weight) for u, v, key in path),
+                    initial=0,
+                )
+            )
+
+            spur_indices = list(range(deviation, len(path)))
+            ignored_nodes = []
+            ignored_edges = []
+            for i in spur_indices:
+                root = path[:i]
+                ignored_nodes.append(set(nodes[:i]))
+                # avoid the next edge of all paths found with the same root
+                edges = set()
+                for other in paths:
+                    if len(other) > i and other[:i] == root:
+                        u, v, key = other[i]
+                        edges.add((u, v, key))
+                        if not directed:
+                            edges.add((v, u, key))
+                ignored_edges.append(edges)
+
+            spur_nodes = [nodes[i] for i in spur_indices]
+            end_nodes = itertools.repeat(end_node)
+            weights = itertools.repeat(weight)
+            spur_paths: Iterator[tuple[float, list[tuple]] | None]
+            if executor is None:
+                spur_paths = map(
+                    _solve_spur_path,
+                    spur_nodes,
+                    end_nodes,
+                    ignored_nodes,
+                    ignored_edges,
+                    weights,
+                    itertools.repeat(net),
+                )
+            else:
+                spur_paths = executor.map(
+                    _solve_spur_path,
+                    spur_nodes,
+                    end_nodes,
+                    ignored_nodes,
+                    ignored_edges,
+                    weights,
+                )
+
+            for i, spur_path in zip(spur_indices, spur_paths):
+                if spur_path is None:
+                    continue
+                spur_cost, spur_edges = spur_path
+                candidate = path[:i] + spur_edges
+                if tuple(candidate) not in seen:
+                    seen.add(tuple(candidate))
+                    heapq.heappush(
+                        candidates,
+                        (root_costs[i] + spur_cost, next(counter), candidate, i),
+                    )
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+def _get_eulerian_path(edges: list[Edge]) -> list[tuple]:
+    """
+    Get an Eulerian path covering all edges as (start_node, end_node, key) tuples, without creating
+    a networkx graph. Dictionaries of the neighbours and keys of each node are built and modified
+    in the same order as in the undirected graph created by :func:`wayfarer.functions.edges_to_graph`
+    and copied by ``networkx.eulerian_path``, so the same path is returned in linear time.
+    """
+
+    # the adjacency of the graph created by edges_to_graph, where any duplicate
+    # edges are added once
+    adj = {}  # type: dict
+    edge_count = 0
+    for edge in edges:
+        u, v, key = edge[0], edge[1], edge[2]
+        adj.setdefault(u, {})
+        adj.setdefault(v, {})
+        keydict = adj[u].get(v)
+        if keydict is None:
+            keydict = {}
+            adj[u][v] = keydict
+            adj[v][u] = keydict
+        if key not in keydict:
+            keydict[key] = None
+            edge_count += 1
+
+    # the adjacency of the copy of the graph modified by networkx.eulerian_path
+    path_adj = {node: {} for node in adj}  # type: dict
+    for u, neighbours in adj.items():
+        for v, keys in neighbours.items():
+            keydict = path_adj[u].get(v)
+            if keydict is None:
+                keydict = {}
+                path_adj[u][v] = keydict
+                path_adj[v][u] = keydict
+            keydict.update(dict.fromkeys(keys))
+
+    odd_nodes = []
+    for node, neighbours in path_adj.items():
+        degree = sum(len(keys) for keys in neighbours.values())
+        # self-loops count twice towards the degree of a node
+        degree += len(neighbours.get(node, ()))
+        if degree % 2:
+            odd_nodes.append(node)
+
+    if not adj or len(odd_nodes) not in (0, 2):
+        raise networkx.NetworkXError("Graph has no Eulerian paths.")
+
+    source = odd_nodes[0] if odd_nodes else next(iter(path_adj))
+
+    # the Hierholzer algorithm as used by networkx
+    circuit = []  # type: list[tuple]
+    vertex_stack = [(source, None)]
+    last_vertex = None
+    last_key = None
+    while vertex_stack:
+        current_vertex, current_key = vertex_stack[-1]
+        neighbours = path_adj[current_vertex]
+        if not neighbours:
+            if last_vertex is not None:
+                circuit.append((current_vertex, last_vertex, last_key))
+            last_vertex, last_key = current_vertex, current_key
+            vertex_stack.pop()
+        else:
+            next_vertex, keydict = next(iter(neighbours.items()))
+            next_key = next(iter(keydict))
+            vertex_stack.append((next_vertex, next_key))
+            del keydict[next_key]
+            if not keydict:
+                del neighbours[next_vertex]
+                if next_vertex != current_vertex:
+                    del path_adj[next_vertex][current_vertex]
+
+    if len(circuit) != edge_count:
+        # not all edges are connected
+        raise networkx.NetworkXError("Graph has no Eulerian paths.")
+
+    circuit.reverse()
+    return circuit
+
+
 def find_ordered_path(
     edges: list[Edge],
     start_node: int | str | None = None,
     with_direction_flag: bool = True,
+    use_subgraph: bool = False,
 ) -> list[Edge]:
     """
     Given a collection of randomly ordered connected edges, find the full
     path, covering all edges, from one end to the other.
     A start_node can be provided to return the edges in a specific direction.
-    Uses the
+    The path is the same as that found by the
     `eulerian_path <https://networkx.github.io/documentation/stable/reference/algorithms/generated/networkx.algorithms.euler.eulerian_path.html>`_
-    function from networkx
-    """
+    function from networkx, but is assembled from a dictionary of edges indexed by key,
+    in linear time. Set ``use_subgraph`` to create a networkx graph of the edges
+    and use ``eulerian_path`` directly, as in earlier versions.
 
-    subnet = functions.edges_to_graph(edges)
+    >>> edges = [Edge(1, 2, "B", {}), Edge(0, 1, "A", {}), Edge(3, 2, "C", {})]
+    >>> [edge.key for edge in find_ordered_path(edges, start_node=0)]
+    ['A', 'B', 'C']
+    """
 
     try:
-        ordered_path = list(eulerian_path(subnet, source=None, keys=True))
+        if use_subgraph:
+            subnet = functions.edges_to_graph(edges)
+            ordered_path = list(eulerian_path(subnet, source=None, keys=True))
+        else:
+            ordered_path = _get_eulerian_path(edges)
     except networkx.exception.NetworkXError as ex:
         log.exception(ex)
         raise
@@ -427,11 +1256,14 @@ def find_ordered_path(
                     )
                 )
 
-    # now get the edge objects back from the edge list
+    # now get the edge objects back from the edge list, using the first edge with each key
+
+    edges_by_key = {}  # type: dict
+    for edge in edges:
+        edges_by_key.setdefault(edge.key, edge)
 
     for p in ordered_path:
-        edge_key = p[2]
-        edge = next(e for e in edges if e.key == edge_key)
+        edge = edges_by_key[p[2]]
         if with_direction_flag:
             functions.add_direction_flag(p[0], p[1], edge.attributes)
         ordered_edges.append(edge)
@@ -0,0 +1,126 @@
+"""
+This module allows a network to be shared between several processes, for example
+the workers of a web service, without each process holding its own copy of the network
+
+A network is published once as a columnar network file (see :mod:`wayfarer.columnar`) in a
+shared memory directory (``/dev/shm`` where available). Each process then attaches to the file
+using memory-mapping, so all processes share the same physical memory pages. Attached networks
+are read-only and can be passed to :func:`wayfarer.routing.solve_shortest_path`,
+:func:`wayfarer.functions.get_edge_by_key`, or wrapped with :func:`wayfarer.overlay.create_overlay`
+to add edits for a single request.
+
+A published network can be replaced while processes are attached to it. Processes
+attach to the new network on their next call to :func:`attach_network`, and the previous
+network remains valid until it is no longer used.
+"""
+
+from __future__ import annotations
+import logging
+import os
+import tempfile
+import networkx
+from wayfarer import LENGTH_FIELD, columnar
+
+log = logging.getLogger("wayfarer")
+
+SHARED_MEMORY_DIRECTORY = "/dev/shm"
+
+# networks attached in the current process, keyed by path
+_attached: dict[str, tuple[tuple, networkx.MultiGraph]] = {}
+
+
+def get_shared_path(name: str, directory: str | None = None) -> str:
+    """
+    Get the path of a published network
+
+    Args:
+        name: The name of the network
+        directory: The folder used to publish the network. Defaults to the shared
+                   memory directory if available, or the temporary folder
+    Returns:
+        The path to the network file
+
+    >>> os.path.basename(get_shared_path("dublin"))
+    'wayfarer-dublin.wyf'
+    """
+
+    if directory is None:
+        if os.path.isdir(SHARED_MEMORY_DIRECTORY):
+            directory = SHARED_MEMORY_DIRECTORY
+        else:
+            directory = tempfile.gettempdir()
+
+    return os.path.join(directory, f"wayfarer-{name}.wyf")
+
+
+def publish_network(
+    net: networkx.MultiGraph | networkx.MultiDiGraph,
+    name: str,
+    directory: str | None = None,
+    weight: str | None = LENGTH_FIELD,
+) -> str:
+    """
+    Publish a network so it can be attached to by other processes. Any network
+    already published with the same name is replaced
+
+    Args:
+        net: The network
+        name: The name used to attach to the network
+        directory: The folder to publish the network to. See :func:`get_shared_path`
+        weight: The edge attribute used to compile the network for routing
+    Returns:
+        The path to the published network file
+    """
+
+    path = get_shared_path(name, directory)
+    temp_path = "{}.{}.tmp".format(path, os.getpid())
+
+    # write to a temporary file first so processes never attach to a partially written file
+    columnar.save_network(net, temp_path, weight=weight)
+    os.replace(temp_path, path)
+
+    log.info(f"Published the network {name} to {path}")
+    return path
+
+
+def attach_network(
+    name: str, directory: str | None = None
+) -> columnar.ColumnarMultiGraph | columnar.ColumnarMultiDiGraph:
+    """
+    Attach to a published network. The network is only loaded once per process,
+    unless it has been published again since it was attached
+
+    Args:
+        name: The name of the network
+        directory: The folder the network was published to. See :func:`get_shared_path`
+    Returns:
+        A read-only network
+    """
+
+    path = get_shared_path(name, directory)
+    stat = os.stat(path)  # raises a FileNotFoundError if the network is not published
+    version = (stat.st_ino, stat.st_mtime_ns)
+
+    attached = _attached.get(path)
+    if attached is not None and attached[0] == version:
+        return attached[1]
+
+    log.info(f"Attaching to the network {name} at {path}")
+    net = columnar.load_network(path)
+    _attached[path] = (version, net)
+    return net
+
+
+def unpublish_network(name: str, directory: str | None = None) -> None:
+    """
+    Remove a published network. Processes already attached to the network
+    can continue to use it
+
+    Args:
+        name: The name of the network
+        directory: The folder the network was published to. See :func:`get_shared_path`
+    """
+
+    path = get_shared_path(name, directory)
+    os.remove(path)
+    _attached.pop(path, None)
@@ -0,0 +1,435 @@
+"""
+This module contains a spatial index of the edge geometries of a network, used to find
+the edges closest to a point, for example to snap GPS points or clicks on a map
+to the network. Requires the Shapely module
+
+Edge geometries are those stored on the edges, for example by
+:func:`wayfarer.loader.load_network_from_geometries` with ``keep_geometry=True``.
+The index uses a Shapely ``STRtree``, which cannot be modified once created, so edges added
+to or removed from the network are recorded as changes alongside the tree. The tree is rebuilt
+when the number of changes becomes large.
+
+An index created with :func:`create_spatial_index` is registered on the network, and updated when
+edges are added or removed using :func:`wayfarer.functions.add_edge` and :func:`wayfarer.functions.remove_edge`,
+for example when edges are split using :mod:`wayfarer.splitter`. An overlay created with
+:func:`wayfarer.overlay.create_overlay` gets its own copy of the index, so changes to the
+overlay do not affect the index of the base network.
+"""
+
+from __future__ import annotations
+import logging
+from collections.abc import Iterable, Mapping
+from math import sqrt
+from typing import NamedTuple
+import numpy
+import shapely
+import networkx
+from shapely.geometry import shape
+from shapely.geometry.base import BaseGeometry
+from wayfarer import GEOMETRY_FIELD, Edge, linearref
+
+log = logging.getLogger("wayfarer")
+
+# the tree is rebuilt when there are more changes than this, or a tenth
+# of the number of edges in the tree
+MIN_REBUILD_CHANGES = 64
+
+
+class EdgeMatch(NamedTuple):
+    """
+    An edge found close to a point
+    """
+
+    key: int | str
+    # the distance from the point to the edge
+    distance: float
+    # the distance along the edge geometry to the closest point on the edge
+    measure: float
+    # the coordinates of the closest point on the edge
+    point: tuple[float, float]
+
+
+def get_geometry(attributes: Mapping, geometry_field: str = GEOMETRY_FIELD):
+    """
+    Get the geometry of an edge as a Shapely geometry. Geometries can be stored
+    as Shapely objects or as ``__geo_interface__`` dicts
+
+    Args:
+        attributes: The attributes of the edge
+        geometry_field: The attribute containing the edge geometry
+    Returns:
+        The geometry, or ``None`` if the edge has no geometry
+
+    >>> get_geometry({"geometry": {"type": "LineString", "coordinates": [(0, 0), (0, 1)]}})
+    <LINESTRING (0 0, 0 1)>
+    """
+
+    geometry = attributes.get(geometry_field)
+
+    if geometry is None or isinstance(geometry, BaseGeometry):
+        return geometry
+
+    return shape(geometry)
+
+
+def _to_array(geometries: list) -> numpy.ndarray:
+    # create an object array without numpy inspecting the geometries
+    array = numpy.empty(len(geometries), dtype=object)
+    array[:] = geometries
+    return array
+
+
+class SpatialIndex:
+    """
+    A spatial index of the geometries of the edges in a network.
+    Create using :func:`create_spatial_index` rather than directly.
+
+    >>> net = networkx.MultiGraph()
+    >>> edge = net.add_edge(0, 1, key="A", geometry=shapely.LineString([(0, 0), (100, 0)]))
+    >>> index = SpatialIndex(net)
+    >>> index.get_nearest_edges((20, 5))
+    [EdgeMatch(key='A', distance=5.0, measure=20.0, point=(20.0, 0.0))]
+    """
+
+    def __init__(
+        self,
+        net: networkx.MultiGraph | networkx.MultiDiGraph | None = None,
+        geometry_field: str = GEOMETRY_FIELD,
+    ):
+
+        self.geometry_field = geometry_field
+
+        keys = []
+        geometries = []
+
+        if net is not None:
+            for _, _, key, attributes in net.edges(keys=True, data=True):
+                geometry = get_geometry(attributes, geometry_field)
+                if geometry is not None:
+                    keys.append(key)
+                    geometries.append(geometry)
+
+        self._set_items(keys, geometries)
+
+    def _set_items(self, keys: list, geometries: list) -> None:
+
+        self._keys = keys
+        # used to check if a removed edge is in the tree
+        self._key_set = frozenset(keys)
+        self._geometries = _to_array(geometries)
+        self._tree = None  # type: shapely.STRtree | None
+
+        # edges changed since the tree was created
+        self._added = {}  # type: dict
+        self._removed = set()  # type: set
+
+    @property
+    def tree(self) -> shapely.STRtree:
+        """
+        The ``STRtree`` of edge geometries, created when first used
+        """
+
+        if len(self._added) + len(self._removed) > max(
+            MIN_REBUILD_CHANGES, len(self._keys) // 10
+        ):
+            self._rebuild()
+
+        if self._tree is None:
+            self._tree = shapely.STRtree(self._geometries)
+
+        return self._tree
+
+    def _rebuild(self) -> None:
+
+        log.debug("Rebuilding the spatial index")
+        keys = []
+        geometries = []
+
+        for key, geometry in zip(self._keys, self._geometries):
+            if key not in self._removed:
+                keys.append(key)
+                geometries.append(geometry)
+
+        keys.extend(self._added.keys())
+        geometries.extend(self._added.values())
+        self._set_items(keys, geometries)
+
+    def __len__(self) -> int:
+        return len(self._keys) - len(self._removed) + len(self._added)
+
+    def copy(self) -> SpatialIndex:
+        """
+        Create a copy of the index, which shares the tree with the
+        original index but records its own changes
+        """
+
+        index = SpatialIndex.__new__(SpatialIndex)
+        index.__dict__.update(self.__dict__)
+        index._added = dict(self._added)
+        index._removed = set(self._removed)
+        return index
+
+    def check_edges(self, edges: Iterable[Edge]) -> None:
+        """
+        Check that edges can be added to the index before a network is modified,
+        as with :meth:`wayfarer.indexes.AttributeIndex.check_edges`. Any edge can
+        be added to a spatial index, so no errors are raised
+
+        Args:
+            edges: The edges to check
+        """
+
+    def add_edge(self, edge: Edge) -> None:
+        """
+        Add an edge to the index. Edges without a geometry are ignored
+
+        Args:
+            edge: The edge to add
+        """
+
+        geometry = get_geometry(edge.attributes, self.geometry_field)
+        if geometry is not None:
+            self._added[edge.key] = geometry
+
+    def remove_edge(self, edge: Edge) -> None:
+        """
+        Remove an edge from the index
+
+        Args:
+            edge: The edge to remove
+        """
+
+        self._added.pop(edge.key, None)
+        # edges that were only added since the tree was created are not recorded as removed
+        if edge.key in self._key_set:
+            self._removed.add(edge.key)
+
+    def _is_removed(self, i: int) -> bool:
+        # base edges that have been removed, or replaced by an edge added with the same key
+        return bool(self._removed) and self._keys[i] in self._removed
+
+    def _get_search_distance(self, tree: shapely.STRtree, point) -> float:
+
+        indices, distances = tree.query_nearest(point, return_distance=True)
+        distance = float(distances[0]) if len(distances) else 0.0
+
+        if distance == 0:
+            # use the average spacing of the edges
+            minx, miny, maxx, maxy = shapely.total_bounds(self._geometries)
+            distance = max(maxx - minx, maxy - miny) / sqrt(len(self._keys)) or 1.0
+
+        return distance
+
+    def _get_base_candidates(
+        self, point, count: int, max_distance: float | None
+    ) -> list[int]:
+
+        tree = self.tree
+        if len(self._keys) == 0:
+            return []
+
+        if max_distance is not None:
+            indices = tree.query(point, predicate="dwithin", distance=max_distance)
+            return [i for i in indices if not self._is_removed(i)]
+
+        # widen the search until enough edges are found
+        distance = self._get_search_distance(tree, point)
+
+        while True:
+            indices = tree.query(point, predicate="dwithin", distance=distance)
+            candidates = [i for i in indices if not self._is_removed(i)]
+            if len(candidates) >= count or len(indices) == len(self._keys):
+                return candidates
+            distance *= 2
+
+    def _create_matches(self, keys: list, geometries, points) -> list[EdgeMatch]:
+
+        measures = shapely.line_locate_point(geometries, points)
+        snapped = shapely.get_coordinates(
+            shapely.line_interpolate_point(geometries, measures)
+        )
+        distances = shapely.distance(geometries, points)
+
+        return [
+            EdgeMatch(key, float(d), float(m), (float(x), float(y)))
+            for key, d, m, (x, y) in zip(keys, distances, measures, snapped)
+        ]
+
+    def get_nearest_edges(
+        self, point, count: int = 1, max_distance: float | None = None
+    ) -> list[EdgeMatch]:
+        """
+        Get the edges closest to a point
+
+        Args:
+            point: A Shapely point or (x, y) coordinates
+            count: The number of edges to return
+            max_distance: Only return edges within this distance of the point
+        Returns:
+            A list of matches, ordered by their distance from the point.
+            Edges at the same distance are ordered by their position in the index.
+
+        >>> net = networkx.MultiGraph()
+        >>> edge = net.add_edge(0, 1, key="A", geometry=shapely.LineString([(0, 0), (100, 0)]))
+        >>> edge = net.add_edge(1, 2, key="B", geometry=shapely.LineString([(100, 0), (100, 100)]))
+        >>> index = SpatialIndex(net)
+        >>> [m.key for m in index.get_nearest_edges((90, 5), count=2)]
+        ['A', 'B']
+        >>> index.get_nearest_edges((90, 5), max_distance=1)
+        []
+        """
+
+        if not isinstance(point, BaseGeometry):
+            point = shapely.Point(point)
+
+        base_candidates = self._get_base_candidates(point, count, max_distance)
+        keys = [self._keys[i] for i in base_candidates] + list(self._added.keys())
+        geometries = numpy.concatenate(
+            [self._geometries[base_candidates], _to_array(list(self._added.values()))]
+        )
+
+        if len(keys) == 0:
+            return []
+
+        distances = shapely.distance(geometries, point)
+        if max_distance is not None:
+            keep = distances <= max_distance
+            keys = [k for k, kept in zip(keys, keep) if kept]
+            geometries, distances = geometries[keep], distances[keep]
+
+        order = numpy.argsort(distances, kind="stable")[:count]
+        return self._create_matches([keys[i] for i in order], geometries[order], point)
+
+    def get_nearest_edges_for_points(
+        self, points, max_distance: float | None = None
+    ) -> list[EdgeMatch | None]:
+        """
+        Get the closest edge to each of a set of points. All points are queried against the
+        tree at once, and measures are calculated using Shapely array functions.
+
+        Args:
+            points: The points. See :func:`wayfarer.linearref.get_coordinate_array`
+            max_distance: Only return edges within this distance of a point
+        Returns:
+            A list containing the closest edge for each point, or ``None`` if
+            there are no edges within the maximum distance of a point
+
+        >>> net = networkx.MultiGraph()
+        >>> edge = net.add_edge(0, 1, key="A", geometry=shapely.LineString([(0, 0), (100, 0)]))
+        >>> edge = net.add_edge(1, 2, key="B", geometry=shapely.LineString([(100, 0), (100, 100)]))
+        >>> index = SpatialIndex(net)
+        >>> [m.key for m in index.get_nearest_edges_for_points([(50, 5), (95, 50)])]
+        ['A', 'B']
+        >>> index.get_nearest_edges_for_points([(50, 50)], max_distance=10)
+        [None]
+        """
+
+        pts = shapely.points(linearref.get_coordinate_array(points))
+        nearest = numpy.full(len(pts), -1)
+        nearest_distances = numpy.full(len(pts), numpy.inf)
+        geometries = numpy.empty(len(pts), dtype=object)
+
+        tree = self.tree
+        if len(pts) and len(self._keys):
+            (point_indices, tree_indices), distances = tree.query_nearest(
+                pts, max_distance=max_distance, return_distance=True, all_matches=False
+            )
+            nearest[point_indices] = tree_indices
+            nearest_distances[point_indices] = distances
+            geometries[point_indices] = self._geometries[tree_indices]
+
+        keys = [self._keys[i] if i >= 0 else None for i in nearest]
+
+        if self._removed:
+            # search again for points closest to a removed edge
+            for i in numpy.flatnonzero(nearest >= 0):
+                if self._is_removed(nearest[i]):
+                    candidates = self._get_base_candidates(pts[i], 1, max_distance)
+                    if candidates:
+                        candidate_distances = shapely.distance(
+                            self._geometries[candidates], pts[i]
+                        )
+                        best = int(candidate_distances.argmin())
+                        keys[i] = self._keys[candidates[best]]
+                        geometries[i] = self._geometries[candidates[best]]
+                        nearest_distances[i] = candidate_distances[best]
+                    else:
+                        keys[i] = None
+                        nearest_distances[i] = numpy.inf
+
+        if self._added and len(pts):
+            added_keys = list(self._added.keys())
+            added_geometries = _to_array(list(self._added.values()))
+            # a matrix of the distance from each point to each added edge
+            matrix = shapely.distance(pts[:, None], added_geometries[None, :])
+            closest = matrix.argmin(axis=1)
+            closest_distances = matrix[numpy.arange(len(pts)), closest]
+            for i in numpy.flatnonzero(closest_distances < nearest_distances):
+                if max_distance is None or closest_distances[i] <= max_distance:
+                    keys[i] = added_keys[closest[i]]
+                    geometries[i] = added_geometries[closest[i]]
+
+        found = [i for i, key in enumerate(keys) if key is not None]
+        matches = [None] * len(pts)  # type: list[EdgeMatch | None]
+
+        for point_index, match in zip(
+            found,
+            self._create_matches(
+                [keys[i] for i in found], geometries[found], pts[found]
+            ),
+        ):
+            matches[point_index] = match
+
+        return matches
+
+
+def create_spatial_index(
+    net: networkx.MultiGraph | networkx.MultiDiGraph,
+    geometry_field: str = GEOMETRY_FIELD,
+) -> SpatialIndex:
+    """
+    Create a spatial index of the edge geometries of a network, and register it on
+    the network so it is updated as edges are added and removed
+
+    Args:
+        net: The network
+        geometry_field: The edge attribute containing the edge geometry
+    Returns:
+        The spatial index
+
+    >>> from wayfarer import functions
+    >>> net = networkx.MultiGraph()
+    >>> index = create_spatial_index(net)
+    >>> edge = functions.add_edge(net, 0, 1, "A", {"geometry": shapely.LineString([(0, 0), (100, 0)])})
+    >>> [m.key for m in index.get_nearest_edges((20, 5))]
+    ['A']
+    """
+
+    index = SpatialIndex(net, geometry_field)
+    net.graph.setdefault("indexes", []).append(index)
+    return index
+
+
+def get_spatial_index(
+    net: networkx.MultiGraph | networkx.MultiDiGraph,
+    geometry_field: str = GEOMETRY_FIELD,
+) -> SpatialIndex | None:
+    """
+    Get the spatial index registered on a network, if one has been created
+
+    Args:
+        net: The network
+        geometry_field: The edge attribute containing the edge geometry
+    Returns:
+        The spatial index, or ``None`` if the network has no spatial index
+
+    >>> net = networkx.MultiGraph()
+    >>> get_spatial_index(net) is None
+    True
+    """
+
+    for index in net.graph.get("indexes", []):
+        if isinstance(index, SpatialIndex) and index.geometry_field == geometry_field:
+            return index
+
+    return None
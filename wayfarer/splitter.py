@@ -6,9 +6,11 @@ to join the split edges
 from __future__ import annotations
 import logging
 import uuid
-from collections import defaultdict, OrderedDict
-from wayfarer import functions, linearref
+from collections import OrderedDict
+from collections.abc import Iterable, Mapping
+from wayfarer import functions, linearref, loader
 import networkx
+from shapely.geometry import LineString, shape
 from wayfarer import (
     LENGTH_FIELD,
     OFFSET_FIELD,
@@ -72,7 +74,8 @@ def split_with_points(
 
     # first we'll group all points for each edge
 
-    edge_splits = defaultdict(list)
+    join_edges = []
+    splits = []
 
     for r in recs:
         edge_id, point_id, measure = (
@@ -94,31 +97,34 @@ def split_with_points(
             start_node=from_node, end_node=split_node, key=unique_edge_key, attributes=r
         )
 
-        functions.add_edge(net, **edge._asdict())  # unpack namedtuple to **kwargs
-        edge_splits[edge_id].append(measure)
+        join_edges.append(edge)
+        splits.append((edge_id, measure))
 
-    for edge_id, measures in edge_splits.items():
-        split_network_edge(net, edge_id, measures)
+    # all join edges are added, and then all edges split, in bulk
+    loader.add_edges(net, join_edges)
+    split_network_edges(net, splits)
 
 
 def get_split_attributes(
-    original_attributes: dict,
+    original_attributes: Mapping,
     from_m: float | int,
     to_m: float | int,
     start_node: str | int | None = None,
     end_node: str | int | None = None,
+    geometry: LineString | None = None,
 ) -> dict:
     """
     For a part of an edge that has been split
     update its attributes so the length is correct
     and any start and end nodes stored in the attributes table
-    are correct
+    are correct. If the edge stores a geometry, the ``geometry``
+    of the part can be passed if it has already been cut from the original line
 
     >>> atts = {"OFFSET": 10, "LEN_": 100}
     >>> get_split_attributes(atts, 50, 70)
     {'OFFSET': 60, 'LEN_': 20, 'IS_SPLIT': True}
     """
-    atts = original_attributes.copy()
+    atts = dict(original_attributes)
     atts[LENGTH_FIELD] = to_m - from_m
 
     if OFFSET_FIELD in original_attributes:
@@ -141,9 +147,12 @@ def get_split_attributes(
 
     # if geometry is being stored in the edge then create a new line
     # based on the offset
-    if GEOMETRY_FIELD in atts:
+    if geometry is not None:
+        atts[GEOMETRY_FIELD] = geometry
+    elif GEOMETRY_FIELD in atts:
         edge_id = atts[EDGE_ID_FIELD]
-        ls = atts[GEOMETRY_FIELD]
+        # geometries can be stored as shapely objects or as __geo_interface__ dicts
+        ls = shape(atts[GEOMETRY_FIELD])
         log.debug(f"Creating split geometry from {from_m} to {to_m} on {edge_id}")
         cut_line = linearref.create_line(ls, from_m, to_m)
         atts[GEOMETRY_FIELD] = cut_line
@@ -281,7 +290,7 @@ def unsplit_network_edges(
             net.remove_node(n)
 
     # copy across any attributes from the original edge
-    atts = first_edge.attributes.copy()
+    atts = dict(first_edge.attributes)
 
     atts.update(
         {
@@ -301,30 +310,26 @@ def unsplit_network_edges(
     return new_edge
 
 
-def split_network_edge(
-    net: networkx.MultiGraph | networkx.MultiDiGraph,
-    key: str | int,
-    measures: list[int | float],
-) -> list[Edge]:
+def create_split_edges(original_edge: Edge, measures: list[int | float]) -> list[Edge]:
     """
-    Split a network edge based on a list of measures.
-    We can also split a split edge but this relies on knowing the key of the
-    split edge and measures would need to reflect the length of the new edge
-    rather than the original edge.
+    Create the edges for the parts of an edge split at a list of measures, without
+    modifying the network. If the edge stores a geometry all parts are cut from
+    the line in a single pass using :func:`wayfarer.linearref.split_line`
 
     Args:
-        net (object): a networkx network
-        key: the key of the edge to be split
-        measures: a list of measures where the line should be split
+        original_edge: The edge to be split
+        measures: A list of measures where the line should be split
 
     Returns:
-        A list of the new edges created by splitting
-    """
+        A list of the new edges, or an empty list if none of the measures
+        are along the edge
 
-    new_edges = []
-
-    original_edge = functions.get_edge_by_key(net, key, with_data=True)
+    >>> edge = Edge(1, 2, 5, {"EDGE_ID": 5, "LEN_": 100})
+    >>> [e.key for e in create_split_edges(edge, [20, 60, 150])]
+    ['5::20', '5::60', '5::100']
+    """
 
+    key = original_edge.key
     original_length = original_edge.attributes[LENGTH_FIELD]
 
     validated_measures = []
@@ -341,21 +346,29 @@ def split_network_edge(
 
     if len(validated_measures) == 0:
         log.debug("No measures along line - returning original edges")
-        return [original_edge]
+        return []
 
-    log.debug(f"Splitting {original_edge.key} with {len(measures)} points")
+    log.debug(f"Splitting {key} with {len(measures)} points")
 
-    functions.remove_edge_by_key(net, original_edge.key)
+    to_measures = sorted(set(validated_measures))
+
+    geometries = [None] * (len(to_measures) + 1)  # type: list
+    if GEOMETRY_FIELD in original_edge.attributes:
+        # geometries can be stored as shapely objects or as __geo_interface__ dicts
+        ls = shape(original_edge.attributes[GEOMETRY_FIELD])
+        log.debug(f"Creating {len(geometries)} split geometries on {key}")
+        geometries = linearref.split_line(ls, to_measures)
+
+    new_edges = []
     prev_node = original_edge.start_node
     from_m = 0  # type: (int | float)
 
-    for to_m in sorted(set(validated_measures)):
+    for to_m, geometry in zip(to_measures, geometries):
         split_key = create_split_key(key, to_m)
         atts = get_split_attributes(
-            original_edge.attributes, from_m, to_m, prev_node, split_key
+            original_edge.attributes, from_m, to_m, prev_node, split_key, geometry
         )
-        new_edge = functions.add_edge(net, prev_node, split_key, split_key, atts)
-        new_edges.append(new_edge)
+        new_edges.append(Edge(prev_node, split_key, split_key, atts))
         from_m, prev_node = to_m, split_key
 
     # add final part
@@ -365,17 +378,103 @@ def split_network_edge(
         original_length,
         prev_node,
         original_edge.end_node,
+        geometries[-1],
     )
 
     split_key = create_split_key(key, original_length)
-    new_edge = functions.add_edge(
-        net, prev_node, original_edge.end_node, split_key, atts
-    )
-    new_edges.append(new_edge)
+    new_edges.append(Edge(prev_node, original_edge.end_node, split_key, atts))
+
+    return new_edges
+
+
+def split_network_edge(
+    net: networkx.MultiGraph | networkx.MultiDiGraph,
+    key: str | int,
+    measures: list[int | float],
+) -> list[Edge]:
+    """
+    Split a network edge based on a list of measures.
+    We can also split a split edge but this relies on knowing the key of the
+    split edge and measures would need to reflect the length of the new edge
+    rather than the original edge.
+
+    Args:
+        net (object): a networkx network
+        key: the key of the edge to be split
+        measures: a list of measures where the line should be split
+
+    Returns:
+        A list of the new edges created by splitting
+    """
+
+    original_edge = functions.get_edge_by_key(net, key, with_data=True)
+    new_edges = create_split_edges(original_edge, measures)
+
+    if not new_edges:
+        return [original_edge]
+
+    functions.remove_edge_by_key(net, original_edge.key)
+
+    for new_edge in new_edges:
+        functions.add_edge(net, **new_edge._asdict())
 
     return new_edges
 
 
+def split_network_edges(
+    net: networkx.MultiGraph | networkx.MultiDiGraph,
+    splits: Iterable[tuple[str | int, int | float]],
+) -> dict[str | int, list[Edge]]:
+    """
+    Split many network edges at once, for example to join thousands of points to a network.
+    The edges are found using :func:`wayfarer.functions.get_edges_by_keys`, the geometry of each
+    edge is cut in a single pass, and all edges are then removed and added to the
+    network, its reverse lookup dictionary, and any indexes in bulk.
+
+    Args:
+        net: a networkx network
+        splits: a list of (key, measure) tuples, with a tuple for each point where an edge should be split
+
+    Returns:
+        A dictionary of the key of each edge and a list of the new edges created by splitting it.
+        Edges with no measures along the edge are not split, and are returned unchanged
+
+    >>> net = networkx.MultiGraph()
+    >>> edge = functions.add_edge(net, 1, 2, "A", {"EDGE_ID": "A", "LEN_": 100})
+    >>> edge = functions.add_edge(net, 2, 3, "B", {"EDGE_ID": "B", "LEN_": 50})
+    >>> split_edges = split_network_edges(net, [("A", 20), ("B", 10), ("A", 60)])
+    >>> {key: [e.key for e in edges] for key, edges in split_edges.items()}
+    {'A': ['A::20', 'A::60', 'A::100'], 'B': ['B::10', 'B::50']}
+    """
+
+    measures_by_edge = group_measures_by_edge(splits)
+
+    original_edges, missing = functions.get_edges_by_keys(net, measures_by_edge)
+    if missing:
+        raise KeyError(f"The edges with keys {missing} were not found in the network")
+
+    split_edges = {}
+    removed_edges = []
+    added_edges = []
+
+    for original_edge in original_edges:
+        new_edges = create_split_edges(
+            original_edge, measures_by_edge[original_edge.key]
+        )
+        if new_edges:
+            removed_edges.append(original_edge)
+            added_edges.extend(new_edges)
+            split_edges[original_edge.key] = new_edges
+        else:
+            split_edges[original_edge.key] = [original_edge]
+
+    log.debug(f"Splitting {len(removed_edges)} edges into {len(added_edges)} edges")
+    loader.remove_edges(net, removed_edges)
+    loader.add_edges(net, added_edges)
+
+    return split_edges
+
+
 def get_measure_for_point(line, pt):
     snapped_input_point, dist = linearref.get_nearest_vertex(pt, line)
     log.debug(f"Input point {dist:.5f} from line")
@@ -383,6 +482,20 @@ def get_measure_for_point(line, pt):
     return measure
 
 
+def get_measures_for_points(line, points):
+    """
+    Get the measures along a line of a set of points, for example GPS points,
+    after snapping them to the line. A batch version of ``get_measure_for_point``
+
+    >>> from shapely.geometry import LineString
+    >>> line = LineString([(0, 0), (0, 100)])
+    >>> get_measures_for_points(line, [(1, 10), (-1, 50)]).tolist()
+    [10.0, 50.0]
+    """
+    snapped_points, distances = linearref.get_nearest_vertices(points, line)
+    return linearref.get_measures_on_line(line, snapped_points)
+
+
 def get_split_node_for_measure(network_edge, length, measure):
     if abs(length - measure) < 0.001:
         # don't split at the end of the line
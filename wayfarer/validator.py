@@ -3,8 +3,14 @@ A collection of functions to help validate a network
 """
 
 from __future__ import annotations
+import logging
 from collections import Counter
+from collections.abc import Mapping
+from typing import Iterable
 import networkx
+from wayfarer import loader
+
+log = logging.getLogger("wayfarer")
 
 
 def duplicate_keys(
@@ -25,24 +31,156 @@ def duplicate_keys(
     return duplicates
 
 
-def valid_reverse_lookup(net: networkx.MultiGraph | networkx.MultiDiGraph):
+def get_checksum(net: networkx.MultiGraph | networkx.MultiDiGraph) -> int:
+    """
+    Calculate the checksum of the keys of the edges in a network, which matches the
+    :attr:`wayfarer.loader.KeyIndex.checksum` of a valid reverse lookup dictionary.
+    Unlike :func:`recalculate_keys` no dictionary is created, but every edge in the
+    network is still read. Edges changed directly with networkx functions cannot be found
+    any other way, so the checksum of a network is not maintained incrementally
+
+    Args:
+        net: A network
+    Returns:
+        The checksum
+    """
+    directed = net.is_directed()
+    checksum = 0
+    for start_node, end_node, key in net.edges(keys=True):
+        checksum += loader.get_key_checksum(key, start_node, end_node, directed)
+    return checksum & loader.CHECKSUM_MASK
+
+
+def get_lookup_checksum(keys: Mapping, directed: bool = False) -> int:
+    """
+    Get the checksum of a reverse lookup dictionary. The checksum of a
+    :class:`wayfarer.loader.KeyIndex` is maintained as it is modified so
+    is returned directly
+
+    Args:
+        keys: The reverse lookup dictionary
+        directed: If ``True`` the order of the nodes of each entry is included
+                  in the checksum, as for the edges of a ``MultiDiGraph``
+    Returns:
+        The checksum
+    """
+    if isinstance(keys, loader.KeyIndex) and keys.directed == directed:
+        return keys.checksum
+
+    checksum = 0
+    for key, (start_node, end_node) in keys.items():
+        checksum += loader.get_key_checksum(key, start_node, end_node, directed)
+    return checksum & loader.CHECKSUM_MASK
+
+
+def valid_reverse_lookup(net: networkx.MultiGraph | networkx.MultiDiGraph) -> bool:
     """
     Check if the reverse lookup dictionary
-    has the same count as edges in the network
+    has the same count as edges in the network, and that the
+    checksums of the dictionary and the edges in the network match.
+    The checksum of a :class:`wayfarer.loader.KeyIndex` is kept up to date, but
+    the checksum of the network is calculated with :func:`get_checksum`, so
+    the check takes time proportional to the number of edges. To repair only the edges
+    known to have changed use :func:`reconcile_keys`
+
+    >>> from wayfarer import functions
+    >>> net = loader.create_graph()
+    >>> edge = functions.add_edge(net, 0, 1, "A", {})
+    >>> valid_reverse_lookup(net)
+    True
+    >>> net.add_edge(1, 2, key="B")
+    'B'
+    >>> valid_reverse_lookup(net)
+    False
     """
-    return len(net.graph["keys"]) == len(net.edges())
+    keys = net.graph["keys"]
+    if len(keys) != len(net.edges()):
+        return False
+    return get_lookup_checksum(keys, net.is_directed()) == get_checksum(net)
 
 
 def recalculate_keys(net: networkx.MultiGraph | networkx.MultiDiGraph):
     """
     Recalculate keys in the reverse lookup dictionary
     These can become out-of-sync following a merge of networks e.g. with
-    the compose_all function
+    the compose_all function. If the edges that were changed are known,
+    use :func:`reconcile_keys` instead
     """
 
-    net.graph["keys"] = {}
-    for start_node, end_node, key in net.edges(keys=True):
-        net.graph["keys"][key] = (start_node, end_node)
+    net.graph["keys"] = loader.KeyIndex(
+        (
+            (key, (start_node, end_node))
+            for start_node, end_node, key in net.edges(keys=True)
+        ),
+        directed=net.is_directed(),
+    )
+
+
+def reconcile_keys(
+    net: networkx.MultiGraph | networkx.MultiDiGraph,
+    edges: Iterable[tuple] | None = None,
+) -> int:
+    """
+    Repair the reverse lookup dictionary of a network by checking only the edges
+    that may have changed, rather than every edge in the network. These are the edges
+    passed to the function, such as the edges of networks merged with ``compose_all``,
+    and the keys changed since the :class:`wayfarer.loader.KeyIndex` was last reconciled.
+    If the reverse lookup dictionary is not a :class:`wayfarer.loader.KeyIndex` it is
+    converted to one, and changes to it are recorded from then on.
+
+    Args:
+        net: A network
+        edges: (start_node, end_node, key) tuples of edges added or removed without
+               updating the reverse lookup dictionary
+    Returns:
+        The number of entries in the reverse lookup dictionary that were changed
+
+    >>> from wayfarer import functions
+    >>> net1 = loader.create_graph()
+    >>> edge = functions.add_edge(net1, 0, 1, "A", {})
+    >>> net2 = loader.create_graph()
+    >>> edge = functions.add_edge(net2, 1, 2, "B", {})
+    >>> net = networkx.compose(net1, net2)
+    >>> net.graph["keys"] = net.graph["keys"].copy()  # compose shares the graph attributes
+    >>> reconcile_keys(net, net1.edges(keys=True))
+    1
+    >>> net.graph["keys"]
+    {'B': (1, 2), 'A': (0, 1)}
+    """
+
+    keys = net.graph.get("keys")
+    if not isinstance(keys, loader.KeyIndex):
+        keys = loader.KeyIndex(keys or {}, directed=net.is_directed())
+        net.graph["keys"] = keys
+
+    # the possible nodes of each edge to check
+    candidates = {}  # type: dict
+    for start_node, end_node, key, *_ in edges or []:
+        candidates.setdefault(key, []).append((start_node, end_node))
+
+    if keys.changes:
+        for key in keys.changes:
+            candidates.setdefault(key, [])
+
+    changed = 0
+    for key, nodes_list in candidates.items():
+        current = keys.get(key)
+        if current is not None:
+            nodes_list.append(current)
+
+        found = next((nodes for nodes in nodes_list if net.has_edge(*nodes, key)), None)
+        if found == current:
+            continue
+
+        if current is not None:
+            del keys[key]
+        if found is not None:
+            keys[key] = found
+        changed += 1
+
+    keys.checkpoint()
+    log.debug(f"Checked {len(candidates)} keys and updated {changed}")
+    return changed
 
 
 def edge_attributes(